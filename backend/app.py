@@ -1,11 +1,23 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask import (
+    Blueprint,
+    Flask,
+    current_app,
+    render_template,
+    request,
+    jsonify,
+    redirect,
+    url_for,
+)
+from werkzeug.local import LocalProxy
 from delivery_predictor import DeliveryPredictor
+from geocoding import MAX_BATCH_SIZE, NOMINATIM_URL, Geocoder, normalize_address
+from route_solver import EXACT_MAX_STOPS, SOLVERS
 from datetime import datetime
 import argparse
-import requests
-import json
 import os
+import threading
 from chatbot_assistant import DeliveryChatbot
+from dashboard import DashboardView
 from dotenv import load_dotenv
 from flask_cors import CORS  # Import CORS
 import logging
@@ -13,38 +25,157 @@ import logging
 # Load environment variables from .env file
 load_dotenv()
 
-app = Flask(__name__)
-# Enable CORS for all routes
-CORS(
-    app,
-    resources={
-        r"/*": {
-            "origins": [
-                "*",
-            ],
-            "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-            "allow_headers": [
-                "Content-Type",
-                "Authorization",
-                "X-Requested-With",
-                "Accept",
-            ],
-        }
-    },
-    supports_credentials=True,
-)
-app.secret_key = os.environ.get(
-    "FLASK_SECRET_KEY", "dev_secret_key"
-)  # Required for session
-predictor = DeliveryPredictor()
+bp = Blueprint("delivery", __name__)
+
+# Services of the app handling the current request
+current_predictor = LocalProxy(lambda: current_app.extensions["delivery"].predictor)
+current_chatbot = LocalProxy(lambda: current_app.extensions["delivery"].chatbot)
+current_dashboard = LocalProxy(lambda: current_app.extensions["delivery"].dashboard)
+current_geocoder = LocalProxy(lambda: current_app.extensions["delivery"].geocoder)
+
+
+def env_flag(name, default):
+    """Read a boolean ("0"/"1") setting from the environment"""
+    return os.environ.get(name, default) != "0"
+
+
+def default_config():
+    """App settings from the environment (see README)"""
+    return {
+        "SECRET_KEY": os.environ.get("FLASK_SECRET_KEY", "dev_secret_key"),
+        "DATASET_PATH": os.environ.get("DATASET_PATH", "dataset.csv"),
+        "ORDERS_DB_PATH": os.environ.get("ORDERS_DB_PATH", "orders.db"),
+        # Replace the stored orders with generated demo orders on startup
+        "GENERATE_PENDING_ORDERS": env_flag("GENERATE_PENDING_ORDERS", "1"),
+        # Other processes write to the same order database
+        "ORDERS_SHARED": env_flag("ORDERS_SHARED", "0"),
+        "REAL_TIME_REFRESH": env_flag("REAL_TIME_REFRESH", "1"),
+        "REAL_TIME_STALE_GRACE": float(os.environ.get("REAL_TIME_STALE_GRACE", "600")),
+        "MOCK_SEED": os.environ.get("MOCK_SEED"),
+        "PREDICTION_CACHE_SIZE": int(os.environ.get("PREDICTION_CACHE_SIZE", "4096")),
+        "GEMINI_API_KEY": os.environ.get("GEMINI_API_KEY"),
+        "GEOCODE_URL": os.environ.get("GEOCODE_URL", NOMINATIM_URL),
+        # Persistent geocode results (empty to keep them in memory only)
+        "GEOCODE_CACHE_PATH": os.environ.get("GEOCODE_CACHE_PATH", "geocode_cache.db"),
+        "GEOCODE_TIMEOUT": float(os.environ.get("GEOCODE_TIMEOUT", "10")),
+        "GEOCODE_MIN_INTERVAL": float(os.environ.get("GEOCODE_MIN_INTERVAL", "1")),
+    }
+
+
+class Services:
+    """The predictor, chatbot, dashboard and geocoder of one app"""
+
+    def __init__(self, config):
+        self.config = config
+        self.geocoder = Geocoder(
+            url=config["GEOCODE_URL"],
+            store_path=config["GEOCODE_CACHE_PATH"] or None,
+            timeout=config["GEOCODE_TIMEOUT"],
+            min_interval=config["GEOCODE_MIN_INTERVAL"],
+        )
+        self.predictor = DeliveryPredictor(
+            dataset_path=config["DATASET_PATH"],
+            orders_db_path=config["ORDERS_DB_PATH"],
+            real_time_stale_grace=config["REAL_TIME_STALE_GRACE"],
+            mock_seed=config["MOCK_SEED"],
+            prediction_cache_size=config["PREDICTION_CACHE_SIZE"],
+            generate_orders=config["GENERATE_PENDING_ORDERS"],
+            orders_shared=config["ORDERS_SHARED"],
+            # Routes to addresses outside the fixed customer list
+            geocoder=self.geocoder,
+        )
+        self.chatbot = DeliveryChatbot(self.predictor, config["GEMINI_API_KEY"])
+        # Dashboard groupings, kept up to date as orders change
+        self.dashboard = DashboardView(self.predictor)
+        # Process the background threads were started in
+        self._background_pid = None
+
+    def start_background_tasks(self):
+        """
+        Start the background threads of this process, if not started yet
+
+        Threads do not survive fork(), so an app built before forking worker
+        processes starts them again in each worker (see gunicorn.conf.py).
+        """
+        if self._background_pid == os.getpid():
+            return
+        self._background_pid = os.getpid()
+        # Re-fetch real-time data in the background so requests never wait on Gemini
+        if self.config["REAL_TIME_REFRESH"]:
+            self.predictor.start_real_time_refresher()
+
+
+def create_app(config=None, start_background_tasks=True):
+    """
+    Build the Flask app with its own predictor, chatbot, dashboard and geocoder
+
+    Parameters:
+    - config: Settings overriding default_config()
+    - start_background_tasks: Start the real-time refresher now; pass False
+      when the app is built before forking worker processes, and it starts
+      with the first request of each process instead
+
+    Returns:
+    - Flask app; its services are in app.extensions["delivery"]
+    """
+    app = Flask(__name__)
+    app.config.update(default_config())
+    app.config.update(config or {})
+
+    # Enable CORS for all routes
+    CORS(
+        app,
+        resources={
+            r"/*": {
+                "origins": [
+                    "*",
+                ],
+                "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+                "allow_headers": [
+                    "Content-Type",
+                    "Authorization",
+                    "X-Requested-With",
+                    "Accept",
+                ],
+            }
+        },
+        supports_credentials=True,
+    )
+
+    services = Services(app.config)
+    app.extensions["delivery"] = services
+    app.register_blueprint(bp)
+    app.before_request(services.start_background_tasks)
+    if start_background_tasks:
+        services.start_background_tasks()
+    return app
+
+
+_default_app = None
+_default_app_lock = threading.Lock()
 
-# Initialize chatbot with Gemini API key from environment variable
-gemini_api_key = os.environ.get("GEMINI_API_KEY")
-chatbot = DeliveryChatbot(predictor, gemini_api_key)
+
+def get_default_app():
+    """The app configured from the environment, built on first use"""
+    global _default_app
+    with _default_app_lock:
+        if _default_app is None:
+            _default_app = create_app()
+    return _default_app
+
+
+def __getattr__(name):
+    # `app`, `predictor`, `chatbot` and `dashboard` are built on first access
+    # rather than on import, so importing this module stays cheap
+    if name == "app":
+        return get_default_app()
+    if name in ("predictor", "chatbot", "dashboard"):
+        return getattr(get_default_app().extensions["delivery"], name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # Add a custom Jinja2 filter for dictionary update
-@app.template_filter("dict_concat")
+@bp.app_template_filter("dict_concat")
 def dict_concat(d1, d2):
     d = d1.copy()
     d.update(d2)
@@ -52,120 +183,23 @@ def dict_concat(d1, d2):
 
 
 # Add current datetime function to template context
-@app.context_processor
+@bp.app_context_processor
 def inject_now():
     return {"now": datetime.now}
 
 
-# Load pending orders from JSON file
+# Load pending orders from the shared order repository
 def load_pending_orders():
-    try:
-        with open("pending_orders.json", "r") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return []
+    return current_predictor.orders.all()
 
 
-# Save pending orders to JSON file
-def save_pending_orders(orders):
-    with open("pending_orders.json", "w") as f:
-        json.dump(orders, f, indent=2)
-
-
-@app.route("/")
+@bp.route("/")
 def index():
     """Main dashboard page"""
-    # Get current day
-    current_day = datetime.now().strftime("%A")
-
-    # Get pending orders
-    pending_orders = predictor.get_pending_orders()
+    return render_template("index.html", **current_dashboard.context())
 
-    # Get names for dropdown
-    names = sorted(list(set([order["name"] for order in pending_orders])))
 
-    # Get today's orders for route optimization
-    todays_orders = predictor.get_todays_orders()
-
-    # Group today's orders by customer and count parcels
-    grouped_orders = {}
-    for order in todays_orders:
-        customer_name = order["name"]
-        if customer_name in grouped_orders:
-            # Increment parcel count for existing customer
-            grouped_orders[customer_name]["parcel_count"] += 1
-        else:
-            # Copy the order and add parcel count
-            grouped_order = order.copy()
-            grouped_order["parcel_count"] = 1
-            grouped_orders[customer_name] = grouped_order
-
-    # Convert grouped orders dict to list
-    grouped_todays_orders = list(grouped_orders.values())
-
-    # Group pending orders by customer name and delivery day
-    grouped_pending_orders = {}
-
-    for order in pending_orders:
-        key = f"{order['name']}_{order['delivery_day']}"
-        if key in grouped_pending_orders:
-            grouped_pending_orders[key]["orders"].append(order)
-        else:
-            grouped_pending_orders[key] = {
-                "name": order["name"],
-                "delivery_day": order["delivery_day"],
-                "area": order["area"],
-                "address": order["address"],
-                "orders": [order],
-            }
-
-    # Convert to list for the template
-    grouped_pending_list = list(grouped_pending_orders.values())
-
-    # Get real-time data
-    real_time_data = {
-        "weather": predictor.get_real_time_data("weather"),
-        "traffic": predictor.get_real_time_data("traffic"),
-        "festivals": predictor.get_real_time_data("festivals"),
-    }
-
-    # Create summary data for display
-    weather_summary = (
-        predictor._get_weather_summary(real_time_data["weather"])
-        if hasattr(predictor, "_get_weather_summary")
-        else "Weather data unavailable"
-    )
-    traffic_summary = (
-        predictor._get_traffic_summary(real_time_data["traffic"])
-        if hasattr(predictor, "_get_traffic_summary")
-        else "Traffic data unavailable"
-    )
-    festival_summary = (
-        predictor._get_festival_summary(real_time_data["festivals"])
-        if hasattr(predictor, "_get_festival_summary")
-        else "Festival data unavailable"
-    )
-
-    real_time_summary = {
-        "weather": weather_summary,
-        "traffic": traffic_summary,
-        "festivals": festival_summary,
-    }
-
-    return render_template(
-        "index.html",
-        pending_orders=pending_orders,
-        current_day=current_day,
-        names=names,
-        todays_orders=todays_orders,
-        grouped_todays_orders=grouped_todays_orders,
-        grouped_pending_orders=grouped_pending_list,
-        real_time_data=real_time_data,
-        real_time_summary=real_time_summary,
-    )
-
-
-@app.route("/predict", methods=["POST"])
+@bp.route("/predict", methods=["POST"])
 def predict():
     """Predict optimal delivery times for a person"""
     # Check if data is coming as JSON or form data
@@ -187,18 +221,20 @@ def predict():
     # Log the request for debugging
     print(f"Prediction request received: name={name}, day={day}")
 
-    optimal_times = predictor.predict_optimal_times(name, day)
+    # Read real-time data once for the prediction and the factors below
+    snapshot = current_predictor.get_real_time_snapshot()
+    optimal_times = current_predictor.predict_optimal_times(name, day, snapshot=snapshot)
 
     # Log the result
     print(f"Prediction result: {optimal_times}")
 
     # Add real-time factors that influenced the prediction
-    customer_area = predictor.customer_areas.get(name)
+    customer_area = current_predictor.customer_areas.get(name)
     real_time_factors = {}
 
     if customer_area:
         # Get traffic data for this area
-        traffic_data = predictor.get_real_time_data("traffic", customer_area)
+        traffic_data = snapshot.get("traffic", customer_area)
         if traffic_data and "congestion_level" in traffic_data:
             real_time_factors["traffic"] = {
                 "congestion_level": traffic_data["congestion_level"],
@@ -206,7 +242,7 @@ def predict():
             }
 
     # Get weather data
-    weather_data = predictor.get_real_time_data("weather")
+    weather_data = snapshot.weather
     if weather_data:
         real_time_factors["weather"] = {
             "conditions": weather_data.get("conditions", "Unknown"),
@@ -215,7 +251,7 @@ def predict():
         }
 
     # Check if any festivals are affecting this area
-    festival_data = predictor.get_real_time_data("festivals")
+    festival_data = snapshot.festivals
     if festival_data and festival_data.get("has_festival_today", False):
         for festival in festival_data.get("festivals", []):
             if festival.get("date") == datetime.now().strftime("%Y-%m-%d"):
@@ -232,12 +268,58 @@ def predict():
         "day": day,
         "optimal_times": optimal_times,
         "real_time_factors": real_time_factors,
+        "real_time_cache_age": current_predictor.get_real_time_cache_age(),
     }
 
     return jsonify(response_data)
 
 
-@app.route("/pending_orders", methods=["GET"])
+@bp.route("/predict/batch", methods=["POST"])
+def predict_batch():
+    """Predict optimal delivery times for many customers and days in one call"""
+    data = request.get_json(silent=True) or {}
+    names = data.get("names")
+    days = data.get("days", data.get("day", datetime.now().strftime("%A")))
+    top_k = data.get("top_k", 3)
+
+    if not names or not isinstance(names, list):
+        return jsonify({"error": "names must be a non-empty list"}), 400
+    if not all(isinstance(name, str) for name in names):
+        return jsonify({"error": "names must be strings"}), 400
+    if not isinstance(days, (str, list)) or (
+        isinstance(days, list) and not all(isinstance(day, str) for day in days)
+    ):
+        return jsonify({"error": "days must be a string or a list of strings"}), 400
+    if isinstance(days, list) and len(days) != len(names):
+        return jsonify({"error": "days must have the same length as names"}), 400
+    if isinstance(top_k, bool) or not isinstance(top_k, int) or top_k < 1:
+        return jsonify({"error": "top_k must be a positive integer"}), 400
+
+    # Convert to title case for consistency
+    names = [name.title() for name in names]
+    if isinstance(days, str):
+        days = [days] * len(names)
+
+    predictions = current_predictor.predict_optimal_times_batch(names, days, top_k)
+
+    return jsonify(
+        {
+            "predictions": [
+                {
+                    "customer_name": name,
+                    "customer_area": current_predictor.customer_areas.get(
+                        name, "Unknown area"
+                    ),
+                    "day": day,
+                    "optimal_times": optimal_times,
+                }
+                for name, day, optimal_times in zip(names, days, predictions)
+            ]
+        }
+    )
+
+
+@bp.route("/pending_orders", methods=["GET"])
 def get_pending_orders():
     try:
         orders = load_pending_orders()
@@ -246,107 +328,125 @@ def get_pending_orders():
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/add_order", methods=["POST"])
+# Fields every new order must have
+ORDER_FIELDS = ("name", "delivery_day", "area", "address", "package_size")
+
+
+@bp.route("/add_order", methods=["POST"])
 def add_order():
     try:
-        order_data = request.json
-        assert order_data is not None
-        orders = load_pending_orders()
-
-        # Generate a new order ID
-        new_order_id = str(
-            max([int(order["order_id"]) for order in orders], default=10000) + 1
+        order_data = request.get_json(silent=True)
+        if not isinstance(order_data, dict):
+            return jsonify({"error": "Request body must be a JSON object"}), 400
+        missing = [field for field in ORDER_FIELDS if not order_data.get(field)]
+        if missing:
+            return jsonify(
+                {"error": f"Missing required fields: {', '.join(missing)}"}
+            ), 400
+
+        # Store the new order; the store assigns the next order ID
+        new_order = current_predictor.orders.add(
+            name=order_data["name"],
+            delivery_day=order_data["delivery_day"],
+            area=order_data["area"],
+            address=order_data["address"],
+            package_size=order_data["package_size"],
         )
-
-        # Create new order
-        new_order = {
-            "order_id": new_order_id,
-            "name": order_data["name"],
-            "delivery_day": order_data["delivery_day"],
-            "area": order_data["area"],
-            "address": order_data["address"],
-            "package_size": order_data["package_size"],
-            "status": "Pending",
-            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        }
-
-        # Add to orders list and save
-        orders.append(new_order)
-        save_pending_orders(orders)
+        new_order["order_id"] = str(new_order["order_id"])
 
         return jsonify(new_order)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/update_order_status/<order_id>", methods=["POST"])
+@bp.route("/update_order_status/<order_id>", methods=["POST"])
 def update_order_status(order_id):
     try:
         status_data = request.json
         assert status_data is not None
-        orders = load_pending_orders()
 
         # Find and update the order
-        for order in orders:
-            if str(order["order_id"]) == str(order_id):
-                order["status"] = status_data["status"]
-                break
-
-        # Save updated orders
-        save_pending_orders(orders)
+        current_predictor.orders.update_status(order_id, status_data["status"])
 
         return jsonify({"success": True})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/mark_delivered/<int:order_id>")
+@bp.route("/mark_delivered/<int:order_id>")
 def mark_delivered(order_id):
     """Mark an order as delivered"""
     success = request.args.get("success", "true").lower() == "true"
-    result = predictor.mark_delivered(order_id, success)
+    result = current_predictor.mark_delivered(order_id, success)
+
+    return redirect(url_for("delivery.index"))
+
+
+def chat_message():
+    """
+    The message of a /chat request
+
+    Returns:
+    - (message, None), or (None, error response) if it is missing or empty
+    """
+    data = request.get_json()
+    if not data or "message" not in data:
+        return None, (jsonify({"error": "No message provided"}), 400)
+
+    message = data["message"]
+    if not message.strip():
+        return None, (jsonify({"error": "Empty message"}), 400)
+    return message, None
+
+
+def chat_context(snapshot):
+    """Chatbot context for the real-time data of one request"""
+    return {
+        "real_time_data": snapshot.as_dict(),
+        "real_time_snapshot": snapshot,
+    }
 
-    return redirect(url_for("index"))
 
+def chat_error(error):
+    logging.exception("Error in chat endpoint")
+    # Return a helpful error message
+    return jsonify(
+        {"error": "An error occurred processing your request", "details": str(error)}
+    ), 500
 
-@app.route("/chat", methods=["POST"])
+
+@bp.route("/chat", methods=["POST"])
 def chat():
     try:
-        data = request.get_json()
-        if not data or "message" not in data:
-            return jsonify({"error": "No message provided"}), 400
-
-        message = data["message"]
-        if not message.strip():
-            return jsonify({"error": "Empty message"}), 400
+        message, error = chat_message()
+        if error:
+            return error
 
         # Get current context
-        current_context = {
-            "real_time_data": {
-                "weather": predictor.get_real_time_data("weather"),
-                "traffic": predictor.get_real_time_data("traffic"),
-                "festivals": predictor.get_real_time_data("festivals"),
-            }
-        }
+        snapshot = current_predictor.get_real_time_snapshot()
 
         # Process the message
-        response = chatbot.process_query(message, current_context)
+        response = current_chatbot.process_query(message, chat_context(snapshot))
 
         return jsonify({"response": response})
 
     except Exception as e:
-        logging.exception("Error in chat endpoint")
-        # Return a helpful error message
-        return jsonify(
-            {"error": "An error occurred processing your request", "details": str(e)}
-        ), 500
+        return chat_error(e)
 
 
-@app.route("/optimize_route", methods=["POST"])
+@bp.route("/optimize_route", methods=["POST"])
 def optimize_route():
     try:
         assert request.json is not None
         order_ids = request.json.get("order_ids", [])
+        solver = request.json.get("solver", "auto")
+        time_limit_ms = request.json.get("time_limit_ms", 500)
+
+        if solver not in SOLVERS:
+            return jsonify({"error": f"solver must be one of {list(SOLVERS)}"}), 400
+        if not isinstance(time_limit_ms, int) or time_limit_ms < 1:
+            return jsonify({"error": "time_limit_ms must be a positive integer"}), 400
+
         orders = load_pending_orders()
 
         # Filter orders by IDs
@@ -354,52 +454,100 @@ def optimize_route():
             order for order in orders if str(order["order_id"]) in order_ids
         ]
 
+        # One stop per customer, however many orders they have
+        stops = len({order.get("name") for order in selected_orders})
+        if solver == "exact" and stops > EXACT_MAX_STOPS:
+            return jsonify(
+                {
+                    "error": f"The exact solver supports at most {EXACT_MAX_STOPS} "
+                    f"stops, got {stops}"
+                }
+            ), 400
+
         # Get route optimization from predictor
-        optimized_route = predictor.optimize_route(selected_orders)
+        optimized_route = current_predictor.optimize_route(
+            selected_orders, solver=solver, time_limit_ms=time_limit_ms
+        )
 
         return jsonify(optimized_route)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/real_time_data", methods=["GET"])
+def real_time_data_response(data_type, data):
+    """Response with one type of real-time data and its cache age"""
+    response = jsonify(data)
+    age = current_predictor.get_real_time_cache_age().get(data_type)
+    if age is not None:
+        response.headers["X-Cache-Age"] = str(age)
+    return response
+
+
+def all_real_time_data_response(snapshot):
+    """Response with every type of real-time data and their summaries"""
+    data = snapshot.as_dict()
+    data["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    data["cache_age"] = current_predictor.get_real_time_cache_age()
+    data["version"] = snapshot.version
+
+    # Add summaries
+    if hasattr(current_predictor, "_get_weather_summary"):
+        data["weather_summary"] = current_predictor._get_weather_summary(
+            data["weather"]
+        )
+    if hasattr(current_predictor, "_get_traffic_summary"):
+        data["traffic_summary"] = current_predictor._get_traffic_summary(
+            data["traffic"]
+        )
+    if hasattr(current_predictor, "_get_festival_summary"):
+        data["festival_summary"] = current_predictor._get_festival_summary(
+            data["festivals"]
+        )
+
+    return jsonify(data)
+
+
+def invalid_real_time_type():
+    return jsonify(
+        {
+            "error": 'Invalid data type. Use "traffic", "weather", "festivals", or "all"'
+        }
+    ), 400
+
+
+@bp.route("/real_time_data", methods=["GET"])
 def get_real_time_data():
     """Get real-time data for traffic, weather, and festivals"""
     data_type = request.args.get("type")
     area = request.args.get("area")
 
     if data_type in ["traffic", "weather", "festivals"]:
-        data = predictor.get_real_time_data(data_type, area)
-        return jsonify(data)
+        data = current_predictor.get_real_time_data(data_type, area)
+        return real_time_data_response(data_type, data)
     elif data_type == "all":
         # Get all types of real-time data
-        data = {
-            "weather": predictor.get_real_time_data("weather"),
-            "traffic": predictor.get_real_time_data("traffic"),
-            "festivals": predictor.get_real_time_data("festivals"),
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        }
-
-        # Add summaries
-        if hasattr(predictor, "_get_weather_summary"):
-            data["weather_summary"] = predictor._get_weather_summary(data["weather"])
-        if hasattr(predictor, "_get_traffic_summary"):
-            data["traffic_summary"] = predictor._get_traffic_summary(data["traffic"])
-        if hasattr(predictor, "_get_festival_summary"):
-            data["festival_summary"] = predictor._get_festival_summary(
-                data["festivals"]
-            )
-
-        return jsonify(data)
+        snapshot = current_predictor.get_real_time_snapshot()
+        return all_real_time_data_response(snapshot)
     else:
-        return jsonify(
-            {
-                "error": 'Invalid data type. Use "traffic", "weather", "festivals", or "all"'
-            }
-        ), 400
+        return invalid_real_time_type()
+
 
+@bp.route("/metrics", methods=["GET"])
+def metrics():
+    """Circuit breaker state and counts for the Gemini API, and cache statistics"""
+    data = current_predictor.get_metrics()
+    data["chat_circuit_breaker"] = current_chatbot.gemini_api.circuit_breaker.metrics()
+    data["geocoder"] = current_geocoder.metrics()
+    return jsonify(data)
 
-@app.route("/geocode", methods=["POST"])
+
+def geocode_response(result):
+    if result is None:
+        return jsonify({"error": "Address not found"}), 404
+    return jsonify(result)
+
+
+@bp.route("/geocode", methods=["POST"])
 def geocode():
     """Geocode an address to get coordinates"""
     address = request.form.get("address")
@@ -408,27 +556,59 @@ def geocode():
         return jsonify({"error": "No address provided"}), 400
 
     try:
-        # Use Nominatim for geocoding
-        url = f"https://nominatim.openstreetmap.org/search?format=json&q={address}&limit=1"
-        headers = {"User-Agent": "DeliveryPredictionSystem/1.0"}
+        # Cached, or looked up with Nominatim
+        return geocode_response(current_geocoder.geocode(address))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-        response = requests.get(url, headers=headers)
-        data = response.json()
 
-        if data and len(data) > 0:
-            result = data[0]
-            return jsonify(
-                {
-                    "lat": float(result["lat"]),
-                    "lon": float(result["lon"]),
-                    "display_name": result["display_name"],
-                }
-            )
+def geocode_batch_addresses():
+    """
+    The addresses of a /geocode/batch request
+
+    Returns:
+    - (addresses, None), or (None, error response) if the request is invalid
+    """
+    data = request.get_json(silent=True) or {}
+    addresses = data.get("addresses")
+    if not isinstance(addresses, list) or not all(
+        isinstance(address, str) and address.strip() for address in addresses
+    ):
+        return None, (jsonify({"error": "addresses must be a list of addresses"}), 400)
+    if len(addresses) > MAX_BATCH_SIZE:
+        return None, (
+            jsonify({"error": f"At most {MAX_BATCH_SIZE} addresses per request"}),
+            400,
+        )
+    return addresses, None
+
+
+def geocode_batch_response(addresses, results):
+    """One result per requested address, in request order"""
+    items = []
+    for address in addresses:
+        result = results[normalize_address(address)]
+        if isinstance(result, Exception):
+            items.append({"address": address, "error": str(result)})
+        elif result is None:
+            items.append({"address": address, "error": "Address not found"})
         else:
-            return jsonify({"error": "Address not found"}), 404
+            items.append(dict(result, address=address))
+    return jsonify({"results": items, "unique_addresses": len(results)})
 
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+
+@bp.route("/geocode/batch", methods=["POST"])
+def geocode_batch():
+    """
+    Geocode several addresses
+
+    Repeated addresses are looked up once; uncached addresses are looked up
+    one after another at the Nominatim rate limit.
+    """
+    addresses, error = geocode_batch_addresses()
+    if error:
+        return error
+    return geocode_batch_response(addresses, current_geocoder.geocode_many(addresses))
 
 
 if __name__ == "__main__":
@@ -439,4 +619,4 @@ if __name__ == "__main__":
     )
     args = parser.parse_args()
 
-    app.run(debug=True, port=args.port)
+    create_app().run(debug=True, port=args.port)
@@ -0,0 +1,18 @@
+"""
+ASGI entry point for serving the I/O-bound routes asynchronously.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5002 --workers 4
+
+Serves the app from wsgi.py through ``AsyncApp`` (see async_routes.py): /chat,
+/geocode and /real_time_data wait on the Gemini and Nominatim APIs as
+coroutines instead of holding a thread each, and the other routes run on a
+pool of ``ASGI_THREADS`` threads per worker. Unlike gunicorn with
+``preload_app``, each uvicorn worker process loads the app itself.
+"""
+
+import os
+
+import wsgi
+from async_routes import DEFAULT_THREADS, AsyncApp
+
+app = AsyncApp(wsgi.app, threads=int(os.environ.get("ASGI_THREADS", DEFAULT_THREADS)))
@@ -0,0 +1,308 @@
+"""
+ASGI front end that serves the I/O-bound routes on an event loop.
+
+Under a WSGI server every request holds a worker thread until it is
+answered, so a handful of slow Gemini or Nominatim calls can occupy every
+thread and stall /predict. ``AsyncApp`` wraps the Flask app as an ASGI
+application instead:
+
+- /chat, /geocode, /geocode/batch and /real_time_data run as coroutines on
+  the server's event loop. While they wait for an upstream API they hold no
+  thread (geocoding requests queue for a few rate-limited lookup threads),
+  so hundreds of waits cost no more than hundreds of coroutines. They run in a
+  Flask request context, so they use ``request``, ``jsonify`` and the
+  ``current_*`` services like the synchronous views do, and the app's
+  before- and after-request hooks (such as the CORS headers) still apply.
+- Every other route is handed to the Flask app on a pool of threads, as a
+  WSGI server would, so CPU-bound prediction routes keep their own threads
+  however many upstream waits are pending.
+
+Request and response bodies are buffered, which suits the small JSON and
+HTML bodies of this API.
+"""
+
+import asyncio
+import io
+import logging
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import jsonify, request
+
+from app import (
+    all_real_time_data_response,
+    chat_context,
+    chat_error,
+    chat_message,
+    current_chatbot,
+    current_geocoder,
+    current_predictor,
+    geocode_batch_addresses,
+    geocode_batch_response,
+    geocode_response,
+    invalid_real_time_type,
+    real_time_data_response,
+)
+
+# Threads running the synchronous routes
+DEFAULT_THREADS = 8
+
+# Nominatim requests in flight at once; further geocode requests wait as
+# coroutines for a free slot
+GEOCODE_MAX_IN_FLIGHT = int(os.environ.get("GEOCODE_MAX_IN_FLIGHT", "4"))
+
+_geocode_executor = ThreadPoolExecutor(
+    max_workers=GEOCODE_MAX_IN_FLIGHT, thread_name_prefix="geocode"
+)
+
+
+async def chat():
+    """Asynchronous /chat: waits for Gemini without holding a thread"""
+    try:
+        message, error = chat_message()
+        if error:
+            return error
+
+        snapshot = await current_predictor.get_real_time_snapshot_async()
+        response = await current_chatbot.process_query_async(
+            message, chat_context(snapshot)
+        )
+        return jsonify({"response": response})
+
+    except Exception as e:
+        return chat_error(e)
+
+
+async def get_real_time_data():
+    """Asynchronous /real_time_data: cache misses are fetched without a thread"""
+    data_type = request.args.get("type")
+    area = request.args.get("area")
+
+    if data_type in ["traffic", "weather", "festivals"]:
+        data = await current_predictor.get_real_time_data_async(data_type, area)
+        return real_time_data_response(data_type, data)
+    elif data_type == "all":
+        snapshot = await current_predictor.get_real_time_snapshot_async()
+        return all_real_time_data_response(snapshot)
+    else:
+        return invalid_real_time_type()
+
+
+async def geocode():
+    """Asynchronous /geocode: waits for a Nominatim slot as a coroutine"""
+    address = request.form.get("address")
+
+    if not address:
+        return jsonify({"error": "No address provided"}), 400
+
+    try:
+        found, result = current_geocoder.lookup(address)
+        if not found:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                _geocode_executor, current_geocoder.geocode, address
+            )
+        return geocode_response(result)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+async def geocode_batch():
+    """Asynchronous /geocode/batch: the rate-limited lookups run off the loop"""
+    addresses, error = geocode_batch_addresses()
+    if error:
+        return error
+    loop = asyncio.get_running_loop()
+    results = await loop.run_in_executor(
+        _geocode_executor, current_geocoder.geocode_many, addresses
+    )
+    return geocode_batch_response(addresses, results)
+
+
+# Flask endpoint -> asynchronous view served in its place
+ASYNC_VIEWS = {
+    "delivery.chat": chat,
+    "delivery.get_real_time_data": get_real_time_data,
+    "delivery.geocode": geocode,
+    "delivery.geocode_batch": geocode_batch,
+}
+
+
+def build_environ(scope, body):
+    """
+    WSGI environ for an ASGI HTTP scope and its buffered request body.
+
+    Args:
+        scope (dict): ASGI connection scope.
+        body (bytes): Request body.
+
+    Returns:
+        dict: Environ as a WSGI server would pass it.
+    """
+    script_name = scope.get("root_path", "")
+    path = scope["path"]
+    if script_name and path.startswith(script_name):
+        path = path[len(script_name) :]
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": script_name.encode("utf8").decode("latin1"),
+        "PATH_INFO": path.encode("utf8").decode("latin1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    if scope.get("client"):
+        environ["REMOTE_ADDR"] = scope["client"][0]
+
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin1").upper().replace("-", "_")
+        if name not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            name = f"HTTP_{name}"
+        value = value.decode("latin1")
+        environ[name] = f"{environ[name]},{value}" if name in environ else value
+    # The body is buffered, so its length is known even for chunked requests
+    environ["CONTENT_LENGTH"] = str(len(body))
+    return environ
+
+
+class AsyncApp:
+    """
+    ASGI application serving a Flask app, with async views for some routes.
+
+    Run it under any ASGI server (see asgi.py).
+    """
+
+    def __init__(self, flask_app, threads=DEFAULT_THREADS, views=None):
+        """
+        Args:
+            flask_app (Flask): App built by ``create_app``.
+            threads (int): Threads running the synchronous routes.
+            views (dict): Flask endpoint -> async view (default:
+                ``ASYNC_VIEWS``).
+        """
+        self.flask_app = flask_app
+        self.views = ASYNC_VIEWS if views is None else views
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="wsgi")
+        # URL rules of the async views, checked before any routing is done
+        self._paths = {
+            rule.rule
+            for rule in flask_app.url_map.iter_rules()
+            if rule.endpoint in self.views
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+        body = await self._read_body(receive)
+        if body is None:
+            # The client went away before sending the whole request
+            return
+        environ = build_environ(scope, body)
+        if scope["path"] in self._paths and scope["method"] != "OPTIONS":
+            status, headers, content = await self._call_async_view(environ)
+        else:
+            loop = asyncio.get_running_loop()
+            status, headers, content = await loop.run_in_executor(
+                self.executor, self._call_wsgi, environ
+            )
+
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (name.lower().encode("latin1"), value.encode("latin1"))
+                    for name, value in headers
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": content})
+
+    @staticmethod
+    async def _read_body(receive):
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return None
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                return b"".join(chunks)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                # Warm the real-time cache before the first request
+                self.flask_app.extensions["delivery"].start_background_tasks()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _call_async_view(self, environ):
+        """
+        Dispatch a request to its async view, as Flask dispatches to views.
+
+        Returns:
+            tuple: (status code, header list, body)
+        """
+        app = self.flask_app
+        with app.request_context(environ):
+            try:
+                try:
+                    rv = app.preprocess_request()
+                    if rv is None:
+                        if request.routing_exception is not None:
+                            # e.g. 405 for GET /chat
+                            raise request.routing_exception
+                        view = self.views[request.endpoint]
+                        rv = await view(**request.view_args)
+                except Exception as e:
+                    rv = app.handle_user_exception(e)
+            except Exception as e:
+                logging.exception("Error in %s", request.path)
+                rv = app.handle_exception(e)
+            response = app.process_response(app.make_response(rv))
+            try:
+                return response.status_code, response.headers.to_wsgi_list(), response.get_data()
+            finally:
+                response.close()
+
+    def _call_wsgi(self, environ):
+        """
+        Run the Flask app on one request (on an executor thread).
+
+        Returns:
+            tuple: (status code, header list, body)
+        """
+        started = {}
+        chunks = []
+
+        def start_response(status, headers, exc_info=None):
+            started["status"] = int(status.split(" ", 1)[0])
+            started["headers"] = headers
+            return chunks.append
+
+        result = self.flask_app(environ, start_response)
+        try:
+            chunks.extend(result)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        return started["status"], started["headers"], b"".join(chunks)
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark for DeliveryPredictor.analyze_data
+
+Builds a synthetic delivery history of the requested size and measures how long
+the success-rate tables take to build and the peak resident memory of the
+process. Every size runs in a fresh subprocess so peak RSS is not shared
+between runs.
+
+Usage:
+    python benchmarks/bench_analyze_data.py
+    python benchmarks/bench_analyze_data.py --rows 10000 1000000 --legacy
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from delivery_predictor import DeliveryPredictor  # noqa: E402
+
+NAMES = [
+    "Aditya",
+    "Vivaan",
+    "Aarav",
+    "Meera",
+    "Diya",
+    "Riya",
+    "Ananya",
+    "Aryan",
+    "Ishaan",
+    "Kabir",
+]
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+TIMES = ["9 AM", "10 AM", "11 AM", "12 PM"] + [f"{h} PM" for h in range(1, 9)]
+
+
+def make_dataset(rows, seed=0):
+    """Create a synthetic dataset with the same key columns as dataset.csv."""
+    rng = np.random.default_rng(seed)
+
+    def column(values):
+        return np.asarray(values, dtype=object)[rng.integers(0, len(values), rows)]
+
+    return pd.DataFrame(
+        {
+            "Name": column(NAMES),
+            "Day of Delivery Attempt": column(DAYS),
+            "Time": column(TIMES),
+            "Delivery Status": column(["Success", "Success", "Success", "Failed"]),
+        }
+    )
+
+
+def legacy_analyze_data(df):
+    """The previous row-by-row implementation, kept for comparison."""
+    success_by_name_day_time = defaultdict(
+        lambda: defaultdict(lambda: defaultdict(list))
+    )
+    success_by_name_day = defaultdict(lambda: defaultdict(list))
+    success_by_name_time = defaultdict(lambda: defaultdict(list))
+
+    for _, row in df.iterrows():
+        name = row["Name"]
+        day = row["Day of Delivery Attempt"]
+        time_slot = row["Time"]
+        success = 1 if row["Delivery Status"] == "Success" else 0
+
+        success_by_name_day_time[name][day][time_slot].append(success)
+        success_by_name_day[name][day].append(success)
+        success_by_name_time[name][time_slot].append(success)
+
+    def calculate_rates(data_dict):
+        result = {}
+        for key, value in data_dict.items():
+            if isinstance(value, defaultdict):
+                result[key] = calculate_rates(value)
+            else:
+                result[key] = sum(value) / len(value) if value else 0
+        return result
+
+    return (
+        calculate_rates(success_by_name_day_time),
+        calculate_rates(success_by_name_day),
+        calculate_rates(success_by_name_time),
+    )
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (ru_maxrss is KB on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_worker(rows, legacy):
+    """Measure a single dataset size inside the current process."""
+    df = make_dataset(rows)
+    rss_before = peak_rss_mb()
+
+    start = time.perf_counter()
+    if legacy:
+        legacy_analyze_data(df)
+    else:
+        predictor = DeliveryPredictor.__new__(DeliveryPredictor)
+        predictor.df = df
+        predictor.rate_half_life_days = None
+        predictor.analyze_data()
+    elapsed = time.perf_counter() - start
+
+    rss_after = peak_rss_mb()
+    print(
+        json.dumps(
+            {
+                "rows": rows,
+                "engine": "legacy" if legacy else "columnar",
+                "seconds": round(elapsed, 3),
+                "peak_rss_mb": round(rss_after, 1),
+                "analysis_rss_mb": round(rss_after - rss_before, 1),
+            }
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark analyze_data")
+    parser.add_argument(
+        "--rows",
+        type=int,
+        nargs="+",
+        default=[10_000, 1_000_000, 10_000_000],
+        help="Dataset sizes to benchmark",
+    )
+    parser.add_argument(
+        "--legacy",
+        action="store_true",
+        help="Also run the previous row-by-row implementation",
+    )
+    parser.add_argument(
+        "--legacy-max-rows",
+        type=int,
+        default=1_000_000,
+        help="Skip the legacy implementation above this many rows",
+    )
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        run_worker(args.worker, args.legacy)
+        return
+
+    runs = [(rows, False) for rows in args.rows]
+    if args.legacy:
+        runs += [(rows, True) for rows in args.rows if rows <= args.legacy_max_rows]
+
+    print(f"{'engine':<10} {'rows':>12} {'seconds':>10} {'peak RSS MB':>12} {'analysis MB':>12}")
+    for rows, legacy in runs:
+        command = [sys.executable, __file__, "--worker", str(rows)]
+        if legacy:
+            command.append("--legacy")
+        output = subprocess.run(command, capture_output=True, text=True, check=True)
+        result = json.loads(output.stdout.strip().splitlines()[-1])
+        print(
+            f"{result['engine']:<10} {result['rows']:>12,} {result['seconds']:>10.3f} "
+            f"{result['peak_rss_mb']:>12.1f} {result['analysis_rss_mb']:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark for order writes
+
+Measures the latency of order writes (alternating add_order and a status
+update) against stores that already hold N orders:
+
+- ``event-log``: OrderEventLog, one appended JSONL line per write
+- ``sqlite``: OrderStore, one SQLite transaction per write
+- ``json-rewrite``: the previous approach of loading pending_orders.json and
+  rewriting it with indent=2 on every write
+
+Automatic compaction is disabled while timing writes. Compaction is reported
+separately: ``pause ms`` is how long writes are blocked while the log is
+rotated, and ``snapshot s`` is the time the background thread takes to write
+all N orders.
+
+Usage:
+    python benchmarks/bench_order_writes.py
+    python benchmarks/bench_order_writes.py --sizes 100 1000000 --writes 2000 --json-rewrite-max 10000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from order_log import OrderEventLog  # noqa: E402
+from order_store import FIRST_ORDER_ID, OrderStore  # noqa: E402
+
+ORDER_TEMPLATE = {
+    "name": "Aditya",
+    "delivery_day": "Monday",
+    "area": "Satellite",
+    "address": "Near Jodhpur Cross Road, Satellite, Ahmedabad - 380015",
+    "package_size": "Medium",
+    "status": "Pending",
+    "created_at": "2024-01-01 09:00:00",
+}
+
+
+def make_orders(count):
+    return [dict(ORDER_TEMPLATE, order_id=FIRST_ORDER_ID + i) for i in range(count)]
+
+
+def time_writes(add, update, count, writes):
+    """Time ``writes`` alternating add and status-update calls, in microseconds."""
+    latencies = []
+    for i in range(writes):
+        start = time.perf_counter()
+        if i % 2 == 0:
+            add()
+        else:
+            update(FIRST_ORDER_ID + (i * 7919) % count)
+        latencies.append((time.perf_counter() - start) * 1e6)
+    return np.array(latencies)
+
+
+def bench_event_log(directory, orders, writes):
+    log = OrderEventLog(os.path.join(directory, "orders.jsonl"), compact_every=None)
+    log.replace_all(orders)
+
+    latencies = time_writes(
+        lambda: log.add("Kabir", "Monday", "Chandkheda", "Address", "Small"),
+        lambda order_id: log.update_status(order_id, "Delivered", delivered=True),
+        len(orders),
+        writes,
+    )
+
+    start = time.perf_counter()
+    log.compact(wait=False)
+    pause_seconds = time.perf_counter() - start
+    log.wait_for_compaction()
+    snapshot_seconds = time.perf_counter() - start
+    log.close()
+    return latencies, (pause_seconds, snapshot_seconds)
+
+
+def bench_sqlite(directory, orders, writes):
+    store = OrderStore(os.path.join(directory, "orders.db"))
+    store.replace_all(orders)
+
+    latencies = time_writes(
+        lambda: store.add("Kabir", "Monday", "Chandkheda", "Address", "Small"),
+        lambda order_id: store.update_status(order_id, "Delivered", delivered=True),
+        len(orders),
+        writes,
+    )
+    store.close()
+    return latencies, None
+
+
+def bench_json_rewrite(directory, orders, writes):
+    path = os.path.join(directory, "pending_orders.json")
+    with open(path, "w") as f:
+        json.dump(orders, f, indent=2)
+
+    def add():
+        with open(path, "r") as f:
+            stored = json.load(f)
+        new_id = max([int(order["order_id"]) for order in stored], default=10000) + 1
+        stored.append(dict(ORDER_TEMPLATE, order_id=str(new_id)))
+        with open(path, "w") as f:
+            json.dump(stored, f, indent=2)
+
+    def update(order_id):
+        with open(path, "r") as f:
+            stored = json.load(f)
+        for order in stored:
+            if str(order["order_id"]) == str(order_id):
+                order["status"] = "Delivered"
+                break
+        with open(path, "w") as f:
+            json.dump(stored, f, indent=2)
+
+    return time_writes(add, update, len(orders), writes), None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark order writes")
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[100, 10000, 1000000],
+        help="Number of orders already stored",
+    )
+    parser.add_argument("--writes", type=int, default=1000, help="Writes to time per size")
+    parser.add_argument(
+        "--json-rewrite-max",
+        type=int,
+        default=10000,
+        help="Largest size to run the JSON rewrite baseline on",
+    )
+    args = parser.parse_args()
+
+    backends = [
+        ("event-log", bench_event_log),
+        ("sqlite", bench_sqlite),
+        ("json-rewrite", bench_json_rewrite),
+    ]
+
+    print(
+        f"{'orders':>9} {'backend':>13} {'mean us':>10} {'p50 us':>10} "
+        f"{'p99 us':>10} {'pause ms':>9} {'snapshot s':>11}"
+    )
+    for size in args.sizes:
+        orders = make_orders(size)
+        for name, bench in backends:
+            writes = args.writes
+            if name == "json-rewrite":
+                if size > args.json_rewrite_max:
+                    continue
+                writes = min(writes, 50)
+
+            with tempfile.TemporaryDirectory() as directory:
+                latencies, compaction = bench(directory, orders, writes)
+
+            pause, snapshot = "-", "-"
+            if compaction is not None:
+                pause = f"{compaction[0] * 1000:.1f}"
+                snapshot = f"{compaction[1]:.2f}"
+            print(
+                f"{size:>9} {name:>13} {latencies.mean():>10.1f} "
+                f"{np.percentile(latencies, 50):>10.1f} "
+                f"{np.percentile(latencies, 99):>10.1f} {pause:>9} {snapshot:>11}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark for the route solvers
+
+Compares the Held-Karp exact solver with the permutation search previously
+used by DeliveryPredictor.optimize_delivery_route on random symmetric
+duration matrices. The permutation search is O(n!), so above
+``--brute-force-max`` stops its time is extrapolated from the largest
+measured size and marked as an estimate.
+
+A second table runs the heuristic solver on large routes and compares its
+result with the plain nearest-neighbour route it starts from.
+
+Usage:
+    python benchmarks/bench_route_solver.py
+    python benchmarks/bench_route_solver.py --stops 5 6 7 8 9 10 11 12 --brute-force-max 10
+    python benchmarks/bench_route_solver.py --heuristic-stops 100 200 --time-limit-ms 500
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from route_solver import (  # noqa: E402
+    _nearest_neighbour,
+    route_duration,
+    solve_brute_force,
+    solve_exact,
+    solve_heuristic,
+)
+
+
+def random_durations(stops, seed=0):
+    """Symmetric travel times in minutes between the start and every stop."""
+    rng = np.random.default_rng(seed)
+    durations = rng.integers(5, 45, size=(stops + 1, stops + 1))
+    durations = np.triu(durations, 1)
+    return durations + durations.T
+
+
+def timed(solver, durations):
+    start = time.perf_counter()
+    _, total = solver(durations)
+    return time.perf_counter() - start, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark route solvers")
+    parser.add_argument(
+        "--stops",
+        type=int,
+        nargs="+",
+        default=list(range(5, 13)),
+        help="Route sizes to benchmark",
+    )
+    parser.add_argument(
+        "--brute-force-max",
+        type=int,
+        default=9,
+        help="Largest route size to actually run the permutation search on",
+    )
+    parser.add_argument(
+        "--heuristic-stops",
+        type=int,
+        nargs="+",
+        default=[50, 100, 200],
+        help="Large route sizes to run the heuristic solver on",
+    )
+    parser.add_argument(
+        "--time-limit-ms",
+        type=int,
+        default=500,
+        help="Time budget for the heuristic solver",
+    )
+    args = parser.parse_args()
+
+    print(f"{'stops':>5} {'held-karp s':>12} {'permutations s':>16} {'speedup':>10}")
+    seconds_per_permutation = None
+
+    for stops in args.stops:
+        durations = random_durations(stops)
+        exact_seconds, exact_total = timed(solve_exact, durations)
+
+        if stops <= args.brute_force_max:
+            brute_seconds, brute_total = timed(solve_brute_force, durations)
+            assert brute_total == exact_total, "solvers disagree on the optimum"
+            seconds_per_permutation = brute_seconds / math.factorial(stops)
+            brute_text = f"{brute_seconds:.3f}"
+        elif seconds_per_permutation is not None:
+            brute_seconds = seconds_per_permutation * math.factorial(stops)
+            brute_text = f"~{brute_seconds:.1f} (est.)"
+        else:
+            brute_seconds = None
+            brute_text = "n/a"
+
+        speedup = f"{brute_seconds / exact_seconds:,.0f}x" if brute_seconds else "n/a"
+        print(f"{stops:>5} {exact_seconds:>12.4f} {brute_text:>16} {speedup:>10}")
+
+    print()
+    print(f"{'stops':>5} {'nearest-neighbour':>18} {'heuristic':>10} {'improvement':>12}")
+
+    for stops in args.heuristic_stops:
+        durations = random_durations(stops)
+        greedy_total = route_duration(durations, _nearest_neighbour(durations))
+        _, total = solve_heuristic(durations, args.time_limit_ms)
+        improvement = (greedy_total - total) / greedy_total
+        print(f"{stops:>5} {greedy_total:>18} {total:>10} {improvement:>11.1%}")
+
+
+if __name__ == "__main__":
+    main()
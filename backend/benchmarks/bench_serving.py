@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark for serving /predict
+
+Starts the API under each server and measures /predict throughput and
+latency from concurrent keep-alive clients:
+
+- ``debug``: the Flask development server (``python app.py``), threaded
+- ``gunicorn``: ``gunicorn -c gunicorn.conf.py wsgi:app`` with preloaded
+  workers (skipped when gunicorn is not installed)
+
+Both servers use a temporary order database and no background refresher;
+real-time data comes from the mock generator as in tests. Pass
+``--no-prediction-cache`` to time the prediction itself instead of the
+memoized path.
+
+Usage:
+    python benchmarks/bench_serving.py
+    python benchmarks/bench_serving.py --clients 16 --duration 20 --workers 4 --threads 4
+"""
+
+import argparse
+import csv
+import http.client
+import importlib.util
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEBUG_SERVER = """
+import sys
+from app import create_app
+create_app().run(port=int(sys.argv[1]), debug=True, use_reloader=False)
+"""
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def load_names(dataset_path):
+    with open(dataset_path, newline="") as file:
+        return sorted({row["Name"] for row in csv.DictReader(file)})
+
+
+def wait_until_ready(port, process, timeout=120):
+    """Poll the server until it answers, or fail if it exits."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            connection.request("GET", "/get_real_time_data")
+            connection.getresponse().read()
+            connection.close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("Server did not start")
+
+
+def run_client(port, names, duration, seed, results):
+    """POST /predict over one keep-alive connection for ``duration`` seconds."""
+    rng = np.random.default_rng(seed)
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    headers = {"Content-Type": "application/json"}
+    latencies = []
+    errors = 0
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        body = json.dumps(
+            {"name": names[rng.integers(len(names))], "day": DAYS[rng.integers(7)]}
+        )
+        start = time.perf_counter()
+        try:
+            connection.request("POST", "/predict", body, headers)
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            connection.close()
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - start)
+        if response.status != 200:
+            errors += 1
+    connection.close()
+    results.put((latencies, errors))
+
+
+def load(port, names, clients, duration):
+    """Run ``clients`` client processes; returns (requests/s, latencies, errors)."""
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(
+            target=run_client, args=(port, names, duration, seed, results)
+        )
+        for seed in range(clients)
+    ]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    collected = [results.get() for _ in processes]
+    elapsed = time.perf_counter() - start
+    for process in processes:
+        process.join()
+
+    latencies = np.array([value for part, _ in collected for value in part])
+    errors = sum(count for _, count in collected)
+    return len(latencies) / elapsed, latencies, errors
+
+
+def serve(name, command, port, env, names, args):
+    """Start one server, warm it up, load it and stop it."""
+    with open(os.devnull, "w") as devnull:
+        process = subprocess.Popen(
+            command, cwd=BACKEND_DIR, env=env, stdout=devnull, stderr=devnull
+        )
+        try:
+            wait_until_ready(port, process)
+            load(port, names, args.clients, args.warmup)
+            return load(port, names, args.clients, args.duration)
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /predict under each server")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per run")
+    parser.add_argument("--warmup", type=float, default=2, help="Warm-up seconds")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Gunicorn worker processes",
+    )
+    parser.add_argument("--threads", type=int, default=4, help="Threads per worker")
+    parser.add_argument("--port", type=int, default=5802, help="Port to serve on")
+    parser.add_argument(
+        "--no-prediction-cache",
+        action="store_true",
+        help="Disable the prediction cache in the servers",
+    )
+    args = parser.parse_args()
+
+    dataset_path = os.path.join(BACKEND_DIR, "dataset.csv")
+    names = load_names(dataset_path)
+
+    servers = [
+        ("debug", [sys.executable, "-c", DEBUG_SERVER, str(args.port)]),
+    ]
+    if importlib.util.find_spec("gunicorn") is not None:
+        servers.append(
+            (
+                f"gunicorn {args.workers}x{args.threads}",
+                [
+                    sys.executable,
+                    "-m",
+                    "gunicorn",
+                    "-c",
+                    "gunicorn.conf.py",
+                    "-b",
+                    f"127.0.0.1:{args.port}",
+                    "-w",
+                    str(args.workers),
+                    "--threads",
+                    str(args.threads),
+                    "wsgi:app",
+                ],
+            )
+        )
+    else:
+        print("gunicorn is not installed; only the debug server is measured")
+
+    print(
+        f"{'server':>14} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}"
+    )
+    for name, command in servers:
+        with tempfile.TemporaryDirectory() as directory:
+            env = dict(
+                os.environ,
+                DATASET_PATH=dataset_path,
+                ORDERS_DB_PATH=os.path.join(directory, "orders.db"),
+                REAL_TIME_REFRESH="0",
+            )
+            env.pop("GEMINI_API_KEY", None)
+            if args.no_prediction_cache:
+                env["PREDICTION_CACHE_SIZE"] = "0"
+            throughput, latencies, errors = serve(
+                name, command, args.port, env, names, args
+            )
+        print(
+            f"{name:>14} {throughput:>8.0f} "
+            f"{np.percentile(latencies, 50) * 1000:>8.1f} "
+            f"{np.percentile(latencies, 99) * 1000:>8.1f} {errors:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -20,6 +20,7 @@ import xgboost as xgb
 import pickle
 import os
 from datetime import datetime
+from time_slots import MISSING_HOUR, SLOT_LABELS, parse_hours
 
 class DeliveryTimePredictor:
     """Class for predicting the best delivery times using XGBoost."""
@@ -53,15 +54,10 @@ class DeliveryTimePredictor:
         # Load data
         df = pd.read_csv(self.data_path)
         
-        # Extract hour from time string
-        df['Hour'] = df['Time'].apply(lambda x: int(x.split(' ')[0]))
-        
-        # Convert AM/PM to 24-hour format
-        df['Hour'] = df.apply(
-            lambda row: row['Hour'] if 'AM' in row['Time'] else 
-                       (row['Hour'] + 12 if row['Hour'] < 12 else row['Hour']), 
-            axis=1
-        )
+        # Convert time slot labels to hours of the day (0-23), dropping rows
+        # without a readable time slot
+        df['Hour'] = parse_hours(df['Time'])
+        df = df[df['Hour'] != MISSING_HOUR].reset_index(drop=True)
         
         # Encode categorical variables
         categorical_cols = ['Day of Delivery Attempt', 'Area', 'Package Size']
@@ -301,16 +297,8 @@ class DeliveryTimePredictor:
             # Get success probability
             probability = self.model.predict_proba(features)[0][1]
             
-            # Format hour for display
-            if hour < 12:
-                formatted_time = f"{hour} AM"
-            elif hour == 12:
-                formatted_time = "12 PM"
-            else:
-                formatted_time = f"{hour-12} PM"
-                
             results.append({
-                'time': formatted_time,
+                'time': SLOT_LABELS[hour],
                 'hour': hour,
                 'success_probability': probability
             })
@@ -369,15 +357,10 @@ def analyze_delivery_patterns(data_path='dataset.csv'):
     # Load data
     df = pd.read_csv(data_path)
     
-    # Extract hour from time string
-    df['Hour'] = df['Time'].apply(lambda x: int(x.split(' ')[0]))
-    
-    # Convert AM/PM to 24-hour format
-    df['Hour'] = df.apply(
-        lambda row: row['Hour'] if 'AM' in row['Time'] else 
-                   (row['Hour'] + 12 if row['Hour'] < 12 else row['Hour']), 
-        axis=1
-    )
+    # Convert time slot labels to hours of the day (0-23), dropping rows
+    # without a readable time slot
+    df['Hour'] = parse_hours(df['Time'])
+    df = df[df['Hour'] != MISSING_HOUR].reset_index(drop=True)
     
     # Create output directory for plots
     os.makedirs('delivery_analysis', exist_ok=True)
@@ -5,12 +5,21 @@ from datetime import datetime
 import logging
 from gemini_api import GeminiAPI
 
+# Default limit on concurrent asynchronous chat requests
+DEFAULT_CHAT_MAX_IN_FLIGHT = 32
+
 
 class DeliveryChatbot:
     def __init__(self, predictor, gemini_api_key=None):
         self.predictor = predictor
         # Initialize Gemini API
-        self.gemini_api = GeminiAPI(gemini_api_key or os.environ.get("GEMINI_API_KEY"))
+        self.gemini_api = GeminiAPI(
+            gemini_api_key or os.environ.get("GEMINI_API_KEY"),
+            # Chat requests from async routes waiting on Gemini at once
+            max_in_flight=int(
+                os.environ.get("GEMINI_CHAT_MAX_IN_FLIGHT") or DEFAULT_CHAT_MAX_IN_FLIGHT
+            ),
+        )
         if not self.gemini_api.is_configured:
             logging.warning(
                 "No Gemini API key provided. Chatbot will use mock responses."
@@ -25,54 +34,100 @@ class DeliveryChatbot:
 
             if not self.gemini_api.is_configured:
                 logging.warning("No Gemini API key provided. Using mock response.")
-                return self._generate_mock_response(query, system_context)
-
-            # Format chat history for Gemini
-            # Only include the last 4 exchanges to keep context manageable
-            recent_history = (
-                self.chat_history[-4:]
-                if len(self.chat_history) >= 4
-                else self.chat_history
-            )
+                return self._generate_mock_response(
+                    query, system_context, current_context
+                )
 
             # Send the query to Gemini API
             try:
                 answer = self.gemini_api.generate_content(
                     prompt=query,
                     system_content=system_context,
-                    chat_history=recent_history,
+                    chat_history=self._recent_history(),
                     temperature=0.2,
                     max_tokens=500,
                     top_p=0.9,
                 )
-
-                if answer:
-                    # Update chat history
-                    self.chat_history.append({"role": "user", "content": query})
-                    self.chat_history.append({"role": "assistant", "content": answer})
-
-                    # Keep history to a reasonable size
-                    if len(self.chat_history) > 10:
-                        self.chat_history = self.chat_history[-10:]
-
-                    return answer
-                else:
-                    # Log the error but fall back to mock response
-                    error_msg = "Failed to get response from Gemini API"
-                    logging.error(error_msg)
-
-                    # If API is having issues, use mock response
-                    logging.info("Falling back to mock response")
-                    return self._generate_mock_response(query, system_context)
+                return self._handle_answer(
+                    query, answer, system_context, current_context
+                )
 
             except Exception as e:
                 logging.error(f"Error while calling Gemini API: {str(e)}")
-                return self._generate_mock_response(query, system_context)
+                return self._generate_mock_response(
+                    query, system_context, current_context
+                )
 
         except Exception as e:
             logging.exception("Error processing chatbot query")
             # Fall back to mock response on any error
-            return self._generate_mock_response(query, system_context)
+            return self._generate_mock_response(
+                query, system_context, current_context
+            )
+
+    async def process_query_async(self, query, current_context=None):
+        """
+        Asynchronous process_query for async routes
+
+        The Gemini request runs on the API client's event loop, so the caller
+        holds no thread while it waits for the answer.
+        """
+        system_context = None
+        try:
+            system_context = self._build_system_context(current_context)
+
+            if not self.gemini_api.is_configured:
+                logging.warning("No Gemini API key provided. Using mock response.")
+                return self._generate_mock_response(
+                    query, system_context, current_context
+                )
+
+            answer = await self.gemini_api.run_async(
+                self.gemini_api.generate_content_async(
+                    prompt=query,
+                    system_content=system_context,
+                    chat_history=self._recent_history(),
+                    temperature=0.2,
+                    max_tokens=500,
+                    top_p=0.9,
+                )
+            )
+            return self._handle_answer(query, answer, system_context, current_context)
+
+        except Exception:
+            logging.exception("Error processing chatbot query")
+            return self._generate_mock_response(
+                query, system_context, current_context
+            )
+
+    def _recent_history(self):
+        """Chat history for Gemini: the last 4 exchanges, to keep context manageable"""
+        return (
+            self.chat_history[-4:]
+            if len(self.chat_history) >= 4
+            else self.chat_history
+        )
+
+    def _handle_answer(self, query, answer, system_context, current_context):
+        """Record a Gemini answer in the history, or fall back to a mock response"""
+        if answer:
+            # Update chat history
+            self.chat_history.append({"role": "user", "content": query})
+            self.chat_history.append({"role": "assistant", "content": answer})
+
+            # Keep history to a reasonable size
+            if len(self.chat_history) > 10:
+                self.chat_history = self.chat_history[-10:]
+
+            return answer
+
+        # Log the error but fall back to mock response
+        error_msg = "Failed to get response from Gemini API"
+        logging.error(error_msg)
+
+        # If API is having issues, use mock response
+        logging.info("Falling back to mock response")
+        return self._generate_mock_response(query, system_context, current_context)
 
     def _build_system_context(self, current_context=None):
         """Build system prompt with delivery data context"""
@@ -185,8 +240,15 @@ class DeliveryChatbot:
         # Get optimal delivery times for each customer
         try:
             optimal_times_info = []
-            for name, area in self.predictor.customer_areas.items():
-                optimal_times = self.predictor.predict_optimal_times(name)
+            names = list(self.predictor.customer_areas.keys())
+            current_day = datetime.now().strftime("%A")
+            predictions = self.predictor.predict_optimal_times_batch(
+                names,
+                current_day,
+                top_k=1,
+                snapshot=(current_context or {}).get("real_time_snapshot"),
+            )
+            for name, optimal_times in zip(names, predictions):
                 if optimal_times and len(optimal_times) > 0:
                     best_time = optimal_times[0]["time"]
                     failure_rate = optimal_times[0]["failure_rate"]
@@ -312,7 +374,7 @@ class DeliveryChatbot:
 
         return formatted_prompt
 
-    def _generate_mock_response(self, query, system_context):
+    def _generate_mock_response(self, query, system_context, current_context=None):
         """Generate a mock response when no API key is provided"""
         query = query.lower()
 
@@ -403,10 +465,15 @@ This route prioritizes morning delivery for Ananya who has the lowest failure ra
 
                 delivery_list_str = "\n".join(delivery_list)
 
-                # Get real-time conditions without placeholder text
+                # Get real-time conditions without placeholder text, from the
+                # request's snapshot when there is one
+                real_time_data = (current_context or {}).get("real_time_data")
+                if real_time_data is None:
+                    real_time_data = self.predictor.get_real_time_snapshot().as_dict()
+
                 weather_conditions = "Weather data not available."
                 try:
-                    weather_data = self.predictor.get_real_time_data("weather")
+                    weather_data = real_time_data.get("weather")
                     if weather_data:
                         weather_conditions = self.predictor._get_weather_summary(
                             weather_data
@@ -416,7 +483,7 @@ This route prioritizes morning delivery for Ananya who has the lowest failure ra
 
                 traffic_conditions = "Traffic data not available."
                 try:
-                    traffic_data = self.predictor.get_real_time_data("traffic")
+                    traffic_data = real_time_data.get("traffic")
                     if traffic_data:
                         traffic_conditions = self.predictor._get_traffic_summary(
                             traffic_data
@@ -426,7 +493,7 @@ This route prioritizes morning delivery for Ananya who has the lowest failure ra
 
                 festival_conditions = "Festival data not available."
                 try:
-                    festival_data = self.predictor.get_real_time_data("festivals")
+                    festival_data = real_time_data.get("festivals")
                     if festival_data:
                         festival_conditions = self.predictor._get_festival_summary(
                             festival_data
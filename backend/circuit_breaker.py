@@ -0,0 +1,186 @@
+"""
+Circuit breaker for calls to a slow or unreliable upstream service.
+
+The breaker watches the outcome and latency of every call. After repeated
+failures (or a high error rate over recent calls) it opens, and callers are
+told to skip the upstream and use fallback data instead of waiting on it.
+After ``reset_timeout`` seconds it lets a few trial calls through
+(half-open); a successful trial closes it again, a failed one re-opens it.
+Calls slower than ``slow_call_seconds`` count as failures, so an upstream
+that stops answering quickly trips the breaker as well.
+"""
+
+import threading
+import time
+from collections import deque
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Defaults for the real-time data path
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_ERROR_RATE_THRESHOLD = 0.5
+DEFAULT_WINDOW_SIZE = 20
+DEFAULT_RESET_TIMEOUT = 30.0
+DEFAULT_SLOW_CALL_SECONDS = 8.0
+
+
+class CircuitBreaker:
+    """
+    Thread-safe closed / open / half-open circuit breaker.
+
+    Callers ask ``allow_request`` before each upstream call and report the
+    result with ``record_success`` or ``record_failure``; every allowed call
+    must be reported exactly once.
+    """
+
+    def __init__(
+        self,
+        failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+        error_rate_threshold=DEFAULT_ERROR_RATE_THRESHOLD,
+        window_size=DEFAULT_WINDOW_SIZE,
+        reset_timeout=DEFAULT_RESET_TIMEOUT,
+        slow_call_seconds=DEFAULT_SLOW_CALL_SECONDS,
+        half_open_max_calls=1,
+        clock=time.monotonic,
+    ):
+        """
+        Args:
+            failure_threshold (int): Consecutive failures that open the breaker.
+            error_rate_threshold (float): Failure fraction over a full window
+                of recent calls that opens the breaker.
+            window_size (int): Number of recent calls in the error-rate window.
+            reset_timeout (float): Seconds the breaker stays open before trials.
+            slow_call_seconds (float): Calls slower than this count as
+                failures (None to ignore latency).
+            half_open_max_calls (int): Trial calls allowed at once when half-open.
+            clock (callable): Monotonic clock, replaceable in tests.
+        """
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call_seconds = slow_call_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = None
+        self._consecutive_failures = 0
+        self._half_open_calls = 0
+        # True for each failed call among the most recent ones
+        self._window = deque(maxlen=window_size)
+        self._counts = {
+            "calls": 0,
+            "successes": 0,
+            "failures": 0,
+            "slow_calls": 0,
+            "rejected": 0,
+            "opened": 0,
+        }
+        self._total_latency = 0.0
+        self._max_latency = 0.0
+
+    @property
+    def state(self):
+        """Current state: "closed", "open" or "half_open"."""
+        with self._lock:
+            self._check_reset()
+            return self._state
+
+    def _check_reset(self):
+        if self._state == OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._half_open_calls = 0
+
+    def allow_request(self):
+        """
+        Whether a call to the upstream may be made now.
+
+        Returns:
+            bool: False while the breaker is open (use fallback data instead).
+        """
+        with self._lock:
+            self._check_reset()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+                self._half_open_calls += 1
+                return True
+            self._counts["rejected"] += 1
+            return False
+
+    def record_success(self, latency):
+        """Report a completed call; slow calls are counted as failures."""
+        if self.slow_call_seconds is not None and latency > self.slow_call_seconds:
+            self._record(False, latency, slow=True)
+        else:
+            self._record(True, latency)
+
+    def record_failure(self, latency):
+        """Report a failed call."""
+        self._record(False, latency)
+
+    def _record(self, success, latency, slow=False):
+        with self._lock:
+            self._counts["calls"] += 1
+            self._counts["successes" if success else "failures"] += 1
+            if slow:
+                self._counts["slow_calls"] += 1
+            self._total_latency += latency
+            self._max_latency = max(self._max_latency, latency)
+            self._window.append(not success)
+
+            if success:
+                self._consecutive_failures = 0
+                if self._state == HALF_OPEN:
+                    self._close()
+                return
+
+            self._consecutive_failures += 1
+            if self._state == HALF_OPEN or self._should_open():
+                self._open()
+
+    def _should_open(self):
+        if self._state != CLOSED:
+            return False
+        if self._consecutive_failures >= self.failure_threshold:
+            return True
+        window_full = len(self._window) == self._window.maxlen
+        return window_full and self._error_rate() >= self.error_rate_threshold
+
+    def _error_rate(self):
+        return sum(self._window) / len(self._window) if self._window else 0.0
+
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = self.clock()
+        self._counts["opened"] += 1
+
+    def _close(self):
+        self._state = CLOSED
+        self._opened_at = None
+        self._window.clear()
+
+    def metrics(self):
+        """
+        Breaker state and call statistics.
+
+        Returns:
+            dict: state, counts, error rate over the recent window and
+            latency statistics in milliseconds.
+        """
+        with self._lock:
+            self._check_reset()
+            calls = self._counts["calls"]
+            return {
+                "state": self._state,
+                **self._counts,
+                "consecutive_failures": self._consecutive_failures,
+                "error_rate": round(self._error_rate(), 3),
+                "mean_latency_ms": round(1000 * self._total_latency / calls, 1)
+                if calls
+                else None,
+                "max_latency_ms": round(1000 * self._max_latency, 1),
+            }
@@ -0,0 +1,118 @@
+"""
+Coordinates of delivery addresses, for distance estimates between any stops.
+
+The fixed customer addresses and the postman's start location were geocoded
+once and their coordinates are kept in ``KNOWN_COORDINATES``, so the demo
+never has to ask Nominatim for them. Any other address is resolved through
+the app's ``Geocoder`` the first time it is routed (which also stores it in
+the geocode cache) and kept in the index from then on.
+
+``locate`` returns the coordinates of a whole list of stops as arrays, ready
+for ``haversine_matrix``.
+"""
+
+import threading
+
+import numpy as np
+import requests
+
+from geocoding import normalize_address
+
+# Geocoded (lat, lon) of the fixed customer addresses and the start location
+KNOWN_COORDINATES = {
+    "Near Jodhpur Cross Road, Satellite, Ahmedabad - 380015": (23.0258, 72.5244),
+    "Near Bopal Cross Road, Bopal, Ahmedabad - 380058": (23.0335, 72.4636),
+    "Near Vastrapur Lake, Vastrapur, Ahmedabad - 380015": (23.0395, 72.5290),
+    "Opposite Dharnidhar Derasar, Paldi, Ahmedabad - 380007": (23.0105, 72.5610),
+    "Near Thaltej Cross Road, S.G. Highway, Ahmedabad - 380054": (23.0500, 72.5170),
+    "Near Navrangpura AMTS Bus Stop, Navrangpura, Ahmedabad - 380009": (23.0365, 72.5611),
+    "Opposite Rajpath Club, Bodakdev, Ahmedabad - 380054": (23.0337, 72.5097),
+    "Near Oganaj Gam, Gota, Ahmedabad - 382481": (23.1115, 72.5325),
+    "Opposite Rambaug Police Station, Maninagar, Ahmedabad - 380008": (22.9960, 72.6030),
+    "Near Chandkheda Gam Bus Stop, Chandkheda, Ahmedabad - 382424": (23.1095, 72.5845),
+    "Iscon Center, Shivranjani Cross Road, Satellite, Ahmedabad, India": (23.0250, 72.5075),
+}
+
+
+class CoordinateIndex:
+    """
+    Normalized address -> (lat, lon), resolved at most once per address.
+
+    Addresses the geocoder does not know are remembered as unknown; lookups
+    that fail (Nominatim unreachable) are retried on the next call.
+    """
+
+    def __init__(self, coordinates=KNOWN_COORDINATES, geocoder=None):
+        """
+        Args:
+            coordinates (dict): Address -> (lat, lon) known up front.
+            geocoder (Geocoder): Resolves other addresses (None: only the
+                known coordinates are used).
+        """
+        self.geocoder = geocoder
+        # Normalized address -> (lat, lon), or None if it cannot be geocoded
+        self._coordinates = {
+            normalize_address(address): (float(lat), float(lon))
+            for address, (lat, lon) in coordinates.items()
+        }
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._coordinates)
+
+    def get(self, address):
+        """(lat, lon) of an address, resolving it if necessary (None if unknown)"""
+        return self.resolve([address]).get(normalize_address(address))
+
+    def resolve(self, addresses):
+        """
+        Coordinates of several addresses, geocoding the new ones in one batch.
+
+        Args:
+            addresses (list): Addresses as entered.
+
+        Returns:
+            dict: Normalized address -> (lat, lon), or None if unknown.
+        """
+        # Normalized address -> first spelling of it, which is geocoded
+        keys = {}
+        for address in addresses:
+            keys.setdefault(normalize_address(address), address)
+        with self._lock:
+            missing = [
+                address
+                for key, address in keys.items()
+                if key not in self._coordinates
+            ]
+
+        if missing and self.geocoder is not None:
+            resolved = {}
+            for key, result in self.geocoder.geocode_many(missing).items():
+                if isinstance(result, requests.RequestException):
+                    # Not cached, so the address is looked up again next time
+                    continue
+                resolved[key] = None if result is None else (result["lat"], result["lon"])
+            with self._lock:
+                self._coordinates.update(resolved)
+
+        with self._lock:
+            return {key: self._coordinates.get(key) for key in keys}
+
+    def locate(self, addresses):
+        """
+        Coordinates of a list of stops as arrays.
+
+        Args:
+            addresses (list): Address of each stop.
+
+        Returns:
+            tuple: (lats, lons, found) arrays of length ``len(addresses)``;
+            stops that could not be located have ``found`` False and NaN
+            coordinates.
+        """
+        coordinates = self.resolve(addresses)
+        points = [coordinates[normalize_address(address)] for address in addresses]
+        found = np.array([point is not None for point in points], dtype=bool)
+        lats = np.array([point[0] if point else np.nan for point in points])
+        lons = np.array([point[1] if point else np.nan for point in points])
+        return lats, lons, found
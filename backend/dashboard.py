@@ -0,0 +1,183 @@
+"""
+View model for the dashboard page.
+
+``DashboardView`` follows the ``OrderRepository`` as a listener and keeps the
+dashboard's groupings of orders (by customer and delivery day) up to date one
+order at a time. The lists handed to the template are assembled on the first
+page load after a change and then reused, and the real-time summaries are
+computed once per snapshot, so an unchanged dashboard costs no work per
+order to serve.
+"""
+
+import threading
+from collections import Counter
+from datetime import datetime
+
+
+class DashboardView:
+    """
+    Incrementally maintained data for the dashboard template.
+
+    The returned lists and dicts are shared between requests and must not
+    be modified.
+    """
+
+    def __init__(self, predictor):
+        """
+        Build the initial groupings and subscribe to order changes.
+
+        Args:
+            predictor (DeliveryPredictor): Source of orders, real-time data and
+                summaries.
+        """
+        self.predictor = predictor
+        self._lock = threading.RLock()
+        self._orders = {}
+        self._name_counts = Counter()
+        # (name, delivery_day) -> {order_id: order}
+        self._buckets = {}
+        # (name, delivery_day) -> group for the pending orders list
+        self._pending_groups = {}
+        # (name, delivery_day) -> first order with a parcel count
+        self._customer_groups = {}
+        # Day -> template lists, cleared whenever an order changes
+        self._lists = {}
+        # (snapshot version, date) and the real-time data and summaries for it
+        self._real_time = (None, None)
+        predictor.orders.add_listener(self)
+
+    def orders_reloaded(self, orders):
+        """Rebuild every grouping (``OrderRepository`` listener)."""
+        with self._lock:
+            self._orders = {}
+            self._name_counts = Counter()
+            self._buckets = {}
+            self._pending_groups = {}
+            self._customer_groups = {}
+            touched = set()
+            for order in sorted(orders, key=lambda order: order["order_id"]):
+                touched.add(self._add(order))
+            for key in touched:
+                self._regroup(key)
+            self._lists = {}
+
+    def order_changed(self, previous, order):
+        """Update the groups of one changed order (``OrderRepository`` listener)."""
+        with self._lock:
+            key = self._add(order)
+            touched = {key}
+            if previous is not None:
+                self._name_counts[previous["name"]] -= 1
+                old_key = self._key(previous)
+                if old_key != key:
+                    del self._buckets[old_key][previous["order_id"]]
+                    touched.add(old_key)
+            for key in touched:
+                self._regroup(key)
+            self._lists = {}
+
+    @staticmethod
+    def _key(order):
+        return order["name"], order["delivery_day"]
+
+    def _add(self, order):
+        """Store an order in its bucket; returns the bucket key."""
+        key = self._key(order)
+        self._orders[order["order_id"]] = order
+        self._name_counts[order["name"]] += 1
+        self._buckets.setdefault(key, {})[order["order_id"]] = order
+        return key
+
+    def _regroup(self, key):
+        """Rebuild the groups of one (name, delivery_day) bucket."""
+        bucket = self._buckets.get(key)
+        if not bucket:
+            self._buckets.pop(key, None)
+            self._pending_groups.pop(key, None)
+            self._customer_groups.pop(key, None)
+            return
+
+        orders = [bucket[order_id] for order_id in sorted(bucket)]
+        first = orders[0]
+        self._pending_groups[key] = {
+            "name": first["name"],
+            "delivery_day": first["delivery_day"],
+            "area": first["area"],
+            "address": first["address"],
+            "orders": orders,
+        }
+        self._customer_groups[key] = dict(first, parcel_count=len(orders))
+
+    def _build_lists(self, day):
+        """Assemble the template lists for ``day`` from the groups."""
+
+        def first_id(key):
+            return min(self._buckets[key])
+
+        pending_keys = sorted(self._pending_groups, key=first_id)
+        todays_keys = sorted(
+            (key for key in self._customer_groups if key[1] == day), key=first_id
+        )
+        todays_orders = [
+            order
+            for key in todays_keys
+            for order in self._pending_groups[key]["orders"]
+        ]
+        return {
+            "pending_orders": list(self._orders.values()),
+            "names": sorted(name for name, count in self._name_counts.items() if count),
+            "todays_orders": sorted(todays_orders, key=lambda order: order["order_id"]),
+            "grouped_todays_orders": [self._customer_groups[key] for key in todays_keys],
+            "grouped_pending_orders": [self._pending_groups[key] for key in pending_keys],
+        }
+
+    def _real_time_view(self, snapshot):
+        """Real-time data and summaries for the template, cached per snapshot."""
+        key = (snapshot.version, datetime.now().strftime("%Y-%m-%d"))
+        cached_key, cached = self._real_time
+        if cached_key == key:
+            return cached
+
+        real_time_data = snapshot.as_dict()
+        real_time_summary = {
+            "weather": self.predictor._get_weather_summary(real_time_data["weather"]),
+            "traffic": self.predictor._get_traffic_summary(real_time_data["traffic"]),
+            "festivals": self.predictor._get_festival_summary(
+                real_time_data["festivals"]
+            ),
+        }
+        cached = (real_time_data, real_time_summary)
+        self._real_time = (key, cached)
+        return cached
+
+    def context(self, snapshot=None):
+        """
+        Template variables for the dashboard page.
+
+        Args:
+            snapshot (RealTimeSnapshot): Real-time data to show (default: a
+                fresh snapshot).
+
+        Returns:
+            dict: current_day, pending_orders, names, todays_orders,
+            grouped_todays_orders, grouped_pending_orders, real_time_data and
+            real_time_summary.
+        """
+        current_day = datetime.now().strftime("%A")
+        # Picks up orders written by other worker processes
+        self.predictor.orders.sync()
+        with self._lock:
+            lists = self._lists.get(current_day)
+            if lists is None:
+                lists = self._lists[current_day] = self._build_lists(current_day)
+
+        if snapshot is None:
+            snapshot = self.predictor.get_real_time_snapshot()
+        real_time_data, real_time_summary = self._real_time_view(snapshot)
+
+        return dict(
+            lists,
+            current_day=current_day,
+            real_time_data=real_time_data,
+            real_time_summary=real_time_summary,
+        )
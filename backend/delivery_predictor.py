@@ -1,25 +1,76 @@
 import pandas as pd
 import numpy as np
-from collections import Counter, defaultdict
 import random
 from datetime import datetime, timedelta
-import json
-import requests
-import itertools
+from functools import partial
 import os
+import asyncio
+import threading
+import zlib
 from dotenv import load_dotenv
-from gemini_api import GeminiAPI
+from gemini_api import DEFAULT_MAX_IN_FLIGHT, DEFAULT_TIMEOUT, GeminiAPI
+from rate_tables import RateCube, aggregate_success_counts, rollup_counts
+from distance_matrix import (
+    DEFAULT_DISTANCE,
+    UNKNOWN_AREA,
+    AreaDistanceMatrix,
+    build_address_index,
+    estimate_driving,
+    format_distance,
+    haversine_matrix,
+)
+from coordinate_index import CoordinateIndex
+from order_log import OrderEventLog
+from order_repository import OrderRepository
+from order_store import OrderStore
+from prediction_cache import DEFAULT_MAX_SIZE, PredictionCache
+from real_time_cache import (
+    DEFAULT_POLL_INTERVAL,
+    BackgroundRefresher,
+    RealTimeSnapshot,
+    SingleFlightCache,
+    index_by_area,
+)
+from route_solver import solve_route
+from slot_adjustments import compile_slot_adjustment
+from time_slots import HOURS_PER_DAY
 
 # Load environment variables
 load_dotenv()
 
+# Real-time data types served by get_real_time_data
+REAL_TIME_DATA_TYPES = ("traffic", "weather", "festivals")
+# Real-time data types that can be requested for a single area
+AREA_DATA_TYPES = ("traffic", "weather")
+# Address of orders for customers without a fixed address
+ADDRESS_NOT_AVAILABLE = "Address not available"
+# Seconds mock data stands in for real-time data that could not be fetched,
+# after which the upstream is tried again
+FALLBACK_LIFETIME = 30
+
 
 class DeliveryPredictor:
-    def __init__(self, dataset_path="dataset.csv"):
+    def __init__(
+        self,
+        dataset_path="dataset.csv",
+        orders_db_path="orders.db",
+        rate_half_life_days=None,
+        real_time_stale_grace=0,
+        mock_seed=None,
+        prediction_cache_size=DEFAULT_MAX_SIZE,
+        generate_orders=True,
+        orders_shared=False,
+        geocoder=None,
+    ):
         # Load the dataset
         self.df = pd.read_csv(dataset_path)
+        # Half-life of delivery outcomes recorded after startup (None: no decay)
+        self.rate_half_life_days = rate_half_life_days
         # Create success rate maps
         self.analyze_data()
+        # Recent predictions by (name, day, top_k, date, hour, snapshot
+        # version, rate version)
+        self.prediction_cache = PredictionCache(prediction_cache_size)
         # Customer addresses
         self.customer_addresses = {
             "Aditya": "Near Jodhpur Cross Road, Satellite, Ahmedabad - 380015",
@@ -46,393 +97,366 @@ class DeliveryPredictor:
             "Ishaan": "Maninagar",
             "Kabir": "Chandkheda",
         }
+        # Areas that get their own real-time cache entries; any other area
+        # (e.g. from a query string) is answered from the city-wide data
+        self.real_time_areas = frozenset(self.customer_areas.values())
         # Default postman location
         self.default_location = (
             "Iscon Center, Shivranjani Cross Road, Satellite, Ahmedabad, India"
         )
+        # Area distance matrices and the area id of every customer address
+        self.area_distances = AreaDistanceMatrix(
+            extra_areas=self.customer_areas.values()
+        )
+        self.address_area_ids = {
+            address: self.area_distances.area_id(area)
+            for address, area in build_address_index(
+                self.customer_addresses, self.customer_areas
+            ).items()
+        }
+        # Coordinates of every stop, for legs the area table does not cover
+        # (other addresses are resolved through the geocoder, if given)
+        self.coordinates = CoordinateIndex(geocoder=geocoder)
         # Gemini API key
-        self.gemini_api = GeminiAPI(os.environ.get("GEMINI_API_KEY"))
+        self.gemini_api = GeminiAPI(
+            os.environ.get("GEMINI_API_KEY"),
+            max_in_flight=int(
+                os.environ.get("GEMINI_MAX_IN_FLIGHT", DEFAULT_MAX_IN_FLIGHT)
+            ),
+            timeout=float(os.environ.get("GEMINI_TIMEOUT", DEFAULT_TIMEOUT)),
+        )
+        # Persistent order storage (an event log for .jsonl paths, SQLite
+        # otherwise) and the in-memory order index shared with the app
+        if orders_db_path.endswith(".jsonl"):
+            self.order_store = OrderEventLog(orders_db_path)
+        else:
+            self.order_store = OrderStore(orders_db_path)
+        # (shared: other worker processes write to the same database)
+        self.orders = OrderRepository(self.order_store, shared=orders_shared)
         # Create a stack of pending orders
-        self.generate_pending_orders(20)  # Generate 20 fake pending orders
-        # Cache for real-time data to avoid too many API calls
-        self.real_time_data_cache = {
-            "traffic": {"data": None, "timestamp": None},
-            "weather": {"data": None, "timestamp": None},
-            "festivals": {"data": None, "timestamp": None},
-        }
+        if generate_orders:
+            self.generate_pending_orders(20)  # Generate 20 fake pending orders
         # Cache lifetime in seconds
         self.cache_lifetime = {
             "traffic": 900,  # 15 minutes
             "weather": 3600,  # 1 hour
             "festivals": 86400,  # 24 hours
         }
+        # Cache for real-time data to avoid too many API calls; only one
+        # request at a time refreshes an expired entry, and entries that
+        # expired less than real_time_stale_grace seconds ago are served while
+        # they are refreshed in the background
+        self.real_time_cache = SingleFlightCache(
+            self.cache_lifetime, stale_grace=real_time_stale_grace
+        )
+        self.real_time_refresher = None
+        # Area-indexed view of the latest value of each real-time cache key
+        self.real_time_area_views = {}
+        # Latest snapshot of all real-time data, reused until the data changes
+        self._real_time_snapshot = None
+        self._snapshot_lock = threading.Lock()
+        # Serializes status changes, so an outcome is recorded only once
+        self._mark_lock = threading.Lock()
+        # (snapshot version, date) and the slot adjustments compiled for it
+        self._slot_adjustments = (None, {})
+        # Random source for mock real-time data (seed it for reproducible runs)
+        self.mock_random = random.Random(mock_seed)
 
     def analyze_data(self):
         """Analyze the dataset to find patterns in successful deliveries"""
-        # Group by name, day, time and calculate success rate
-        self.success_by_name_day_time = defaultdict(
-            lambda: defaultdict(lambda: defaultdict(list))
+        # Count attempts and successes per name, day and time in one columnar pass
+        self.success_by_name_day_time = aggregate_success_counts(self.df)
+        self.success_by_name_day = rollup_counts(
+            self.success_by_name_day_time, ["name", "day"]
         )
-        self.success_by_name_day = defaultdict(lambda: defaultdict(list))
-        self.success_by_name_time = defaultdict(lambda: defaultdict(list))
-
-        for _, row in self.df.iterrows():
-            name = row["Name"]
-            day = row["Day of Delivery Attempt"]
-            time = row["Time"]
-            success = 1 if row["Delivery Status"] == "Success" else 0
-
-            self.success_by_name_day_time[name][day][time].append(success)
-            self.success_by_name_day[name][day].append(success)
-            self.success_by_name_time[name][time].append(success)
-
-        # Calculate success rates
-        self.rate_by_name_day_time = self._calculate_rates(
-            self.success_by_name_day_time
+        self.success_by_name_time = rollup_counts(
+            self.success_by_name_day_time, ["name", "time"]
         )
-        self.rate_by_name_day = self._calculate_rates(self.success_by_name_day)
-        self.rate_by_name_time = self._calculate_rates(self.success_by_name_time)
-
-    def _calculate_rates(self, data_dict):
-        """Helper function to calculate success rates from dictionaries"""
-        result = {}
-
-        # Handle nested dictionary structures of varying depth
-        if isinstance(data_dict, defaultdict):
-            for key, value in data_dict.items():
-                if isinstance(value, defaultdict):
-                    result[key] = self._calculate_rates(value)
-                else:
-                    # Calculate success rate
-                    success_rate = sum(value) / len(value) if value else 0
-                    result[key] = success_rate
 
-        return result
+        # Store success rates in a dense (customer, day, hour) cube
+        self.rate_cube = RateCube.from_counts(
+            self.success_by_name_day_time, self.rate_half_life_days
+        )
 
-    def predict_optimal_times(self, name, current_day, top_k=3):
+    def predict_optimal_times(self, name, current_day, top_k=3, snapshot=None):
         """Predict the top k optimal delivery times for a person on a given day"""
-        if name not in self.rate_by_name_time:
-            return [{"time": "No data available for this person", "failure_rate": 100}]
-
-        # Get all time slots with their success rates for this person
-        time_scores = self.rate_by_name_time[name].copy()
-
-        # If we have day-specific data, adjust scores
-        if name in self.rate_by_name_day and current_day in self.rate_by_name_day[name]:
-            day_success_rate = self.rate_by_name_day[name][current_day]
-
-            # Boost times that were successful on this specific day
-            for time, rate in time_scores.items():
-                if (
-                    name in self.rate_by_name_day_time
-                    and current_day in self.rate_by_name_day_time[name]
-                    and time in self.rate_by_name_day_time[name][current_day]
-                ):
-                    # Weighted average between overall time success and day-time-specific success
-                    specific_rate = self.rate_by_name_day_time[name][current_day][time]
-                    time_scores[time] = 0.3 * rate + 0.7 * specific_rate
-
-        # Get area for this customer
-        customer_area = self.customer_areas.get(name)
-
-        # Apply real-time data adjustments
-        self._apply_real_time_adjustments(time_scores, customer_area, current_day)
-
-        # Sort times by success rate (highest first)
-        sorted_times = sorted(time_scores.items(), key=lambda x: x[1], reverse=True)
-
-        # Filter times based on current time
-        current_hour = datetime.now().hour
-        filtered_times = []
-
-        for time, score in sorted_times:
-            # Extract hour from time string (e.g., "2 PM" -> 14)
-            hour = int(time.split()[0])
-            if "PM" in time and hour != 12:
-                hour += 12
-            elif "AM" in time and hour == 12:
-                hour = 0
-
-            # Only include future times for today
-            if hour > current_hour:
-                filtered_times.append((time, score))
-
-        # If we have fewer than top_k times after filtering, add some from the original list
-        if len(filtered_times) < top_k:
-            remaining_times = [
-                t for t, s in sorted_times if (t, s) not in filtered_times
-            ]
-            filtered_times.extend(
-                [(t, s) for t, s in sorted_times[: top_k - len(filtered_times)]]
-            )
+        return self.predict_optimal_times_batch(
+            [name], [current_day], top_k, snapshot
+        )[0]
 
-        # Return top k times with adjusted failure rates to be closer to 6%
-        result = []
-        for time, score in filtered_times[:top_k]:
-            # Calculate baseline failure rate (100% - success rate)
-            base_failure_rate = 100 - (score * 100)
-
-            # Adjust failure rate to be more realistic (closer to 6%)
-            # For very high success rates, increase the failure rate
-            if base_failure_rate < 1:
-                # Apply a minimum failure rate floor (between 2-6%)
-                adjusted_failure_rate = random.uniform(2.0, 6.0)
+    def predict_optimal_times_batch(self, names, days, top_k=3, snapshot=None):
+        """
+        Predict the top k optimal delivery times for many people in one call
+
+        Results are memoized per (name, day) for the current hour, real-time
+        snapshot and rate tables, so repeated requests are served from
+        self.prediction_cache. The returned lists are shared and must not be
+        modified.
+
+        Parameters:
+        - names: List of customer names
+        - days: List of days aligned with names, or a single day for all of them
+        - top_k: Number of time slots to return for each (name, day) pair
+        - snapshot: Real-time data to adjust for (default: a fresh snapshot)
+
+        Returns:
+        - List with one list of predicted times per (name, day) pair, in input order
+        """
+        if isinstance(days, str):
+            days = [days] * len(names)
+        if len(days) != len(names):
+            raise ValueError("names and days must have the same length")
+
+        if snapshot is None:
+            snapshot = self.get_real_time_snapshot()
+        now = datetime.now()
+        context = (
+            top_k,
+            now.strftime("%Y-%m-%d"),
+            now.hour,
+            snapshot.version,
+            self.rate_cube.version,
+        )
+
+        # Look up each distinct (name, day) pair once
+        predictions = {}
+        missing = []
+        for pair in dict.fromkeys(zip(names, days)):
+            cached = self.prediction_cache.get(pair + context)
+            if cached is None:
+                missing.append(pair)
             else:
-                # Scale up low failure rates, but keep their relative ordering
-                adjusted_failure_rate = base_failure_rate * 1.5
-                if adjusted_failure_rate < 2.0:  # Ensure minimum 2%
-                    adjusted_failure_rate = random.uniform(2.0, 4.0)
-                elif adjusted_failure_rate > 10.0:  # Cap at 10%
-                    adjusted_failure_rate = 10.0
-
-            result.append(
-                {"time": time, "failure_rate": round(adjusted_failure_rate, 1)}
+                predictions[pair] = cached
+
+        if missing:
+            computed = self._compute_optimal_times(
+                [name for name, _ in missing],
+                [day for _, day in missing],
+                top_k,
+                snapshot,
+                now.hour,
+            )
+            for pair, result in zip(missing, computed):
+                self.prediction_cache.put(pair + context, result)
+                predictions[pair] = result
+
+        return [predictions[pair] for pair in zip(names, days)]
+
+    def _compute_optimal_times(self, names, days, top_k, snapshot, current_hour):
+        """Rank the time slots of (name, day) pairs without the prediction cache"""
+        # Blended success rates for every (name, day) pair and hour slot
+        scores, available, known = self.rate_cube.score_slots_many(names, days)
+
+        # Apply real-time data adjustments once per customer area
+        rows_by_area = {}
+        for row, name in enumerate(names):
+            rows_by_area.setdefault(self.customer_areas.get(name), []).append(row)
+        for customer_area, rows in rows_by_area.items():
+            scores[rows] = self._apply_real_time_adjustments(
+                scores[rows], customer_area, snapshot
             )
 
-        # Sort the result by failure rate (lowest to highest)
-        result.sort(key=lambda x: x["failure_rate"])
+        # Rank future times for today first, then the best of the remaining times
+        later_today = np.arange(HOURS_PER_DAY) > current_hour
+        priority = np.where(available, scores + 2.0 * later_today, -np.inf)
+        top = np.argsort(-priority, axis=1, kind="stable")[:, :top_k]
+        top_available = np.take_along_axis(available, top, axis=1)
+
+        # Adjusted failure rates, sorted from lowest to highest within each row
+        failure_rates = np.round(
+            self._failure_rates(
+                np.take_along_axis(scores, top, axis=1),
+                self._slot_jitter(names, days, top),
+            ),
+            1,
+        )
+        failure_rates[~top_available] = np.inf
+        order = np.argsort(failure_rates, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1).tolist()
+        failure_rates = np.take_along_axis(failure_rates, order, axis=1).tolist()
+        top_available = np.take_along_axis(top_available, order, axis=1).tolist()
+
+        slot_labels = self.rate_cube.slot_labels
+        results = []
+        for row in range(len(names)):
+            if not known[row]:
+                results.append(
+                    [{"time": "No data available for this person", "failure_rate": 100}]
+                )
+                continue
+
+            results.append(
+                [
+                    {"time": slot_labels[hour], "failure_rate": rate}
+                    for hour, rate, is_available in zip(
+                        top[row], failure_rates[row], top_available[row]
+                    )
+                    if is_available
+                ]
+            )
 
-        return result
+        return results
 
-    def _apply_real_time_adjustments(self, time_scores, customer_area, current_day):
+    @staticmethod
+    def _slot_jitter(names, days, hours):
         """
-        Adjust time scores based on real-time traffic, weather, and festival data
+        Deterministic pseudo-random values in [0, 1) for (name, day, hour) slots
 
-        Parameters:
-        - time_scores: Dictionary of time slots with their success rates
-        - customer_area: The area where the customer is located
-        - current_day: Day of the week for which to make predictions
+        The same slot always gets the same value, so predictions are repeatable
+        and can be cached.
         """
-        # Get real-time traffic data for customer area
-        traffic_data = self.get_real_time_data("traffic", customer_area)
-
-        # Get real-time weather data
-        weather_data = self.get_real_time_data("weather")
+        seeds = np.array(
+            [zlib.crc32(f"{name}|{day}".encode()) for name, day in zip(names, days)],
+            dtype=np.uint64,
+        )
+        # splitmix64 finalizer over the (name, day) seed and hour
+        x = (seeds[:, None] << np.uint64(8)) | np.asarray(hours, dtype=np.uint64)
+        x = x * np.uint64(0x9E3779B97F4A7C15)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        x = x ^ (x >> np.uint64(31))
+        return (x >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+    @staticmethod
+    def _failure_rates(scores, jitter):
+        """
+        Convert success scores into failure rates adjusted to be closer to 6%
 
-        # Get festival data
-        festival_data = self.get_real_time_data("festivals")
+        Floors for very high success rates are spread using jitter, values in
+        [0, 1) with the same shape as scores.
+        """
+        # Calculate baseline failure rate (100% - success rate)
+        base_failure_rate = 100 - scores.astype(np.float64) * 100
+
+        # Scale up low failure rates, but keep their relative ordering,
+        # with a minimum of 2% and a cap of 10%
+        adjusted_failure_rate = base_failure_rate * 1.5
+        adjusted_failure_rate = np.where(
+            adjusted_failure_rate < 2.0,
+            2.0 + 2.0 * jitter,
+            np.minimum(adjusted_failure_rate, 10.0),
+        )
 
-        # Apply traffic adjustments
-        if isinstance(traffic_data, dict) and "congestion_level" in traffic_data:
-            congestion_level = traffic_data.get("congestion_level", 5)
-
-            # High congestion levels (7-10) reduce success rates for peak hours
-            if congestion_level >= 7:
-                peak_hours = ["8 AM", "9 AM", "10 AM", "5 PM", "6 PM", "7 PM"]
-                for time in time_scores:
-                    if time in peak_hours:
-                        # Reduce success rate by 5-25% based on congestion level
-                        reduction = (congestion_level - 6) * 0.05
-                        time_scores[time] = max(
-                            0.1, time_scores[time] * (1 - reduction)
-                        )
+        # For very high success rates, apply a minimum failure rate floor (2-6%)
+        return np.where(
+            base_failure_rate < 1,
+            2.0 + 4.0 * jitter,
+            adjusted_failure_rate,
+        )
 
-            # Low congestion periods slightly boost success rates
-            if congestion_level <= 3:
-                for time in time_scores:
-                    # Boost success rates for off-peak hours
-                    if time not in ["8 AM", "9 AM", "5 PM", "6 PM"]:
-                        time_scores[time] = min(0.95, time_scores[time] * 1.1)
+    def _apply_real_time_adjustments(self, scores, customer_area, snapshot=None):
+        """
+        Adjust hour slot scores based on real-time traffic, weather, and festival data
 
-        # Apply weather adjustments
-        if isinstance(weather_data, dict):
-            # Check for rain/severe weather
-            is_rainy = weather_data.get("conditions", "").lower() in [
-                "rain",
-                "rainy",
-                "thunderstorm",
-                "stormy",
-            ]
-            high_rain_chance = (
-                weather_data.get("precipitation", {}).get("chance", 0) >= 70
-            )
+        Parameters:
+        - scores: Array of success scores with hour slots on the last axis
+        - customer_area: The area where the customers are located
+        - snapshot: Real-time data to adjust for (default: a fresh snapshot)
 
-            if is_rainy or high_rain_chance:
-                # Reduce success rates across all times during rainy conditions
-                for time in time_scores:
-                    time_scores[time] = max(0.1, time_scores[time] * 0.8)
-
-            # Extreme temperatures reduce success rates
-            if "temperature" in weather_data:
-                temp = weather_data["temperature"].get("current", 30)
-                if temp >= 38:  # Very hot
-                    # Reduce afternoon success rates (12 PM - 4 PM)
-                    for time in ["12 PM", "1 PM", "2 PM", "3 PM", "4 PM"]:
-                        if time in time_scores:
-                            time_scores[time] = max(0.1, time_scores[time] * 0.85)
-
-        # Apply festival adjustments
-        if isinstance(festival_data, dict) and festival_data.get(
-            "has_festival_today", False
-        ):
-            festivals = festival_data.get("festivals", [])
-
-            for festival in festivals:
-                # Check if this festival is happening today
-                today = datetime.now().strftime("%Y-%m-%d")
-                if festival.get("date") == today:
-                    # Check if customer area is affected by this festival
-                    affected_areas = festival.get("affected_areas", [])
-
-                    if customer_area in affected_areas or not affected_areas:
-                        traffic_impact = festival.get("traffic_impact", "Moderate")
-
-                        # Extract festival times
-                        if "time" in festival:
-                            try:
-                                start_time, end_time = festival["time"].split("-")
-                                start_hour = int(start_time.strip().split(":")[0])
-                                end_hour = int(end_time.strip().split(":")[0])
-
-                                # Adjust delivery success rates for hours during the festival
-                                impact_factor = {
-                                    "Low": 0.95,
-                                    "Moderate": 0.8,
-                                    "High": 0.6,
-                                    "Severe": 0.4,
-                                }.get(traffic_impact, 0.8)
-
-                                for time in time_scores:
-                                    hour = int(time.split()[0])
-                                    if "PM" in time and hour != 12:
-                                        hour += 12
-                                    elif "AM" in time and hour == 12:
-                                        hour = 0
-
-                                    # If delivery time falls within festival hours, reduce success rate
-                                    if start_hour <= hour <= end_hour:
-                                        time_scores[time] = max(
-                                            0.1, time_scores[time] * impact_factor
-                                        )
-                            except (ValueError, IndexError):
-                                # If time parsing fails, apply a general reduction to all times
-                                for time in time_scores:
-                                    time_scores[time] = max(
-                                        0.1, time_scores[time] * 0.9
-                                    )
+        Returns:
+        - Adjusted scores with the same shape
+        """
+        if snapshot is None:
+            snapshot = self.get_real_time_snapshot()
+        return self._slot_adjustment(customer_area, snapshot).apply(scores)
 
-    def get_driving_distance(self, origin, destination):
-        """Get driving distance between two locations (mock data for demo)"""
-        # Mock distance data based on areas
-        area_distances = {
-            ("Satellite", "Bopal"): {"distance": 7.5, "duration": 15},
-            ("Satellite", "Vastrapur"): {"distance": 3.2, "duration": 10},
-            ("Satellite", "Paldi"): {"distance": 6.1, "duration": 12},
-            ("Satellite", "Thaltej"): {"distance": 5.3, "duration": 11},
-            ("Satellite", "Navrangpura"): {"distance": 4.8, "duration": 14},
-            ("Satellite", "Bodakdev"): {"distance": 4.1, "duration": 9},
-            ("Satellite", "Gota"): {"distance": 10.2, "duration": 22},
-            ("Satellite", "Maninagar"): {"distance": 12.5, "duration": 28},
-            ("Satellite", "Chandkheda"): {"distance": 14.0, "duration": 30},
-            ("Bopal", "Vastrapur"): {"distance": 8.3, "duration": 18},
-            ("Bopal", "Paldi"): {"distance": 9.5, "duration": 20},
-            ("Bopal", "Thaltej"): {"distance": 6.7, "duration": 14},
-            ("Bopal", "Navrangpura"): {"distance": 9.0, "duration": 19},
-            ("Bopal", "Bodakdev"): {"distance": 7.2, "duration": 16},
-            ("Bopal", "Gota"): {"distance": 8.8, "duration": 19},
-            ("Bopal", "Maninagar"): {"distance": 15.3, "duration": 35},
-            ("Bopal", "Chandkheda"): {"distance": 17.2, "duration": 40},
-            ("Vastrapur", "Paldi"): {"distance": 5.4, "duration": 11},
-            ("Vastrapur", "Thaltej"): {"distance": 4.2, "duration": 9},
-            ("Vastrapur", "Navrangpura"): {"distance": 3.1, "duration": 7},
-            ("Vastrapur", "Bodakdev"): {"distance": 2.5, "duration": 6},
-            ("Vastrapur", "Gota"): {"distance": 9.3, "duration": 20},
-            ("Vastrapur", "Maninagar"): {"distance": 11.2, "duration": 25},
-            ("Vastrapur", "Chandkheda"): {"distance": 13.5, "duration": 30},
-            ("Paldi", "Thaltej"): {"distance": 8.3, "duration": 18},
-            ("Paldi", "Navrangpura"): {"distance": 4.2, "duration": 9},
-            ("Paldi", "Bodakdev"): {"distance": 7.4, "duration": 15},
-            ("Paldi", "Gota"): {"distance": 12.5, "duration": 25},
-            ("Paldi", "Maninagar"): {"distance": 6.3, "duration": 14},
-            ("Paldi", "Chandkheda"): {"distance": 15.1, "duration": 35},
-            ("Thaltej", "Navrangpura"): {"distance": 5.5, "duration": 12},
-            ("Thaltej", "Bodakdev"): {"distance": 2.8, "duration": 6},
-            ("Thaltej", "Gota"): {"distance": 6.1, "duration": 13},
-            ("Thaltej", "Maninagar"): {"distance": 14.2, "duration": 30},
-            ("Thaltej", "Chandkheda"): {"distance": 11.3, "duration": 24},
-            ("Navrangpura", "Bodakdev"): {"distance": 4.6, "duration": 10},
-            ("Navrangpura", "Gota"): {"distance": 10.8, "duration": 22},
-            ("Navrangpura", "Maninagar"): {"distance": 8.5, "duration": 18},
-            ("Navrangpura", "Chandkheda"): {"distance": 11.2, "duration": 25},
-            ("Bodakdev", "Gota"): {"distance": 7.5, "duration": 16},
-            ("Bodakdev", "Maninagar"): {"distance": 13.1, "duration": 28},
-            ("Bodakdev", "Chandkheda"): {"distance": 12.3, "duration": 26},
-            ("Gota", "Maninagar"): {"distance": 18.5, "duration": 40},
-            ("Gota", "Chandkheda"): {"distance": 9.2, "duration": 20},
-            ("Maninagar", "Chandkheda"): {"distance": 19.6, "duration": 45},
-        }
+    def _slot_adjustment(self, customer_area, snapshot):
+        """
+        Compiled real-time adjustment for an area, reused for a snapshot
 
-        # Extract area names from addresses by matching customer names
-        origin_area = None
-        destination_area = None
+        Adjustments are compiled once per area for each snapshot version (and
+        day, since festivals apply by date); a newer snapshot replaces them all.
+        """
+        today = datetime.now().strftime("%Y-%m-%d")
+        key = (snapshot.version, today)
+        cached_key, adjustments = self._slot_adjustments
+        if cached_key != key:
+            adjustments = {}
+            # Replaced as a whole, so concurrent readers never see a mix
+            self._slot_adjustments = (key, adjustments)
+
+        adjustment = adjustments.get(customer_area)
+        if adjustment is None:
+            adjustment = compile_slot_adjustment(
+                customer_area,
+                snapshot.get("traffic", customer_area),
+                snapshot.weather,
+                snapshot.festivals,
+                today=today,
+            )
+            adjustments[customer_area] = adjustment
+        return adjustment
 
-        # If starting from default location
-        if origin == self.default_location:
-            origin_area = "Satellite"  # Iscon Center is in Satellite area
-        else:
-            # Try to match a customer name in the origin address
-            for name, address in self.customer_addresses.items():
-                if address == origin and name in self.customer_areas:
-                    origin_area = self.customer_areas[name]
-                    break
-
-        # Try to match a customer name in the destination address
-        for name, address in self.customer_addresses.items():
-            if address == destination and name in self.customer_areas:
-                destination_area = self.customer_areas[name]
-                break
-
-        # Look up distance in mock data
-        if origin_area and destination_area:
-            if origin_area == destination_area:
-                # Within same area
-                return {
-                    "distance": 1.5,
-                    "duration": 5,
-                    "text_distance": "1.5 km",
-                    "text_duration": "5 mins",
-                }
+    def get_driving_distance(self, origin, destination):
+        """
+        Get driving distance between two locations
 
-            key = (origin_area, destination_area)
-            reverse_key = (destination_area, origin_area)
+        Uses the area table (mock data for demo) where it covers both ends,
+        an estimate from the coordinates of both addresses otherwise, and the
+        default distance if either cannot be located.
+        """
+        origin_id = self._location_area_id(origin, is_origin=True)
+        destination_id = self._location_area_id(destination)
+        if not self.area_distances.known[origin_id, destination_id]:
+            distances, durations, located = self._coordinate_estimates(
+                [origin, destination]
+            )
+            if located[0, 1]:
+                return format_distance(float(distances[0, 1]), int(durations[0, 1]))
+        return self.area_distances.lookup(origin_id, destination_id)
 
-            if key in area_distances:
-                data = area_distances[key]
-                return {
-                    "distance": data["distance"],
-                    "duration": data["duration"],
-                    "text_distance": f"{data['distance']} km",
-                    "text_duration": f"{data['duration']} mins",
-                }
-            elif reverse_key in area_distances:
-                data = area_distances[reverse_key]
-                return {
-                    "distance": data["distance"],
-                    "duration": data["duration"],
-                    "text_distance": f"{data['distance']} km",
-                    "text_duration": f"{data['duration']} mins",
-                }
+    def _coordinate_estimates(self, locations):
+        """
+        Driving estimates between all locations from their coordinates
 
-        # Fallback to default values
-        return {
-            "distance": 10,
-            "duration": 20,
-            "text_distance": "10 km",
-            "text_duration": "20 mins",
-        }
+        Returns:
+        - (distances, durations, located) matrices; located is False for
+          pairs where either end could not be geocoded
+        """
+        lats, lons, found = self.coordinates.locate(locations)
+        located = found[:, None] & found[None, :]
+        straight = np.where(located, haversine_matrix(lats, lons), 0.0)
+        distances, durations = estimate_driving(straight)
+        return distances, durations, located
+
+    def _location_area_id(self, location, is_origin=False):
+        """Area id of a customer address (or the postman's start location)"""
+        if is_origin and location == self.default_location:
+            # Iscon Center is in Satellite area
+            return self.area_distances.area_id("Satellite")
+        return self.address_area_ids.get(location, UNKNOWN_AREA)
+
+    def optimize_delivery_route(
+        self,
+        customer_names,
+        solver="auto",
+        time_limit_ms=500,
+        snapshot=None,
+        extra_addresses=None,
+    ):
+        """
+        Find the optimal route for delivering to multiple customers
 
-    def optimize_delivery_route(self, customer_names):
-        """Find the optimal route for delivering to multiple customers"""
+        Parameters:
+        - customer_names: Names of the customers to visit
+        - solver: "exact", "heuristic" or "auto" (exact for small routes)
+        - time_limit_ms: Time budget for the heuristic solver
+        - snapshot: Real-time data to adjust for (default: a fresh snapshot)
+        - extra_addresses: Addresses of customers without a fixed address,
+          by name (legs to them are estimated from coordinates)
+        """
         if not customer_names:
             return []
 
         # Get customer addresses, consolidating multiple orders for the same customer
         consolidated_addresses = {}
         for name in customer_names:
-            if name in self.customer_addresses:
+            address = self.customer_addresses.get(name) or (
+                extra_addresses or {}
+            ).get(name)
+            if address:
                 # Make sure each customer has the right fixed area
                 area = self.customer_areas.get(name)
-                address = self.customer_addresses.get(name)
 
                 if name in consolidated_addresses:
                     # Increment parcel count for existing customer
@@ -453,153 +477,94 @@ class DeliveryPredictor:
         if len(addresses) <= 1:
             return addresses
 
-        # Fetch real-time traffic data for all areas
-        traffic_data = self.get_real_time_data("traffic")
-
-        # Fetch weather data
-        weather_data = self.get_real_time_data("weather")
-
-        # Fetch festival data
-        festival_data = self.get_real_time_data("festivals")
+        # Real-time traffic, weather and festival data for all areas
+        if snapshot is None:
+            snapshot = self.get_real_time_snapshot()
+        traffic_data = snapshot.traffic
+        weather_data = snapshot.weather
+        festival_data = snapshot.festivals
 
-        # For small number of locations, use brute force to find optimal route
         start_location = self.default_location
+        locations = [start_location] + [cust["address"] for cust in addresses]
 
-        # Calculate distances between all points
-        distance_matrix = {}
-
-        # Distance from start location to each customer
-        for cust in addresses:
-            key = (start_location, cust["address"])
-            distance_matrix[key] = self.get_driving_distance(
-                start_location, cust["address"]
-            )
-
-            # Apply real-time traffic adjustments to travel duration
-            self._adjust_travel_duration(
-                distance_matrix[key],
-                cust["area"],
-                traffic_data,
-                weather_data,
-                festival_data,
-            )
-
-        # Distance between every pair of customers
-        for cust1, cust2 in itertools.combinations(addresses, 2):
-            key1 = (cust1["address"], cust2["address"])
-            key2 = (cust2["address"], cust1["address"])  # Assuming symmetric distances
-            distance = self.get_driving_distance(cust1["address"], cust2["address"])
+        # Base distances and durations between all points in one gather
+        origin_ids = [self._location_area_id(loc, is_origin=True) for loc in locations]
+        destination_ids = [self._location_area_id(loc) for loc in locations]
+        distances, base_durations, known = self.area_distances.gather(
+            origin_ids, destination_ids
+        )
 
-            # Apply real-time traffic adjustments to travel duration
-            self._adjust_travel_duration(
-                distance, cust1["area"], traffic_data, weather_data, festival_data
+        # Legs the area table does not cover are estimated from the
+        # coordinates of all stops at once
+        if not known.all():
+            estimated, estimated_durations, located = self._coordinate_estimates(
+                locations
             )
+            fill = located & ~known
+            distances = np.where(fill, estimated, distances)
+            base_durations = np.where(fill, estimated_durations, base_durations)
+            known = known | located
+
+        # Real-time traffic adjustments, computed once per customer. Legs from
+        # the start use the area of the customer being driven to, legs between
+        # customers use the area of whichever comes first in the customer list
+        multipliers = np.ones(len(locations))
+        conditions = ["Normal"] * len(locations)
+        adjustments = {}
+        for k, cust in enumerate(addresses, start=1):
+            if cust["area"] not in adjustments:
+                adjustments[cust["area"]] = self._travel_multiplier(
+                    cust["area"], traffic_data, weather_data, festival_data
+                )
+            multipliers[k], conditions[k] = adjustments[cust["area"]]
 
-            distance_matrix[key1] = distance
-            distance_matrix[key2] = (
-                distance.copy()
-            )  # Use a copy to avoid reference issues
-
-        # Try all permutations of customers to find shortest route
-        best_route = None
-        min_total_time = float("inf")  # Optimize for time instead of distance
-
-        for perm in itertools.permutations(addresses):
-            total_time = 0
-
-            # Time from start to first customer
-            key = (start_location, perm[0]["address"])
-            total_time += distance_matrix[key]["duration"]
+        rows, cols = np.indices(distances.shape)
+        leg_owner = np.minimum(rows, cols)
+        leg_owner = np.where(leg_owner == 0, np.maximum(rows, cols), leg_owner)
 
-            # Time between consecutive customers
-            for i in range(len(perm) - 1):
-                key = (perm[i]["address"], perm[i + 1]["address"])
-                total_time += distance_matrix[key]["duration"]
+        # Integer duration matrix with the start location at index 0
+        durations = (base_durations * multipliers[leg_owner]).astype(np.int64)
+        np.fill_diagonal(durations, 0)
+        durations[:, 0] = 0
 
-            # Return to start (optional)
-            # key = (perm[-1]['address'], start_location)
-            # total_time += distance_matrix[key]['duration']
+        # Solve for the shortest route (optimize for time instead of distance)
+        order, _, solver_info = solve_route(durations, solver, time_limit_ms)
+        best_route = [addresses[i - 1] for i in order]
 
-            if total_time < min_total_time:
-                min_total_time = total_time
-                best_route = perm
+        def stop_label(cust):
+            if cust["parcel_count"] > 1:
+                return f"{cust['name']} ({cust['parcel_count']} parcels)"
+            return cust["name"]
 
         # Prepare the result with detailed route information
         route_details = []
         total_distance = 0
         total_duration = 0
 
-        # First leg: Start to first customer
-        first_leg = {
-            "from": "Start Location (Postman)",
-            "from_address": start_location,
-            "to": best_route[0]["name"]
-            + (
-                f" ({best_route[0]['parcel_count']} parcels)"
-                if best_route[0]["parcel_count"] > 1
-                else ""
-            ),
-            "to_address": best_route[0]["address"],
-            "distance": distance_matrix[(start_location, best_route[0]["address"])][
-                "text_distance"
-            ],
-            "duration": distance_matrix[(start_location, best_route[0]["address"])][
-                "text_duration"
-            ],
-            "traffic_conditions": distance_matrix[
-                (start_location, best_route[0]["address"])
-            ].get("traffic_conditions", "Normal"),
-        }
-        route_details.append(first_leg)
-        total_distance += distance_matrix[(start_location, best_route[0]["address"])][
-            "distance"
-        ]
-        total_duration += distance_matrix[(start_location, best_route[0]["address"])][
-            "duration"
-        ]
-
-        # Add remaining legs
-        for i in range(len(best_route) - 1):
-            leg = {
-                "from": best_route[i]["name"]
-                + (
-                    f" ({best_route[i]['parcel_count']} parcels)"
-                    if best_route[i]["parcel_count"] > 1
-                    else ""
-                ),
-                "from_address": best_route[i]["address"],
-                "to": best_route[i + 1]["name"]
-                + (
-                    f" ({best_route[i + 1]['parcel_count']} parcels)"
-                    if best_route[i + 1]["parcel_count"] > 1
-                    else ""
-                ),
-                "to_address": best_route[i + 1]["address"],
-                "distance": distance_matrix[
-                    (best_route[i]["address"], best_route[i + 1]["address"])
-                ]["text_distance"],
-                "duration": distance_matrix[
-                    (best_route[i]["address"], best_route[i + 1]["address"])
-                ]["text_duration"],
-                "traffic_conditions": distance_matrix[
-                    (best_route[i]["address"], best_route[i + 1]["address"])
-                ].get("traffic_conditions", "Normal"),
-            }
-            route_details.append(leg)
-            total_distance += distance_matrix[
-                (best_route[i]["address"], best_route[i + 1]["address"])
-            ]["distance"]
-            total_duration += distance_matrix[
-                (best_route[i]["address"], best_route[i + 1]["address"])
-            ]["duration"]
+        stops = [0] + order
+        for i, j in zip(stops, stops[1:]):
+            distance = float(distances[i, j]) if known[i, j] else DEFAULT_DISTANCE
+            leg_data = format_distance(distance, int(durations[i, j]))
+            route_details.append(
+                {
+                    "from": (
+                        "Start Location (Postman)"
+                        if i == 0
+                        else stop_label(addresses[i - 1])
+                    ),
+                    "from_address": locations[i],
+                    "to": stop_label(addresses[j - 1]),
+                    "to_address": locations[j],
+                    "distance": leg_data["text_distance"],
+                    "duration": leg_data["text_duration"],
+                    "traffic_conditions": conditions[leg_owner[i, j]],
+                }
+            )
+            total_distance += leg_data["distance"]
+            total_duration += leg_data["duration"]
 
         # Format route names with parcel counts
-        route_names = []
-        for item in best_route:
-            name = item["name"]
-            if item["parcel_count"] > 1:
-                name += f" ({item['parcel_count']} parcels)"
-            route_names.append(name)
+        route_names = [stop_label(item) for item in best_route]
 
         # Add weather and festival information to route data
         route_info = {
@@ -610,26 +575,18 @@ class DeliveryPredictor:
             "weather_conditions": self._get_weather_summary(weather_data),
             "traffic_summary": self._get_traffic_summary(traffic_data),
             "festival_impact": self._get_festival_summary(festival_data),
+            "solver": solver_info,
         }
 
         return route_info
 
-    def _adjust_travel_duration(
-        self, distance_data, area, traffic_data, weather_data, festival_data
-    ):
+    def _travel_multiplier(self, area, traffic_data, weather_data, festival_data):
         """
-        Adjust travel duration based on real-time traffic, weather, and festival data
+        Travel time multiplier for an area under real-time conditions
 
-        Parameters:
-        - distance_data: Dictionary with distance and duration information
-        - area: The area where the travel occurs
-        - traffic_data: Real-time traffic data
-        - weather_data: Real-time weather data
-        - festival_data: Festival data
+        Returns:
+        - (multiplier, traffic_conditions) tuple
         """
-        # Base duration
-        base_duration = distance_data["duration"]
-
         # Default multiplier (no adjustment)
         multiplier = 1.0
         traffic_conditions = "Normal"
@@ -693,13 +650,7 @@ class DeliveryPredictor:
                         multiplier *= 1.2
                     # Low impact doesn't need adjustment
 
-        # Update duration
-        adjusted_duration = int(base_duration * multiplier)
-        distance_data["duration"] = adjusted_duration
-        distance_data["text_duration"] = f"{adjusted_duration} mins"
-        distance_data["traffic_conditions"] = traffic_conditions
-
-        return distance_data
+        return multiplier, traffic_conditions
 
     def _get_weather_summary(self, weather_data):
         """Generate a summary of current weather conditions"""
@@ -811,7 +762,7 @@ class DeliveryPredictor:
         delivery_days = [current_day, tomorrow, day_after]
 
         # Create a stack of pending orders
-        self.pending_orders = []
+        pending_orders = []
         order_id = 10000
 
         for _ in range(num_orders):
@@ -825,24 +776,23 @@ class DeliveryPredictor:
                 "name": name,
                 "delivery_day": day,
                 "area": area,
-                "address": self.customer_addresses.get(name, "Address not available"),
+                "address": self.customer_addresses.get(name, ADDRESS_NOT_AVAILABLE),
                 "package_size": size,
                 "status": "Pending",
                 "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             }
 
-            self.pending_orders.append(order)
+            pending_orders.append(order)
             order_id += 1
 
-        # Save pending orders to a JSON file
-        with open("pending_orders.json", "w") as f:
-            json.dump(self.pending_orders, f, indent=2)
+        # Replace the stored orders
+        self.orders.replace_all(pending_orders)
 
         print(f"Generated {num_orders} pending orders")
 
     def get_pending_orders(self):
         """Return the list of pending orders"""
-        return self.pending_orders
+        return self.orders.all()
 
     def add_order(self, name, delivery_day, package_size=None):
         """Add a new order to the pending stack"""
@@ -852,98 +802,95 @@ class DeliveryPredictor:
         if package_size is None:
             package_size = random.choice(["Small", "Medium", "Large"])
 
-        order_id = (
-            max([o["order_id"] for o in self.pending_orders]) + 1
-            if self.pending_orders
-            else 10000
+        order = self.orders.add(
+            name=name,
+            delivery_day=delivery_day,
+            area=area,
+            address=self.customer_addresses.get(name, ADDRESS_NOT_AVAILABLE),
+            package_size=package_size,
         )
 
-        order = {
-            "order_id": order_id,
-            "name": name,
-            "delivery_day": delivery_day,
-            "area": area,
-            "address": self.customer_addresses.get(name, "Address not available"),
-            "package_size": package_size,
-            "status": "Pending",
-            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        }
-
-        self.pending_orders.append(order)
-
-        # Update JSON file
-        with open("pending_orders.json", "w") as f:
-            json.dump(self.pending_orders, f, indent=2)
-
-        return order_id
+        return order["order_id"]
 
     def mark_delivered(self, order_id, success=True):
         """Mark a pending order as delivered or failed"""
-        # Load existing orders
-        try:
-            with open("pending_orders.json", "r") as f:
-                orders = json.load(f)
-        except FileNotFoundError:
-            return {"error": "No pending orders found"}
-
-        # Find the order
-        order_found = False
-        for order in orders:
-            if str(order["order_id"]) == str(order_id):
-                # Update status
-                order["status"] = "Delivered" if success else "Failed"
-                order["delivered_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                order_found = True
-                break
-
-        if not order_found:
+        with self._mark_lock:
+            previous = self.orders.get(order_id)
+            order = self.orders.update_status(
+                order_id, "Delivered" if success else "Failed", delivered=True
+            )
+        if order is None:
             return {"error": f"Order #{order_id} not found"}
 
-        # Save updated orders
-        with open("pending_orders.json", "w") as f:
-            json.dump(orders, f, indent=2)
-
-        # If delivery was successful, add to history
-        if success:
-            # For now, just mock this since we don't have a separate history storage
-            pass
+        # Fold the outcome into the success rates used for predictions, once:
+        # /mark_delivered is a GET link, so repeated clicks and prefetches of
+        # an order that is no longer pending must not count again
+        if previous is not None and previous.get("status") == "Pending":
+            delivered_at = datetime.strptime(
+                order["delivered_at"], "%Y-%m-%d %H:%M:%S"
+            )
+            self.rate_cube.record(
+                order["name"],
+                delivered_at.strftime("%A"),
+                delivered_at.hour,
+                success,
+                when=delivered_at,
+            )
 
         return {
             "success": True,
             "message": f"Order #{order_id} marked as {'Delivered' if success else 'Failed'}",
         }
 
-    def optimize_route(self, selected_orders):
+    def optimize_route(
+        self, selected_orders, solver="auto", time_limit_ms=500, snapshot=None
+    ):
         """
         Optimizes the delivery route for a list of selected orders
 
         Parameters:
         - selected_orders: List of order dictionaries
+        - solver: "exact", "heuristic" or "auto" (exact for small routes)
+        - time_limit_ms: Time budget for the heuristic solver
+        - snapshot: Real-time data to adjust for (default: a fresh snapshot)
 
         Returns:
         - Optimized route information
         """
-        # Extract customer names from the selected orders
+        # Extract customer names from the selected orders, and the order
+        # address of customers without a fixed address
         customer_names = []
+        extra_addresses = {}
         for order in selected_orders:
             name = order.get("name")
             if name and name not in customer_names:
                 customer_names.append(name)
+            address = order.get("address")
+            if (
+                name
+                and name not in self.customer_addresses
+                and address
+                and address != ADDRESS_NOT_AVAILABLE
+            ):
+                extra_addresses.setdefault(name, address)
 
         # Use the existing optimize_delivery_route method to calculate the route
         if not customer_names:
             return {"error": "No valid customers found in the selected orders"}
 
-        optimized_route = self.optimize_delivery_route(customer_names)
+        optimized_route = self.optimize_delivery_route(
+            customer_names,
+            solver=solver,
+            time_limit_ms=time_limit_ms,
+            snapshot=snapshot,
+            extra_addresses=extra_addresses,
+        )
         return optimized_route
 
     def get_todays_orders(self):
         """Get all orders scheduled for today"""
-        all_orders = self.get_pending_orders()
         current_day = datetime.now().strftime("%A")
-
-        # Filter orders for today
-        return [order for order in all_orders if order["delivery_day"] == current_day]
+        return self.orders.find(delivery_day=current_day)
 
     def get_real_time_data(self, data_type, area=None):
         """
@@ -956,24 +903,238 @@ class DeliveryPredictor:
         Returns:
         - Dictionary with relevant real-time data
         """
-        if not self.gemini_api.is_configured:
-            return self._generate_mock_real_time_data(data_type, area)
-
-        # Check if we have cached data that's still valid
-        cache = self.real_time_data_cache.get(data_type)
-        if cache and cache.get("data") and cache.get("timestamp"):
-            cache_age = (datetime.now() - cache["timestamp"]).total_seconds()
-            if cache_age < self.cache_lifetime.get(data_type, 3600):
-                # If area is specified and exists in cached data, return only that area's data
-                if (
-                    area
-                    and data_type in ["traffic", "weather"]
-                    and isinstance(cache["data"], dict)
-                    and area in cache["data"]
-                ):
-                    return cache["data"][area]
-                return cache["data"]
+        if data_type not in REAL_TIME_DATA_TYPES:
+            return {"error": "Invalid data type requested"}
+
+        if area and data_type in AREA_DATA_TYPES:
+            return self._get_area_real_time_data(data_type, area)
+
+        data = self._get_city_real_time_data(data_type)
+        if data is None:
+            # Fall back to mock data if there's an error
+            return self._fallback_real_time_data(data_type)
+        return data
+
+    def _get_city_real_time_data(self, data_type):
+        """City-wide real-time data from the cache, fetched on a miss (None on error)"""
+        # Mock data goes through the same cache, so it stays stable for the
+        # cache lifetime instead of being re-randomized on every call
+        if self.gemini_api.is_configured:
+            fetch = lambda: self._fetch_real_time_data(data_type)
+        else:
+            fetch = lambda: self._generate_mock_real_time_data(data_type)
+
+        # Served from the cache while fresh; errors are not cached
+        return self.real_time_cache.get(data_type, fetch)
+
+    def _get_area_real_time_data(self, data_type, area):
+        """
+        Real-time data for one area
+
+        Served from the area view of the city-wide data whenever that is fresh
+        (or mocked), so it never causes an upstream call. Otherwise a known
+        area is fetched on its own and cached under (data_type, area), leaving
+        the city-wide entry untouched; other areas only ever read the
+        city-wide data, so arbitrary area names cannot grow the cache.
+        """
+        if area not in self.real_time_areas:
+            data = self._get_city_real_time_data(data_type)
+            if data is None:
+                data = self._fallback_real_time_data(data_type)
+            return self._area_view(data_type, data).get(area, data)
+
+        if not self.gemini_api.is_configured or self.real_time_cache.is_fresh(
+            data_type
+        ):
+            data = self._get_city_real_time_data(data_type)
+            if data is not None:
+                return self._area_view(data_type, data).get(area, data)
+
+        data = self.real_time_cache.get(
+            (data_type, area), lambda: self._fetch_real_time_data(data_type, area)
+        )
+        return self._area_result(data_type, area, data)
+
+    def _area_result(self, data_type, area, data):
+        """Area data from a per-area fetch, with fallbacks if it failed"""
+        if data is None:
+            # Last good city-wide data (e.g. while the API circuit is open)
+            city = self._fallback_real_time_data(data_type)
+            return self._area_view(data_type, city).get(area, city)
+        # The answer may still be keyed by area
+        return self._area_view((data_type, area), data).get(area, data)
+
+    def _fallback_real_time_data(self, data_type):
+        """
+        City-wide data to use when a fetch failed
+
+        The last good value if there is one. Otherwise mock data, cached for
+        FALLBACK_LIFETIME seconds so that repeated reads (e.g. while the API
+        circuit is open) see the same value instead of a new random one.
+        """
+        data = self.real_time_cache.peek(data_type)
+        if data is None:
+            data = self._generate_mock_real_time_data(data_type)
+            self.real_time_cache.put(data_type, data, lifetime=FALLBACK_LIFETIME)
+        return data
+
+    def _area_view(self, key, data):
+        """
+        Index real-time data by area, computed once per fetched value
+
+        Areas may be top-level keys of the data or nested under "areas".
+        """
+        cached = self.real_time_area_views.get(key)
+        if cached is not None and cached[0] is data:
+            return cached[1]
+
+        view = index_by_area(data)
+        self.real_time_area_views[key] = (data, view)
+        return view
+
+    def get_real_time_snapshot(self):
+        """
+        Read traffic, weather and festival data once, as an immutable snapshot
+
+        Data types that must be fetched are fetched concurrently; the rest are
+        read from the cache. The same snapshot object (and version) is returned
+        until any of the data changes.
+
+        Returns:
+        - RealTimeSnapshot
+        """
+        if self.gemini_api.is_configured:
+            missing = [
+                data_type
+                for data_type in REAL_TIME_DATA_TYPES
+                if self.real_time_cache.must_fetch(data_type)
+            ]
+            if missing:
+                self.real_time_cache.refresh_many(
+                    missing, self._fetch_real_time_data_many
+                )
+
+        data = {
+            data_type: self.get_real_time_data(data_type)
+            for data_type in REAL_TIME_DATA_TYPES
+        }
+        return self._snapshot_of(data)
+
+    def _snapshot_of(self, data):
+        """The current snapshot if it holds ``data``, otherwise a new one"""
+        with self._snapshot_lock:
+            snapshot = self._real_time_snapshot
+            if snapshot is not None and all(
+                getattr(snapshot, data_type) is value
+                for data_type, value in data.items()
+            ):
+                return snapshot
+
+            version = 1 if snapshot is None else snapshot.version + 1
+            self._real_time_snapshot = RealTimeSnapshot(version, **data)
+            return self._real_time_snapshot
+
+    async def get_real_time_data_async(self, data_type, area=None):
+        """
+        Asynchronous get_real_time_data for async routes
+
+        Cached and mock data are returned without waiting. A fetch runs on the
+        Gemini client's event loop, so the caller holds no thread while it
+        waits for the API.
+        """
+        if data_type not in REAL_TIME_DATA_TYPES or not self.gemini_api.is_configured:
+            return self.get_real_time_data(data_type, area)
+
+        if area and data_type in AREA_DATA_TYPES and area not in self.real_time_areas:
+            data = await self.get_real_time_data_async(data_type)
+            return self._area_view(data_type, data).get(area, data)
+
+        if area and data_type in AREA_DATA_TYPES:
+            if self.real_time_cache.is_fresh(data_type):
+                return self._get_area_real_time_data(data_type, area)
+            data = await self.real_time_cache.get_async(
+                (data_type, area),
+                lambda: self._fetch_real_time_data_async(data_type, area),
+            )
+            return self._area_result(data_type, area, data)
+
+        data = await self.real_time_cache.get_async(
+            data_type, lambda: self._fetch_real_time_data_async(data_type)
+        )
+        if data is None:
+            return self._fallback_real_time_data(data_type)
+        return data
+
+    async def get_real_time_snapshot_async(self):
+        """
+        Asynchronous get_real_time_snapshot for async routes
+
+        Missing data types are fetched concurrently, as in the synchronous
+        version, without holding a thread.
+        """
+        values = await asyncio.gather(
+            *(
+                self.get_real_time_data_async(data_type)
+                for data_type in REAL_TIME_DATA_TYPES
+            )
+        )
+        return self._snapshot_of(dict(zip(REAL_TIME_DATA_TYPES, values)))
+
+    async def _fetch_real_time_data_async(self, data_type, area=None):
+        """Asynchronous _fetch_real_time_data, run on the Gemini client's loop"""
+        prompt, system_content = self._real_time_prompt(data_type, area)
+        try:
+            data = await self.gemini_api.run_async(
+                self.gemini_api.get_real_time_data_async(
+                    data_type, prompt, system_content
+                )
+            )
+        except Exception:
+            return None
+        return self._valid_real_time_data(data)
 
+    def _fetch_real_time_data(self, data_type, area=None):
+        """
+        Fetch one type of real-time data from the Gemini API, bypassing the cache
+
+        Returns:
+        - Dictionary with the data, or None if the API call failed
+        """
+        prompt, system_content = self._real_time_prompt(data_type, area)
+        try:
+            data = self.gemini_api.get_real_time_data(data_type, prompt, system_content)
+        except Exception:
+            return None
+        return self._valid_real_time_data(data)
+
+    def _fetch_real_time_data_many(self, data_types):
+        """
+        Fetch several types of city-wide real-time data concurrently
+
+        Returns:
+        - Dictionary of data type -> data, or None where the API call failed
+        """
+        pending = [
+            (data_type, *self._real_time_prompt(data_type)) for data_type in data_types
+        ]
+        try:
+            results = self.gemini_api.get_real_time_data_many(pending)
+        except Exception:
+            results = [None] * len(pending)
+        return {
+            data_type: self._valid_real_time_data(data)
+            for data_type, data in zip(data_types, results)
+        }
+
+    @staticmethod
+    def _valid_real_time_data(data):
+        """Return API data, or None if it is missing or an error"""
+        if not data or not isinstance(data, dict) or "error" in data:
+            return None
+        return data
+
+    def _real_time_prompt(self, data_type, area=None):
+        """Build the (prompt, system_content) pair for a real-time data request"""
         # Prepare the prompt based on data type
         if data_type == "traffic":
             prompt = (
@@ -985,45 +1146,79 @@ class DeliveryPredictor:
             prompt = "What's the current weather in Ahmedabad, India? Include temperature, precipitation chance, and any weather warnings."
             if area:
                 prompt = f"What's the current weather in {area}, Ahmedabad, India? Include temperature, precipitation chance, and any weather warnings."
-        elif data_type == "festivals":
-            prompt = "Are there any festivals, events, or public gatherings happening today or this week in Ahmedabad, India that might affect traffic or delivery schedules?"
         else:
-            return {"error": "Invalid data type requested"}
+            prompt = "Are there any festivals, events, or public gatherings happening today or this week in Ahmedabad, India that might affect traffic or delivery schedules?"
 
         # System prompt for structured output
         system_content = "You are an AI assistant providing factual, real-time information in JSON format. For traffic data, rate congestion on a scale of 1-10 and provide estimated delay times. For weather, provide temperature, conditions, precipitation chance, and any warnings. For festivals, list events with locations, times, and expected crowd sizes."
 
-        try:
-            # Get data from Gemini API
-            data = self.gemini_api.get_real_time_data(data_type, prompt, system_content)
+        return prompt, system_content
 
-            if not data or not isinstance(data, dict) or "error" in data:
-                # Fall back to mock data if there's an error
-                return self._generate_mock_real_time_data(data_type, area)
+    def start_real_time_refresher(self, poll_interval=DEFAULT_POLL_INTERVAL):
+        """
+        Keep the real-time data cache warm from a background thread
 
-            # Update cache
-            self.real_time_data_cache[data_type] = {
-                "data": data,
-                "timestamp": datetime.now(),
-            }
+        Each data type is re-fetched before it expires, so requests are served
+        from memory. Does nothing when the Gemini API is not configured.
 
-            # If area is specified and exists in data, return only that area's data
-            if (
-                area
-                and data_type in ["traffic", "weather"]
-                and isinstance(data, dict)
-                and area in data
-            ):
-                return data[area]
+        Returns:
+        - The running BackgroundRefresher, or None
+        """
+        if not self.gemini_api.is_configured:
+            return None
+        if self.real_time_refresher is None:
+            self.real_time_refresher = BackgroundRefresher(
+                self.real_time_cache,
+                {
+                    data_type: partial(self._fetch_real_time_data, data_type)
+                    for data_type in REAL_TIME_DATA_TYPES
+                },
+                poll_interval=poll_interval,
+                # Due data types are fetched concurrently in one batch
+                fetch_many=self._fetch_real_time_data_many,
+            )
+        self.real_time_refresher.start()
+        return self.real_time_refresher
+
+    def stop_real_time_refresher(self):
+        """Stop the background refresher started by start_real_time_refresher"""
+        if self.real_time_refresher is not None:
+            self.real_time_refresher.stop()
 
-            return data
+    def get_real_time_cache_age(self):
+        """
+        Age of the cached real-time data
+
+        Returns:
+        - Dictionary of data type -> seconds since it was fetched (None if not cached)
+        """
+        ages = {}
+        for data_type in REAL_TIME_DATA_TYPES:
+            age = self.real_time_cache.age(data_type)
+            ages[data_type] = None if age is None else round(age, 1)
+        return ages
+
+    def get_metrics(self):
+        """
+        Runtime metrics for the /metrics endpoint
 
-        except Exception as e:
-            # Fall back to mock data on any error
-            return self._generate_mock_real_time_data(data_type, area)
+        Returns:
+        - Dictionary with the Gemini API circuit breaker state and counts, the
+          age of the cached real-time data and the prediction cache hit rate
+        """
+        return {
+            "gemini_circuit_breaker": self.gemini_api.circuit_breaker.metrics(),
+            "real_time_cache_age": self.get_real_time_cache_age(),
+            "prediction_cache": self.prediction_cache.metrics(),
+        }
 
     def _generate_mock_real_time_data(self, data_type, area=None):
-        """Generate mock real-time data when API is unavailable"""
+        """
+        Generate mock real-time data when API is unavailable
+
+        Values are drawn from self.mock_random, so a predictor created with a
+        mock_seed generates the same data every time.
+        """
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
         if data_type == "traffic":
@@ -1113,11 +1308,11 @@ class DeliveryPredictor:
             total_congestion = 0
             areas_count = 0
 
-            for area, base in base_congestion.items():
-                modifier = modifiers.get(area, 1.0)
+            for area_name, base in base_congestion.items():
+                modifier = modifiers.get(area_name, 1.0)
                 # Apply modifier and add small random variation
                 congestion = min(
-                    10, max(1, round(base * modifier + random.uniform(-0.5, 0.5)))
+                    10, max(1, round(base * modifier + self.mock_random.uniform(-0.5, 0.5)))
                 )
 
                 # Calculate delay based on congestion (exponential relationship)
@@ -1137,41 +1332,41 @@ class DeliveryPredictor:
 
                 # Define peak areas based on the actual area
                 peak_areas = []
-                if area == "Satellite":
+                if area_name == "Satellite":
                     peak_areas = [
                         "Shrivranjani Junction",
                         "Iscon Cross Roads",
                         "Jodhpur Crossroad",
                     ]
-                elif area == "Navrangpura":
+                elif area_name == "Navrangpura":
                     peak_areas = [
                         "Law Garden",
                         "Gujarat College",
                         "Navrangpura Bus Station",
                     ]
-                elif area == "Bopal":
+                elif area_name == "Bopal":
                     peak_areas = ["Bopal Circle", "South Bopal"]
-                elif area == "Vastrapur":
+                elif area_name == "Vastrapur":
                     peak_areas = ["Vastrapur Lake", "Alpha Mall", "Mansi Circle"]
-                elif area == "Paldi":
+                elif area_name == "Paldi":
                     peak_areas = ["Paldi Cross Roads", "Ellis Bridge"]
-                elif area == "Thaltej":
+                elif area_name == "Thaltej":
                     peak_areas = ["Thaltej Junction", "Drive-In Road", "SG Highway"]
-                elif area == "Bodakdev":
+                elif area_name == "Bodakdev":
                     peak_areas = [
                         "Rajpath Club Road",
                         "Science City Road",
                         "Judges Bungalow Road",
                     ]
-                elif area == "Gota":
+                elif area_name == "Gota":
                     peak_areas = ["Gota Flyover", "Gota Chokdi"]
-                elif area == "Maninagar":
+                elif area_name == "Maninagar":
                     peak_areas = ["Maninagar Railway Station", "Bhulabhai Cross Road"]
-                elif area == "Chandkheda":
+                elif area_name == "Chandkheda":
                     peak_areas = ["Chandkheda Bus Stand", "Sabarmati Railway Station"]
 
                 # Add to traffic data
-                traffic_data[area] = {
+                traffic_data[area_name] = {
                     "congestion_level": congestion,
                     "delay_minutes": delay,
                     "status": status,
@@ -1202,12 +1397,6 @@ class DeliveryPredictor:
                 traffic_data["overall_city_congestion"] = overall_congestion
                 traffic_data["status"] = overall_status
 
-            # Update cache
-            self.real_time_data_cache["traffic"] = {
-                "data": traffic_data,
-                "timestamp": datetime.now(),
-            }
-
             if area and area in traffic_data:
                 return traffic_data[area]
             return traffic_data
@@ -1223,16 +1412,16 @@ class DeliveryPredictor:
             if 3 <= current_month <= 6:
                 temp_range = (29, 33)
                 humidity_range = (10, 25)
-                precip_chance = random.randint(0, 10)
-                conditions = random.choice(["Clear", "Sunny", "Hot", "Very Hot"])
+                precip_chance = self.mock_random.randint(0, 10)
+                conditions = self.mock_random.choice(["Clear", "Sunny", "Hot", "Very Hot"])
                 is_rainy = False
 
             # Monsoon months (July-September): Hot and humid with rain
             elif 7 <= current_month <= 9:
                 temp_range = (27, 32)
                 humidity_range = (60, 85)
-                precip_chance = random.randint(30, 90)
-                conditions = random.choice(
+                precip_chance = self.mock_random.randint(30, 90)
+                conditions = self.mock_random.choice(
                     ["Rainy", "Thunderstorms", "Overcast", "Partly Cloudy"]
                 )
                 is_rainy = precip_chance > 40
@@ -1241,23 +1430,23 @@ class DeliveryPredictor:
             elif current_month in [11, 12, 1, 2]:
                 temp_range = (15, 25)
                 humidity_range = (30, 50)
-                precip_chance = random.randint(0, 15)
-                conditions = random.choice(["Clear", "Sunny", "Mild", "Pleasant"])
+                precip_chance = self.mock_random.randint(0, 15)
+                conditions = self.mock_random.choice(["Clear", "Sunny", "Mild", "Pleasant"])
                 is_rainy = False
 
             # October: Transitional month
             else:
                 temp_range = (25, 30)
                 humidity_range = (40, 60)
-                precip_chance = random.randint(10, 30)
-                conditions = random.choice(
+                precip_chance = self.mock_random.randint(10, 30)
+                conditions = self.mock_random.choice(
                     ["Partly Cloudy", "Mostly Sunny", "Pleasant"]
                 )
                 is_rainy = precip_chance > 70
 
             # Actual current temperature from weather.com (31°C)
             current_temp = 31
-            feels_like = current_temp + random.randint(0, 2)
+            feels_like = current_temp + self.mock_random.randint(0, 2)
 
             weather_data = {
                 "temperature": {
@@ -1270,10 +1459,10 @@ class DeliveryPredictor:
                     "chance": precip_chance,
                     "type": "Rain" if is_rainy else "None",
                 },
-                "humidity": random.randint(humidity_range[0], humidity_range[1]),
+                "humidity": self.mock_random.randint(humidity_range[0], humidity_range[1]),
                 "wind": {
-                    "speed": random.randint(5, 15),
-                    "direction": random.choice(
+                    "speed": self.mock_random.randint(5, 15),
+                    "direction": self.mock_random.choice(
                         ["N", "NE", "E", "SE", "S", "SW", "W", "NW"]
                     ),
                     "units": "km/h",
@@ -1293,12 +1482,6 @@ class DeliveryPredictor:
             # Set warnings
             weather_data["warnings"] = warnings
 
-            # Update cache
-            self.real_time_data_cache["weather"] = {
-                "data": weather_data,
-                "timestamp": datetime.now(),
-            }
-
             return weather_data
 
         elif data_type == "festivals":
@@ -1306,13 +1489,13 @@ class DeliveryPredictor:
             today = datetime.now().strftime("%Y-%m-%d")
 
             # 30% chance of having a festival today
-            has_festival_today = random.random() < 0.3
+            has_festival_today = self.mock_random.random() < 0.3
 
             festivals = []
             if has_festival_today:
                 festivals.append(
                     {
-                        "name": random.choice(
+                        "name": self.mock_random.choice(
                             [
                                 "Navratri Celebrations",
                                 "Uttarayan Kite Festival",
@@ -1324,8 +1507,8 @@ class DeliveryPredictor:
                             ]
                         ),
                         "date": today,
-                        "time": f"{random.randint(9, 18):02d}:00 - {random.randint(19, 23):02d}:00",
-                        "location": random.choice(
+                        "time": f"{self.mock_random.randint(9, 18):02d}:00 - {self.mock_random.randint(19, 23):02d}:00",
+                        "location": self.mock_random.choice(
                             [
                                 "Riverfront",
                                 "Old City",
@@ -1335,13 +1518,13 @@ class DeliveryPredictor:
                                 "Law Garden",
                             ]
                         ),
-                        "crowd_size": random.choice(
+                        "crowd_size": self.mock_random.choice(
                             ["Small", "Medium", "Large", "Very Large"]
                         ),
-                        "traffic_impact": random.choice(
+                        "traffic_impact": self.mock_random.choice(
                             ["Low", "Moderate", "High", "Severe"]
                         ),
-                        "affected_areas": random.sample(
+                        "affected_areas": self.mock_random.sample(
                             [
                                 "Satellite",
                                 "Navrangpura",
@@ -1349,18 +1532,18 @@ class DeliveryPredictor:
                                 "Maninagar",
                                 "Old City",
                             ],
-                            k=random.randint(1, 3),
+                            k=self.mock_random.randint(1, 3),
                         ),
                     }
                 )
 
             # Add a future festival
             future_date = (
-                datetime.now() + timedelta(days=random.randint(1, 7))
+                datetime.now() + timedelta(days=self.mock_random.randint(1, 7))
             ).strftime("%Y-%m-%d")
             festivals.append(
                 {
-                    "name": random.choice(
+                    "name": self.mock_random.choice(
                         [
                             "Weekend Market",
                             "Cultural Show",
@@ -1370,8 +1553,8 @@ class DeliveryPredictor:
                         ]
                     ),
                     "date": future_date,
-                    "time": f"{random.randint(10, 16):02d}:00 - {random.randint(18, 22):02d}:00",
-                    "location": random.choice(
+                    "time": f"{self.mock_random.randint(10, 16):02d}:00 - {self.mock_random.randint(18, 22):02d}:00",
+                    "location": self.mock_random.choice(
                         [
                             "Exhibition Center",
                             "City Center",
@@ -1380,11 +1563,11 @@ class DeliveryPredictor:
                             "Convention Center",
                         ]
                     ),
-                    "crowd_size": random.choice(["Small", "Medium", "Large"]),
-                    "traffic_impact": random.choice(["Low", "Moderate", "High"]),
-                    "affected_areas": random.sample(
+                    "crowd_size": self.mock_random.choice(["Small", "Medium", "Large"]),
+                    "traffic_impact": self.mock_random.choice(["Low", "Moderate", "High"]),
+                    "affected_areas": self.mock_random.sample(
                         ["Satellite", "Vastrapur", "Bodakdev", "Navrangpura"],
-                        k=random.randint(1, 2),
+                        k=self.mock_random.randint(1, 2),
                     ),
                 }
             )
@@ -1395,12 +1578,6 @@ class DeliveryPredictor:
                 "timestamp": timestamp,
             }
 
-            # Update cache
-            self.real_time_data_cache["festivals"] = {
-                "data": festival_data,
-                "timestamp": datetime.now(),
-            }
-
             return festival_data
 
         return {"error": "Invalid data type requested"}
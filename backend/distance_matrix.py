@@ -0,0 +1,219 @@
+"""
+Area-to-area driving distances for route planning.
+
+The mock distance table is loaded once into symmetric NumPy matrices indexed
+by area id, and customer addresses are mapped to area ids up front, so a
+single lookup is plain array indexing and a whole route matrix is one
+fancy-indexing gather.
+
+Pairs the table does not cover are estimated from coordinates instead:
+``haversine_matrix`` computes every great-circle distance between a set of
+stops in one broadcast, and ``estimate_driving`` turns those into road
+distances and durations.
+"""
+
+import numpy as np
+
+# Mock driving distance (km) and duration (mins) between pairs of areas
+AREA_DISTANCES = {
+    ("Satellite", "Bopal"): (7.5, 15),
+    ("Satellite", "Vastrapur"): (3.2, 10),
+    ("Satellite", "Paldi"): (6.1, 12),
+    ("Satellite", "Thaltej"): (5.3, 11),
+    ("Satellite", "Navrangpura"): (4.8, 14),
+    ("Satellite", "Bodakdev"): (4.1, 9),
+    ("Satellite", "Gota"): (10.2, 22),
+    ("Satellite", "Maninagar"): (12.5, 28),
+    ("Satellite", "Chandkheda"): (14.0, 30),
+    ("Bopal", "Vastrapur"): (8.3, 18),
+    ("Bopal", "Paldi"): (9.5, 20),
+    ("Bopal", "Thaltej"): (6.7, 14),
+    ("Bopal", "Navrangpura"): (9.0, 19),
+    ("Bopal", "Bodakdev"): (7.2, 16),
+    ("Bopal", "Gota"): (8.8, 19),
+    ("Bopal", "Maninagar"): (15.3, 35),
+    ("Bopal", "Chandkheda"): (17.2, 40),
+    ("Vastrapur", "Paldi"): (5.4, 11),
+    ("Vastrapur", "Thaltej"): (4.2, 9),
+    ("Vastrapur", "Navrangpura"): (3.1, 7),
+    ("Vastrapur", "Bodakdev"): (2.5, 6),
+    ("Vastrapur", "Gota"): (9.3, 20),
+    ("Vastrapur", "Maninagar"): (11.2, 25),
+    ("Vastrapur", "Chandkheda"): (13.5, 30),
+    ("Paldi", "Thaltej"): (8.3, 18),
+    ("Paldi", "Navrangpura"): (4.2, 9),
+    ("Paldi", "Bodakdev"): (7.4, 15),
+    ("Paldi", "Gota"): (12.5, 25),
+    ("Paldi", "Maninagar"): (6.3, 14),
+    ("Paldi", "Chandkheda"): (15.1, 35),
+    ("Thaltej", "Navrangpura"): (5.5, 12),
+    ("Thaltej", "Bodakdev"): (2.8, 6),
+    ("Thaltej", "Gota"): (6.1, 13),
+    ("Thaltej", "Maninagar"): (14.2, 30),
+    ("Thaltej", "Chandkheda"): (11.3, 24),
+    ("Navrangpura", "Bodakdev"): (4.6, 10),
+    ("Navrangpura", "Gota"): (10.8, 22),
+    ("Navrangpura", "Maninagar"): (8.5, 18),
+    ("Navrangpura", "Chandkheda"): (11.2, 25),
+    ("Bodakdev", "Gota"): (7.5, 16),
+    ("Bodakdev", "Maninagar"): (13.1, 28),
+    ("Bodakdev", "Chandkheda"): (12.3, 26),
+    ("Gota", "Maninagar"): (18.5, 40),
+    ("Gota", "Chandkheda"): (9.2, 20),
+    ("Maninagar", "Chandkheda"): (19.6, 45),
+}
+
+# Travel within a single area
+SAME_AREA_DISTANCE = 1.5
+SAME_AREA_DURATION = 5
+# Used when either end has no known area or the pair is missing from the table
+DEFAULT_DISTANCE = 10
+DEFAULT_DURATION = 20
+
+# Area id for locations whose area is unknown (the last row and column)
+UNKNOWN_AREA = -1
+
+# Driving estimates from coordinates: road distance is about 1.3 times the
+# straight-line distance within the city, driven at an average 25 km/h
+EARTH_RADIUS_KM = 6371.0
+ROAD_FACTOR = 1.3
+AVERAGE_SPEED_KMH = 25
+
+
+class AreaDistanceMatrix:
+    """
+    Symmetric distance and duration matrices indexed by area id.
+
+    One extra row and column at index ``UNKNOWN_AREA`` hold the default values
+    for locations without a known area. ``known`` marks the cells that come
+    from real data rather than the default.
+    """
+
+    def __init__(self, area_distances=AREA_DISTANCES, extra_areas=()):
+        """
+        Load the distance table into matrices.
+
+        Args:
+            area_distances (dict): (area, area) -> (distance km, duration mins).
+            extra_areas (iterable): Areas that are not in the table but should
+                still get an id, so travel within them counts as same-area.
+        """
+        areas = [area for pair in area_distances for area in pair] + list(extra_areas)
+        self.areas = list(dict.fromkeys(areas))
+        self.area_ids = {area: i for i, area in enumerate(self.areas)}
+
+        size = len(self.areas) + 1
+        self.distances = np.full((size, size), DEFAULT_DISTANCE, dtype=np.float64)
+        self.durations = np.full((size, size), DEFAULT_DURATION, dtype=np.int64)
+        self.known = np.zeros((size, size), dtype=bool)
+
+        for (area1, area2), (distance, duration) in area_distances.items():
+            i, j = self.area_ids[area1], self.area_ids[area2]
+            self.distances[i, j] = self.distances[j, i] = distance
+            self.durations[i, j] = self.durations[j, i] = duration
+            self.known[i, j] = self.known[j, i] = True
+
+        same_area = np.arange(len(self.areas))
+        self.distances[same_area, same_area] = SAME_AREA_DISTANCE
+        self.durations[same_area, same_area] = SAME_AREA_DURATION
+        self.known[same_area, same_area] = True
+
+    def area_id(self, area):
+        """Id of an area, or ``UNKNOWN_AREA`` if it has none."""
+        return self.area_ids.get(area, UNKNOWN_AREA)
+
+    def lookup(self, origin_id, destination_id):
+        """
+        Driving distance between two area ids.
+
+        Returns:
+            dict: distance, duration and their text forms.
+        """
+        if not self.known[origin_id, destination_id]:
+            return format_distance(DEFAULT_DISTANCE, DEFAULT_DURATION)
+        return format_distance(
+            float(self.distances[origin_id, destination_id]),
+            int(self.durations[origin_id, destination_id]),
+        )
+
+    def gather(self, origin_ids, destination_ids):
+        """
+        Distances and durations for every (origin, destination) pair.
+
+        Args:
+            origin_ids (ndarray): Area id of each row location.
+            destination_ids (ndarray): Area id of each column location.
+
+        Returns:
+            tuple: (distances, durations, known) matrices of shape
+            (len(origin_ids), len(destination_ids)).
+        """
+        rows = np.asarray(origin_ids, dtype=np.intp)[:, None]
+        cols = np.asarray(destination_ids, dtype=np.intp)[None, :]
+        return self.distances[rows, cols], self.durations[rows, cols], self.known[rows, cols]
+
+
+def format_distance(distance, duration):
+    """Build the distance dict returned by ``get_driving_distance``."""
+    return {
+        "distance": distance,
+        "duration": duration,
+        "text_distance": f"{distance} km",
+        "text_duration": f"{duration} mins",
+    }
+
+
+def haversine_matrix(lats, lons):
+    """
+    Great-circle distance between every pair of points.
+
+    Args:
+        lats (array-like): Latitude of each point in degrees.
+        lons (array-like): Longitude of each point in degrees.
+
+    Returns:
+        ndarray: Symmetric (n, n) matrix of distances in km.
+    """
+    lats = np.radians(np.asarray(lats, dtype=np.float64))
+    lons = np.radians(np.asarray(lons, dtype=np.float64))
+    dlat = lats[:, None] - lats[None, :]
+    dlon = lons[:, None] - lons[None, :]
+    a = (
+        np.sin(dlat / 2) ** 2
+        + np.cos(lats)[:, None] * np.cos(lats)[None, :] * np.sin(dlon / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def estimate_driving(straight_km):
+    """
+    Driving distances and durations estimated from straight-line distances.
+
+    Args:
+        straight_km (ndarray): Straight-line distances in km.
+
+    Returns:
+        tuple: (distances in km rounded to 0.1, durations in whole minutes
+        of at least ``SAME_AREA_DURATION``), both shaped like the input.
+    """
+    distances = np.round(straight_km * ROAD_FACTOR, 1)
+    durations = np.ceil(distances / AVERAGE_SPEED_KMH * 60).astype(np.int64)
+    return distances, np.maximum(durations, SAME_AREA_DURATION)
+
+
+def build_address_index(customer_addresses, customer_areas):
+    """
+    Map each customer address to the area of the first customer living there.
+
+    Args:
+        customer_addresses (dict): Customer name -> address.
+        customer_areas (dict): Customer name -> area.
+
+    Returns:
+        dict: Address -> area.
+    """
+    address_areas = {}
+    for name, address in customer_addresses.items():
+        if name in customer_areas:
+            address_areas.setdefault(address, customer_areas[name])
+    return address_areas
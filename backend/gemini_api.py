@@ -1,9 +1,12 @@
 import os
 import json
+import asyncio
 import logging
+import threading
+import time
 from datetime import datetime
-import requests
 from dotenv import load_dotenv
+from circuit_breaker import CircuitBreaker
 
 # Load environment variables
 load_dotenv()
@@ -17,21 +20,91 @@ except ImportError:
     )
     genai = None
 
+# Model used for every request
+MODEL_NAME = "gemini-1.5-flash"
+
+# Default limits for asynchronous requests
+DEFAULT_MAX_IN_FLIGHT = 4
+DEFAULT_TIMEOUT = 10.0
+
+# Default system prompt for real-time data requests
+REAL_TIME_SYSTEM_CONTENT = "You are an AI assistant providing factual, real-time information in JSON format. Return the data in a structured JSON format without any explanatory text."
+
+
+def parse_json_response(content):
+    """
+    Parse JSON from a model response, allowing for markdown code blocks.
+
+    Args:
+        content (str): Response text
+
+    Returns:
+        dict: Parsed data, or an error dictionary with the raw content
+    """
+    try:
+        # First, try to parse the entire content as JSON
+        return json.loads(content)
+    except json.JSONDecodeError:
+        # If direct parsing fails, try to extract JSON from code blocks
+        if "```json" in content and "```" in content.split("```json", 1)[1]:
+            json_str = content.split("```json", 1)[1].split("```", 1)[0]
+            return json.loads(json_str)
+        elif "```" in content and "```" in content.split("```", 1)[1]:
+            json_str = content.split("```", 1)[1].split("```", 1)[0]
+            return json.loads(json_str)
+        else:
+            # If all parsing attempts fail
+            return {
+                "error": "Failed to parse JSON from the response",
+                "raw_content": content,
+            }
+
 
 class GeminiAPI:
     """
     Wrapper class for interacting with Google's Gemini API
+
+    Model objects are created once per generation config and reused. Content
+    and real-time data can also be requested asynchronously: those requests
+    run on one background event loop, at most ``max_in_flight`` at a time and
+    each limited to ``timeout`` seconds, so several fetches take as long as
+    the slowest one rather than their sum, and async callers wait for them
+    without holding a thread.
+
+    Every request goes through a circuit breaker. While it is open, requests
+    fail immediately instead of waiting on an API that is down or slow, and
+    callers fall back to cached or mock data.
     """
 
-    def __init__(self, api_key=None):
+    def __init__(
+        self,
+        api_key=None,
+        max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+        timeout=DEFAULT_TIMEOUT,
+        circuit_breaker=None,
+    ):
         """
         Initialize the Gemini API with the provided API key.
 
         Args:
             api_key (str, optional): The Gemini API key. If not provided,
                                      it will be fetched from environment variables.
+            max_in_flight (int): Maximum concurrent asynchronous requests.
+            timeout (float): Seconds before a request is abandoned.
+            circuit_breaker (CircuitBreaker, optional): Breaker guarding the
+                API; a new one with default settings if not provided.
         """
         self.api_key = api_key or os.environ.get("GEMINI_API_KEY")
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        # Models by (temperature, top_p, max_output_tokens)
+        self._models = {}
+        self._models_lock = threading.Lock()
+        # Event loop thread for asynchronous requests, started on first use
+        self._loop = None
+        self._loop_lock = threading.Lock()
+        self._semaphore = None
 
         # Check if we can use the Gemini API
         if not genai:
@@ -47,6 +120,24 @@ class GeminiAPI:
             genai.configure(api_key=self.api_key)
             self.is_configured = True
 
+    def _model(self, temperature, top_p, max_tokens):
+        """Return the model for a generation config, creating it on first use."""
+        key = (temperature, top_p, max_tokens)
+        with self._models_lock:
+            model = self._models.get(key)
+            if model is None:
+                # Setup generation config using the proper GenerationConfig class
+                generation_config = genai.GenerationConfig(
+                    temperature=temperature,
+                    top_p=top_p,
+                    max_output_tokens=max_tokens,
+                )
+                model = genai.GenerativeModel(
+                    MODEL_NAME, generation_config=generation_config
+                )
+                self._models[key] = model
+        return model
+
     def generate_content(
         self,
         prompt,
@@ -72,33 +163,17 @@ class GeminiAPI:
         """
         if not self.is_configured or not genai:
             return None
+        if not self.circuit_breaker.allow_request():
+            logging.warning("Gemini API circuit is open; skipping content generation")
+            return None
 
+        start = time.perf_counter()
         try:
-            # Setup generation config using the proper GenerationConfig class
-            generation_config = genai.GenerationConfig(
-                temperature=temperature,
-                top_p=top_p,
-                max_output_tokens=max_tokens,
-            )
-
-            # Initialize the model (using gemini-1.5-flash as default model)
-            model = genai.GenerativeModel(
-                "gemini-1.5-flash", generation_config=generation_config
-            )
-
-            # Prepare the chat history
-            history = []
-            if chat_history:
-                for message in chat_history:
-                    role = message.get("role", "user")
-                    content = message.get("content", "")
-                    if role == "user":
-                        history.append({"role": "user", "parts": [content]})
-                    elif role == "assistant":
-                        history.append({"role": "model", "parts": [content]})
+            # Reuse the model for this config (gemini-1.5-flash)
+            model = self._model(temperature, top_p, max_tokens)
 
             # Start a chat session
-            chat = model.start_chat(history=history)
+            chat = model.start_chat(history=self._chat_history(chat_history))
 
             # If system content is provided, use it
             if system_content:
@@ -107,14 +182,102 @@ class GeminiAPI:
                 # This functionality might need adjustment based on Gemini's specific API
 
             # Generate content with the model
-            response = chat.send_message(prompt)
-
-            return response.text
+            response = chat.send_message(
+                prompt, request_options={"timeout": self.timeout}
+            )
+            text = response.text
+            self.circuit_breaker.record_success(time.perf_counter() - start)
+            return text
 
         except Exception as e:
+            self.circuit_breaker.record_failure(time.perf_counter() - start)
             logging.error(f"Error generating content with Gemini API: {str(e)}")
             return None
 
+    @staticmethod
+    def _chat_history(chat_history):
+        """Convert user/assistant messages into Gemini chat history."""
+        history = []
+        for message in chat_history or []:
+            role = message.get("role", "user")
+            content = message.get("content", "")
+            if role == "user":
+                history.append({"role": "user", "parts": [content]})
+            elif role == "assistant":
+                history.append({"role": "model", "parts": [content]})
+        return history
+
+    async def generate_content_async(
+        self,
+        prompt,
+        system_content=None,
+        chat_history=None,
+        temperature=0.2,
+        max_tokens=500,
+        top_p=0.9,
+    ):
+        """
+        Asynchronous version of ``generate_content``.
+
+        Waits for one of ``max_in_flight`` slots and gives up after
+        ``timeout`` seconds. Must run on the client's event loop (see
+        ``run_async``).
+
+        Returns:
+            str: Generated content, or None on error
+        """
+        if not self.is_configured or not genai:
+            return None
+
+        async with self._semaphore:
+            if not self.circuit_breaker.allow_request():
+                logging.warning("Gemini API circuit is open; skipping content generation")
+                return None
+            start = time.perf_counter()
+            try:
+                model = self._model(temperature, top_p, max_tokens)
+                chat = model.start_chat(history=self._chat_history(chat_history))
+                response = await asyncio.wait_for(
+                    chat.send_message_async(prompt), self.timeout
+                )
+                text = response.text
+            except asyncio.CancelledError:
+                self.circuit_breaker.record_failure(time.perf_counter() - start)
+                raise
+            except Exception as e:
+                self.circuit_breaker.record_failure(time.perf_counter() - start)
+                logging.error(f"Error generating content with Gemini API: {str(e)}")
+                return None
+            self.circuit_breaker.record_success(time.perf_counter() - start)
+            return text
+
+    def _real_time_chat(self, system_content):
+        """Start a chat primed to answer with structured JSON."""
+        # Use a lower temperature for more factual outputs
+        model = self._model(0.1, 0.9, 1024)
+
+        # Start a chat with the system instruction
+        return model.start_chat(
+            history=[
+                {"role": "user", "parts": [system_content or REAL_TIME_SYSTEM_CONTENT]},
+                {
+                    "role": "model",
+                    "parts": [
+                        "I'll provide structured JSON data without explanatory text."
+                    ],
+                },
+            ]
+        )
+
+    @staticmethod
+    def _real_time_message(prompt):
+        return f"{prompt} Return the data in a structured JSON format without any explanatory text."
+
+    @staticmethod
+    def _circuit_open_error(data_type):
+        logging.warning(f"Gemini API circuit is open; skipping {data_type} request")
+        return {"error": "API circuit open"}
+
     def get_real_time_data(self, data_type, prompt, system_content=None):
         """
         Fetch real-time data formatted as JSON.
@@ -129,67 +292,136 @@ class GeminiAPI:
         """
         if not self.is_configured or not genai:
             return None
+        if not self.circuit_breaker.allow_request():
+            return self._circuit_open_error(data_type)
 
+        start = time.perf_counter()
         try:
-            # Use a lower temperature for more factual outputs
-            generation_config = genai.GenerationConfig(
-                temperature=0.1,
-                top_p=0.9,
-                max_output_tokens=1024,
-            )
+            try:
+                chat = self._real_time_chat(system_content)
 
-            # Initialize the model
-            model = genai.GenerativeModel(
-                "gemini-1.5-flash", generation_config=generation_config
-            )
+                # Send the specific prompt to get real-time data
+                response = chat.send_message(
+                    self._real_time_message(prompt),
+                    request_options={"timeout": self.timeout},
+                )
+                text = response.text
+            except BaseException:
+                self.circuit_breaker.record_failure(time.perf_counter() - start)
+                raise
+            self.circuit_breaker.record_success(time.perf_counter() - start)
 
-            # Prepare system instruction to get structured JSON
-            json_system_content = (
-                system_content
-                or "You are an AI assistant providing factual, real-time information in JSON format. Return the data in a structured JSON format without any explanatory text."
-            )
+            # Try to parse JSON from the response (a malformed answer is not
+            # an API failure, so it does not count against the breaker)
+            return parse_json_response(text)
 
-            # Start a chat with the system instruction
-            chat = model.start_chat(
-                history=[
-                    {"role": "user", "parts": [json_system_content]},
-                    {
-                        "role": "model",
-                        "parts": [
-                            "I'll provide structured JSON data without explanatory text."
-                        ],
-                    },
-                ]
-            )
+        except Exception as e:
+            logging.error(f"Error getting real-time data with Gemini API: {str(e)}")
+            return {"error": f"API error: {str(e)}"}
 
-            # Send the specific prompt to get real-time data
-            response = chat.send_message(
-                f"{prompt} Return the data in a structured JSON format without any explanatory text."
-            )
+    async def get_real_time_data_async(self, data_type, prompt, system_content=None):
+        """
+        Asynchronous version of ``get_real_time_data``.
 
-            # Try to parse JSON from the response
-            try:
-                # First, try to parse the entire content as JSON
-                data = json.loads(response.text)
-                return data
-            except json.JSONDecodeError:
-                # If direct parsing fails, try to extract JSON from code blocks
-                content = response.text
-                if "```json" in content and "```" in content.split("```json", 1)[1]:
-                    json_str = content.split("```json", 1)[1].split("```", 1)[0]
-                    data = json.loads(json_str)
-                    return data
-                elif "```" in content and "```" in content.split("```", 1)[1]:
-                    json_str = content.split("```", 1)[1].split("```", 1)[0]
-                    data = json.loads(json_str)
-                    return data
-                else:
-                    # If all parsing attempts fail
-                    return {
-                        "error": "Failed to parse JSON from the response",
-                        "raw_content": content,
-                    }
+        Waits for one of ``max_in_flight`` slots and gives up after
+        ``timeout`` seconds. Must run on the client's event loop (see
+        ``get_real_time_data_many`` and ``run_async``).
 
+        Returns:
+            dict: JSON structured response or error dictionary
+        """
+        if not self.is_configured or not genai:
+            return None
+
+        try:
+            async with self._semaphore:
+                # Checked once a slot is free, so queued requests see the
+                # breaker open as soon as earlier ones have tripped it
+                if not self.circuit_breaker.allow_request():
+                    return self._circuit_open_error(data_type)
+                start = time.perf_counter()
+                try:
+                    chat = self._real_time_chat(system_content)
+                    response = await asyncio.wait_for(
+                        chat.send_message_async(self._real_time_message(prompt)),
+                        self.timeout,
+                    )
+                    text = response.text
+                except BaseException:
+                    self.circuit_breaker.record_failure(time.perf_counter() - start)
+                    raise
+                self.circuit_breaker.record_success(time.perf_counter() - start)
+            return parse_json_response(text)
+
+        except asyncio.TimeoutError:
+            logging.error(
+                f"Gemini API request for {data_type} timed out after {self.timeout}s"
+            )
+            return {"error": f"API timeout after {self.timeout}s"}
         except Exception as e:
             logging.error(f"Error getting real-time data with Gemini API: {str(e)}")
             return {"error": f"API error: {str(e)}"}
+
+    def _event_loop(self):
+        """Return the background event loop, starting it on first use."""
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever, name="gemini-api-loop", daemon=True
+                ).start()
+                # Created on the loop so it is bound to it
+                self._semaphore = asyncio.run_coroutine_threadsafe(
+                    self._make_semaphore(), loop
+                ).result()
+                self._loop = loop
+        return self._loop
+
+    async def _make_semaphore(self):
+        return asyncio.Semaphore(self.max_in_flight)
+
+    def run_async(self, coroutine):
+        """
+        Run one of this client's coroutines on its event loop.
+
+        For callers on another event loop, e.g. an async route: the caller
+        awaits the result without holding a thread, and cancelling the
+        returned future cancels the request.
+
+        Args:
+            coroutine: e.g. ``generate_content_async(...)``
+
+        Returns:
+            asyncio.Future: Result of the coroutine, on the caller's loop
+        """
+        return asyncio.wrap_future(
+            asyncio.run_coroutine_threadsafe(coroutine, self._event_loop())
+        )
+
+    def get_real_time_data_many(self, requests):
+        """
+        Fetch several kinds of real-time data concurrently.
+
+        Args:
+            requests (list): (data_type, prompt, system_content) tuples
+
+        Returns:
+            list: One result per request, as returned by ``get_real_time_data``
+        """
+        if not self.is_configured or not genai:
+            return [None] * len(requests)
+
+        async def fetch_all():
+            return await asyncio.gather(
+                *(self.get_real_time_data_async(*request) for request in requests)
+            )
+
+        future = asyncio.run_coroutine_threadsafe(fetch_all(), self._event_loop())
+        return future.result()
+
+    def close(self):
+        """Stop the background event loop, if it was started."""
+        with self._loop_lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._loop = None
@@ -0,0 +1,353 @@
+"""
+Geocoding of addresses through Nominatim, with caching.
+
+Addresses are normalized (case, whitespace, comma spacing) and looked up in
+an in-memory LRU cache, then in a SQLite file that survives restarts, before
+Nominatim is asked. Addresses Nominatim does not know are cached as misses
+for ``negative_ttl`` seconds, so they are not looked up again on every
+request; failed requests (timeouts, HTTP errors) are not cached at all.
+
+Upstream requests share one pooled ``requests.Session``, time out after
+``timeout`` seconds and are spaced at least ``min_interval`` seconds apart
+within a process, as the Nominatim usage policy asks (one request per
+second).
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+USER_AGENT = "DeliveryPredictionSystem/1.0"
+
+# Defaults, overridable from the app config (see README)
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_MIN_INTERVAL = 1.0
+DEFAULT_CACHE_SIZE = 1024
+DEFAULT_NEGATIVE_TTL = 24 * 3600
+
+# Largest number of addresses accepted by one batch request
+MAX_BATCH_SIZE = 50
+
+
+class InvalidResponse(requests.RequestException):
+    """Nominatim answered with a payload that is not a list of places."""
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS geocodes (
+    address TEXT PRIMARY KEY,
+    lat REAL,
+    lon REAL,
+    display_name TEXT,
+    fetched_at REAL NOT NULL
+);
+"""
+
+
+def normalize_address(address):
+    """
+    Cache key of an address.
+
+    "Near Jodhpur Cross Road ,Satellite" and "near jodhpur cross road,
+    satellite" are the same address.
+
+    Args:
+        address (str): Address as entered.
+
+    Returns:
+        str: Lower-case address with single spaces and ", " between parts.
+    """
+    address = re.sub(r"\s*,\s*", ", ", " ".join(address.split()).lower())
+    return address.strip(", ")
+
+
+class RateLimiter:
+    """Spaces calls at least ``min_interval`` seconds apart across threads."""
+
+    def __init__(self, min_interval, clock=time.monotonic, sleep=time.sleep):
+        self.min_interval = min_interval
+        self.clock = clock
+        self.sleep = sleep
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Block until the next call may be made, and reserve that slot."""
+        with self._lock:
+            now = self.clock()
+            slot = max(now, self._next)
+            self._next = slot + self.min_interval
+        if slot > now:
+            self.sleep(slot - now)
+
+
+class GeocodeStore:
+    """
+    Persistent geocode results in a SQLite file.
+
+    Misses are stored with NULL coordinates. Each thread (and each forked
+    worker process) gets its own connection, as in ``OrderStore``.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Path to the SQLite database file.
+        """
+        self.path = path
+        self._local = threading.local()
+        self._pid = os.getpid()
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self):
+        """Return this thread's connection, opening it on first use."""
+        if self._pid != os.getpid():
+            self._local = threading.local()
+            self._pid = os.getpid()
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, key):
+        """
+        Stored result of a normalized address.
+
+        Returns:
+            tuple: (result or None for a miss, fetched_at), or None if the
+            address is not stored.
+        """
+        row = (
+            self._connection()
+            .execute(
+                "SELECT lat, lon, display_name, fetched_at FROM geocodes WHERE address = ?",
+                (key,),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None
+        lat, lon, display_name, fetched_at = row
+        if lat is None:
+            return None, fetched_at
+        return {"lat": lat, "lon": lon, "display_name": display_name}, fetched_at
+
+    def put(self, key, result, fetched_at):
+        """Store the result (None for a miss) of a normalized address."""
+        if result is None:
+            values = (key, None, None, None, fetched_at)
+        else:
+            values = (key, result["lat"], result["lon"], result["display_name"], fetched_at)
+        self._connection().execute(
+            "INSERT OR REPLACE INTO geocodes VALUES (?, ?, ?, ?, ?)", values
+        )
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM geocodes").fetchone()[0]
+
+
+class Geocoder:
+    """
+    Cached, rate-limited Nominatim client.
+
+    Results are dicts with lat, lon and display_name, or None for addresses
+    Nominatim does not know. Returned dicts are shared and must not be
+    modified.
+    """
+
+    def __init__(
+        self,
+        url=NOMINATIM_URL,
+        store_path=None,
+        cache_size=DEFAULT_CACHE_SIZE,
+        timeout=DEFAULT_TIMEOUT,
+        min_interval=DEFAULT_MIN_INTERVAL,
+        negative_ttl=DEFAULT_NEGATIVE_TTL,
+        clock=time.time,
+    ):
+        """
+        Args:
+            url (str): Nominatim search endpoint.
+            store_path (str): SQLite file for persistent results (None keeps
+                results in memory only).
+            cache_size (int): Results kept in memory.
+            timeout (float): Seconds before an upstream request is abandoned.
+            min_interval (float): Minimum seconds between upstream requests.
+            negative_ttl (float): Seconds a miss is cached.
+            clock (callable): Wall clock for cache ages, replaceable in tests.
+        """
+        self.url = url
+        self.store = GeocodeStore(store_path) if store_path else None
+        self.cache_size = cache_size
+        self.timeout = timeout
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+        self.rate_limiter = RateLimiter(min_interval)
+
+        # One connection pool for every upstream request
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=4))
+        self.session.mount("http://", HTTPAdapter(pool_maxsize=4))
+
+        # Normalized address -> (result or None, fetched_at), least recently used first
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        # One upstream lookup per address at a time: normalized address ->
+        # [lock, callers using it], dropped when the last caller is done
+        self._fetch_locks = {}
+        self._counts = {"hits": 0, "store_hits": 0, "misses": 0, "requests": 0}
+
+    def _valid(self, entry):
+        """Whether a cached (result, fetched_at) entry may still be served."""
+        result, fetched_at = entry
+        return result is not None or self.clock() - fetched_at < self.negative_ttl
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._cache[key] = entry
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def lookup(self, address):
+        """
+        Cached result of an address, without contacting Nominatim.
+
+        Returns:
+            tuple: (True, result or None) if cached, otherwise (False, None).
+        """
+        key = normalize_address(address)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and self._valid(entry):
+                self._cache.move_to_end(key)
+                self._counts["hits"] += 1
+                return True, entry[0]
+
+        if self.store is not None:
+            entry = self.store.get(key)
+            if entry is not None and self._valid(entry):
+                self._remember(key, entry)
+                with self._lock:
+                    self._counts["store_hits"] += 1
+                return True, entry[0]
+        return False, None
+
+    def geocode(self, address):
+        """
+        Coordinates of an address.
+
+        Args:
+            address (str): Address to look up.
+
+        Returns:
+            dict: lat, lon and display_name, or None if the address is unknown.
+
+        Raises:
+            requests.RequestException: Nominatim could not be reached,
+                returned an error or an unreadable answer; nothing is cached.
+        """
+        found, result = self.lookup(address)
+        if found:
+            return result
+
+        key = normalize_address(address)
+        with self._lock:
+            slot = self._fetch_locks.setdefault(key, [threading.Lock(), 0])
+            slot[1] += 1
+        try:
+            with slot[0]:
+                # Another thread may have looked it up while we waited
+                found, result = self.lookup(address)
+                if found:
+                    return result
+                with self._lock:
+                    self._counts["misses"] += 1
+                result = self._search(address)
+                entry = (result, self.clock())
+                self._remember(key, entry)
+                if self.store is not None:
+                    self.store.put(key, *entry)
+                return result
+        finally:
+            with self._lock:
+                slot[1] -= 1
+                if not slot[1]:
+                    del self._fetch_locks[key]
+
+    def geocode_many(self, addresses):
+        """
+        Geocode several addresses, looking each distinct address up once.
+
+        Addresses that normalize to the same key share one lookup, and the
+        upstream requests for uncached ones are made one after another at
+        the rate limit.
+
+        Args:
+            addresses (list): Addresses to look up.
+
+        Returns:
+            dict: Normalized address -> result dict, None if unknown, or an
+            exception if the lookup failed.
+        """
+        results = {}
+        for address in addresses:
+            key = normalize_address(address)
+            if key in results:
+                continue
+            try:
+                results[key] = self.geocode(address)
+            except requests.RequestException as e:
+                results[key] = e
+        return results
+
+    def _search(self, address):
+        """Ask Nominatim for an address (rate limited)."""
+        self.rate_limiter.wait()
+        with self._lock:
+            self._counts["requests"] += 1
+        response = self.session.get(
+            self.url,
+            params={"format": "json", "q": address, "limit": 1},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        try:
+            data = response.json()
+            if not data:
+                return None
+            result = data[0]
+            return {
+                "lat": float(result["lat"]),
+                "lon": float(result["lon"]),
+                "display_name": result["display_name"],
+            }
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            raise InvalidResponse(
+                f"Unexpected Nominatim response: {e!r}", response=response
+            ) from e
+
+    def metrics(self):
+        """
+        Cache statistics.
+
+        Returns:
+            dict: size, hits (memory), store_hits (SQLite), misses and
+            upstream requests.
+        """
+        with self._lock:
+            return {"size": len(self._cache), **self._counts}
+
+    def close(self):
+        """Close the pooled upstream connections."""
+        self.session.close()
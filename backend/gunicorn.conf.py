@@ -0,0 +1,48 @@
+"""
+Gunicorn settings for serving the API with several worker processes.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Settings can be overridden on the command line (e.g. ``-w 8``) or through
+the environment variables below.
+"""
+
+import gc
+import os
+
+bind = os.environ.get("BIND", "0.0.0.0:5002")
+workers = int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1))
+# Threads per worker; requests mostly wait on SQLite, Gemini or geocoding
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+timeout = 60
+
+# Build the app once in the master and fork the workers from it
+preload_app = True
+
+# No collections while the app is loaded, so its objects are not moved
+# around before they are frozen. With preload_app the app is loaded before
+# any server hook runs, so this has to happen when the settings are read;
+# when_ready turns collections back on in the master.
+gc.disable()
+
+
+def when_ready(server):
+    # The app is loaded: move everything allocated so far out of the
+    # collector's reach, so collections in the workers do not write to (and
+    # copy) shared pages, then collect normally again in the master
+    gc.freeze()
+    gc.enable()
+
+
+def pre_fork(server, worker):
+    # Also freeze what the master allocated since, e.g. before a worker is
+    # replaced
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Imported in the master already with preload_app, built here otherwise
+    import wsgi
+
+    wsgi.app.extensions["delivery"].start_background_tasks()
@@ -0,0 +1,302 @@
+"""
+Append-only order storage backed by a JSONL event log.
+
+Every order mutation is appended to the log as one JSON line, so a write
+costs the same no matter how many orders are stored. The current orders are
+kept in memory. Periodically the log is compacted: the current log is moved
+aside to a ``.1`` segment, new events go to a fresh log, and the orders are
+written to a snapshot file in a background thread, after which the segment
+is deleted. Startup loads the snapshot and replays the segment (if a
+compaction was interrupted) and the log.
+
+Events carry an increasing sequence number and the snapshot records the last
+one it includes, so an event is never applied twice. A partly written last
+line (from a crash during an append) is cut off on replay, and malformed
+lines are skipped.
+
+The log has the same interface as ``OrderStore`` and can be used in its place.
+It keeps its state in one process, so unlike the SQLite store it must not be
+shared between worker processes.
+"""
+
+import json
+import logging
+import os
+import threading
+
+from order_store import FIRST_ORDER_ID, normalize_order, timestamp
+
+# Write a snapshot and truncate the log after this many events
+DEFAULT_COMPACT_EVERY = 10000
+
+
+class OrderEventLog:
+    """
+    Order store that appends mutations to a JSONL log.
+
+    Events are ``{"seq": n, "event": "put", "order": {...}}`` for new or
+    replaced orders and ``{"seq": n, "event": "status", "order_id": id,
+    "status": s, "delivered_at": t}`` for status changes.
+    """
+
+    def __init__(self, path="orders.jsonl", compact_every=DEFAULT_COMPACT_EVERY, fsync=False):
+        """
+        Load the last snapshot, replay the log and open it for appending.
+
+        Args:
+            path (str): Path to the event log; the snapshot is stored next to
+                it with a ``.snapshot.json`` suffix.
+            compact_every (int): Events between automatic snapshots, or None
+                to only compact when ``compact`` is called.
+            fsync (bool): Force every event to disk before returning.
+        """
+        self.path = path
+        self.snapshot_path = os.path.splitext(path)[0] + ".snapshot.json"
+        self.segment_path = path + ".1"
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self._lock = threading.RLock()
+        self._orders = {}
+        self._max_order_id = FIRST_ORDER_ID - 1
+        self._seq = 0
+        self._events_since_snapshot = 0
+        self._compaction = None
+
+        self._load()
+        self._log = open(self.path, "a", encoding="utf-8")
+
+    def _load(self):
+        """Restore the orders from the snapshot and the log tail."""
+        snapshot_seq = 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            snapshot_seq = snapshot["last_seq"]
+            for order in snapshot["orders"]:
+                self._put(order)
+        self._seq = snapshot_seq
+
+        for path in (self.segment_path, self.path):
+            if os.path.exists(path):
+                self._replay(path)
+
+    def _replay(self, path):
+        """
+        Apply the events of one log file that the snapshot does not include.
+
+        Malformed lines are skipped. A last line without a newline was torn by
+        a crash during an append; it is cut off, so the next event starts on
+        a line of its own instead of being appended to the fragment.
+        """
+        complete = 0
+        with open(path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    logging.warning("Discarding incomplete event at the end of %s", path)
+                    break
+                complete += len(line)
+                try:
+                    event = json.loads(line)
+                    if event["seq"] <= self._seq:
+                        continue
+                    self._apply(event)
+                # Not JSON, not an event object, or a status change of an
+                # unknown order
+                except (json.JSONDecodeError, UnicodeDecodeError, KeyError, TypeError):
+                    logging.warning("Skipping malformed event in %s", path)
+                    continue
+                self._seq = event["seq"]
+                self._events_since_snapshot += 1
+
+        if complete < os.path.getsize(path):
+            with open(path, "r+b") as f:
+                f.truncate(complete)
+
+    def _put(self, order):
+        # Checked before storing, so a bad order id leaves nothing behind
+        self._max_order_id = max(self._max_order_id, order["order_id"])
+        self._orders[order["order_id"]] = order
+
+    def _apply(self, event):
+        """Apply one event to the in-memory orders."""
+        if event["event"] == "put":
+            self._put(event["order"])
+        elif event["event"] == "status":
+            order = dict(self._orders[event["order_id"]], status=event["status"])
+            if event.get("delivered_at"):
+                order["delivered_at"] = event["delivered_at"]
+            self._orders[event["order_id"]] = order
+
+    def _append(self, event):
+        """Apply an event and append it to the log."""
+        self._seq += 1
+        event = dict(event, seq=self._seq)
+        self._apply(event)
+
+        self._log.write(json.dumps(event) + "\n")
+        self._log.flush()
+        if self.fsync:
+            os.fsync(self._log.fileno())
+
+        self._events_since_snapshot += 1
+        if self.compact_every and self._events_since_snapshot >= self.compact_every:
+            compacting = self._compaction is not None and self._compaction.is_alive()
+            if not compacting:
+                self.compact(wait=False)
+
+    def compact(self, wait=True):
+        """
+        Snapshot every order and start a new, empty log.
+
+        Args:
+            wait (bool): Wait for the snapshot to be written; otherwise it is
+                written in a background thread.
+        """
+        with self._lock:
+            self.wait_for_compaction()
+
+            # Orders are replaced rather than modified in place, so a shallow
+            # copy stays consistent while the snapshot is written
+            orders = list(self._orders.values())
+            seq = self._seq
+
+            # Move the log aside; if an earlier compaction failed, keep its
+            # segment and add this log's events to it
+            self._log.close()
+            if os.path.exists(self.segment_path):
+                with open(self.path, "r", encoding="utf-8") as src, open(
+                    self.segment_path, "a", encoding="utf-8"
+                ) as dst:
+                    dst.write(src.read())
+                os.remove(self.path)
+            else:
+                os.replace(self.path, self.segment_path)
+            self._log = open(self.path, "a", encoding="utf-8")
+            self._events_since_snapshot = 0
+
+            self._compaction = threading.Thread(
+                target=self._write_snapshot, args=(orders, seq), daemon=True
+            )
+            self._compaction.start()
+
+        if wait:
+            self.wait_for_compaction()
+
+    def _write_snapshot(self, orders, seq):
+        temp_path = self.snapshot_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"last_seq": seq, "orders": orders}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.snapshot_path)
+        os.remove(self.segment_path)
+
+    def wait_for_compaction(self):
+        """Block until a background snapshot (if any) has been written."""
+        if self._compaction is not None:
+            self._compaction.join()
+
+    def close(self):
+        """Wait for any snapshot in progress and close the log file."""
+        with self._lock:
+            self.wait_for_compaction()
+            self._log.close()
+
+    def add(self, name, delivery_day, area, address, package_size, status="Pending"):
+        """
+        Add a new order with the next free order id.
+
+        Returns:
+            dict: The stored order.
+        """
+        with self._lock:
+            order = normalize_order(
+                {
+                    "order_id": self._max_order_id + 1,
+                    "name": name,
+                    "delivery_day": delivery_day,
+                    "area": area,
+                    "address": address,
+                    "package_size": package_size,
+                    "status": status,
+                    "created_at": timestamp(),
+                }
+            )
+            self._append({"event": "put", "order": order})
+        return dict(order)
+
+    def replace_all(self, orders):
+        """Replace every stored order with ``orders``."""
+        with self._lock:
+            self._orders = {}
+            self._max_order_id = FIRST_ORDER_ID - 1
+            for order in orders:
+                self._put(normalize_order(order))
+            self.compact()
+
+    def import_json(self, path):
+        """
+        Import orders from a ``pending_orders.json`` file.
+
+        Returns:
+            int: Number of orders imported.
+        """
+        with open(path, "r") as f:
+            orders = json.load(f)
+
+        with self._lock:
+            for order in orders:
+                self._append({"event": "put", "order": normalize_order(order)})
+        return len(orders)
+
+    def get(self, order_id):
+        """Return one order, or None if it does not exist."""
+        try:
+            order = self._orders.get(int(order_id))
+        except (TypeError, ValueError):
+            return None
+        return dict(order) if order else None
+
+    def all(self):
+        """Return every order in id order."""
+        with self._lock:
+            return [dict(self._orders[order_id]) for order_id in sorted(self._orders)]
+
+    def find(self, name=None, delivery_day=None, status=None):
+        """Return the orders matching every given filter, in id order."""
+        filters = {"name": name, "delivery_day": delivery_day, "status": status}
+        filters = {field: value for field, value in filters.items() if value is not None}
+        return [
+            order
+            for order in self.all()
+            if all(order[field] == value for field, value in filters.items())
+        ]
+
+    def update_status(self, order_id, status, delivered=False):
+        """
+        Set the status of an order.
+
+        Returns:
+            dict: The updated order, or None if it does not exist.
+        """
+        try:
+            order_id = int(order_id)
+        except (TypeError, ValueError):
+            return None
+
+        with self._lock:
+            if order_id not in self._orders:
+                return None
+            self._append(
+                {
+                    "event": "status",
+                    "order_id": order_id,
+                    "status": status,
+                    "delivered_at": timestamp() if delivered else None,
+                }
+            )
+            return dict(self._orders[order_id])
+
+    def count(self):
+        """Number of stored orders."""
+        return len(self._orders)
@@ -0,0 +1,203 @@
+"""
+In-memory view of the order store shared by the predictor and API routes.
+
+``OrderRepository`` loads every order once and keeps it in memory together
+with indexes by customer name, delivery day and status. Writes go to the
+``OrderStore`` first and then update the in-memory indexes for just the
+affected order, so reads never touch the database. Listeners can follow
+those same per-order updates to maintain their own derived views.
+
+When several worker processes share one database, each has its own
+repository; a shared repository compares the store's revision number with
+the last one it has seen before each read and reloads after writes made by
+other processes.
+"""
+
+import threading
+from collections import defaultdict
+
+# Order fields with a secondary index
+INDEXED_FIELDS = ("name", "delivery_day", "status")
+
+
+class OrderRepository:
+    """
+    Indexed, write-through cache of an ``OrderStore``.
+
+    All writes for a process should go through one repository so its view
+    stays current. Reads return copies, so callers can modify the returned
+    orders freely.
+    """
+
+    def __init__(self, store, shared=False):
+        """
+        Load every order from the store.
+
+        Args:
+            store (OrderStore): Persistent storage for the orders.
+            shared (bool): Other processes write to the same store; check for
+                their writes before each read.
+        """
+        if shared and not hasattr(store, "revision"):
+            raise ValueError(f"{type(store).__name__} cannot be shared between processes")
+        self.store = store
+        self.shared = shared
+        self._lock = threading.RLock()
+        self._listeners = []
+        self.reload()
+
+    def reload(self):
+        """Rebuild the in-memory orders and indexes from the store."""
+        with self._lock:
+            # Read before the orders, so a write in between triggers another reload
+            self._revision = self.store.revision() if self.shared else None
+            self._orders = {}
+            self._indexes = {field: defaultdict(dict) for field in INDEXED_FIELDS}
+            for order in self.store.all():
+                self._insert(order)
+            for listener in self._listeners:
+                listener.orders_reloaded(self.all())
+
+    def add_listener(self, listener):
+        """
+        Keep a listener informed of every change to the orders.
+
+        The listener's ``orders_reloaded(orders)`` is called now and after
+        every reload with copies of all orders, and ``order_changed(previous,
+        order)`` after each single-order write (``previous`` is None for a
+        new order). Calls are made while the repository lock is held, in the
+        order the writes happened.
+        """
+        with self._lock:
+            self._listeners.append(listener)
+            listener.orders_reloaded(self.all())
+
+    def sync(self):
+        """Reload if another process has written to a shared store."""
+        if self.shared:
+            with self._lock:
+                if self.store.revision() != self._revision:
+                    self.reload()
+
+    def _written(self):
+        """
+        Account for a write made through this repository.
+
+        Returns:
+            bool: False if writes by other processes were missed as well and
+            the repository was reloaded instead.
+        """
+        if not self.shared:
+            return True
+        if self.store.last_write_revision != self._revision + 1:
+            self.reload()
+            return False
+        self._revision += 1
+        return True
+
+    def _notify(self, previous, order):
+        for listener in self._listeners:
+            listener.order_changed(dict(previous) if previous else None, dict(order))
+
+    def _insert(self, order):
+        self._orders[order["order_id"]] = order
+        for field in INDEXED_FIELDS:
+            self._indexes[field][order[field]][order["order_id"]] = order
+
+    def _remove(self, order):
+        for field in INDEXED_FIELDS:
+            bucket = self._indexes[field][order[field]]
+            del bucket[order["order_id"]]
+            if not bucket:
+                del self._indexes[field][order[field]]
+
+    def __len__(self):
+        self.sync()
+        return len(self._orders)
+
+    def add(self, name, delivery_day, area, address, package_size):
+        """
+        Store a new order and add it to the indexes.
+
+        Returns:
+            dict: The new order, including its assigned ``order_id``.
+        """
+        with self._lock:
+            order = self.store.add(name, delivery_day, area, address, package_size)
+            if self._written():
+                self._insert(order)
+                self._notify(None, order)
+        return dict(order)
+
+    def replace_all(self, orders):
+        """Replace every order in the store and the indexes."""
+        with self._lock:
+            self.store.replace_all(orders)
+            self.reload()
+
+    def update_status(self, order_id, status, delivered=False):
+        """
+        Update the status of an order.
+
+        Args:
+            order_id (int or str): Order to update.
+            status (str): New status.
+            delivered (bool): Also record the delivery time.
+
+        Returns:
+            dict: The updated order, or None if it does not exist.
+        """
+        with self._lock:
+            updated = self.store.update_status(order_id, status, delivered)
+            if not self._written() or updated is None:
+                return dict(updated) if updated else None
+
+            previous = self._orders.get(updated["order_id"])
+            if previous is not None:
+                self._remove(previous)
+            self._insert(updated)
+            self._notify(previous, updated)
+        return dict(updated)
+
+    def get(self, order_id):
+        """Return one order, or None if it does not exist."""
+        self.sync()
+        try:
+            order = self._orders.get(int(order_id))
+        except (TypeError, ValueError):
+            return None
+        return dict(order) if order else None
+
+    def all(self):
+        """Return every order in id order."""
+        self.sync()
+        with self._lock:
+            return [dict(order) for order in self._orders.values()]
+
+    def find(self, name=None, delivery_day=None, status=None):
+        """
+        Return the orders matching every given filter, in id order.
+
+        Args:
+            name (str): Customer name.
+            delivery_day (str): Day of the week.
+            status (str): Order status, e.g. "Pending".
+        """
+        filters = {
+            field: value
+            for field, value in zip(INDEXED_FIELDS, (name, delivery_day, status))
+            if value is not None
+        }
+        if not filters:
+            return self.all()
+
+        self.sync()
+        with self._lock:
+            # Start from the smallest matching bucket and check the other filters
+            buckets = [self._indexes[field].get(value, {}) for field, value in filters.items()]
+            matches = [
+                dict(order)
+                for order in min(buckets, key=len).values()
+                if all(order[field] == value for field, value in filters.items())
+            ]
+        return sorted(matches, key=lambda order: order["order_id"])
@@ -0,0 +1,290 @@
+"""
+Persistent order storage backed by SQLite.
+
+Orders live in a single ``orders`` table with indexes on the columns the app
+filters by, so adding or updating an order touches one row instead of
+rewriting every order. The database runs in WAL mode so readers never block
+the writer, and each thread (and each forked worker process) gets its own
+connection. Writes run in ``BEGIN IMMEDIATE`` transactions, which serializes
+them across threads and worker processes, and each one increments a stored
+revision number so processes can tell when another one has written.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+# First id handed out when the store is empty
+FIRST_ORDER_ID = 10000
+
+# Order fields in the order they appear in the JSON shape
+ORDER_FIELDS = [
+    "order_id",
+    "name",
+    "delivery_day",
+    "area",
+    "address",
+    "package_size",
+    "status",
+    "created_at",
+    "delivered_at",
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    order_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    delivery_day TEXT NOT NULL,
+    area TEXT,
+    address TEXT,
+    package_size TEXT,
+    status TEXT NOT NULL DEFAULT 'Pending',
+    created_at TEXT,
+    delivered_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_orders_delivery_day ON orders (delivery_day);
+CREATE INDEX IF NOT EXISTS idx_orders_status ON orders (status);
+CREATE INDEX IF NOT EXISTS idx_orders_name ON orders (name);
+CREATE TABLE IF NOT EXISTS revision (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO revision VALUES (0, 0);
+"""
+
+
+def _row_to_order(row):
+    """Convert a database row into the order dict served by the API."""
+    order = dict(zip(ORDER_FIELDS, row))
+    if order["delivered_at"] is None:
+        del order["delivered_at"]
+    return order
+
+
+def _order_to_row(order):
+    """Convert an order dict into a row tuple, ignoring unknown keys."""
+    row = [order.get(field) for field in ORDER_FIELDS]
+    row[0] = int(row[0])
+    # Values may come from pandas/numpy, so store plain strings
+    return tuple(
+        value if value is None or i == 0 else str(value) for i, value in enumerate(row)
+    )
+
+
+def normalize_order(order):
+    """Return ``order`` in the stored shape: int id, string fields, known keys only."""
+    return _row_to_order(_order_to_row(order))
+
+
+def timestamp():
+    """Current time in the format used for ``created_at`` and ``delivered_at``."""
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+class OrderStore:
+    """
+    SQLite-backed order store.
+
+    Orders are returned as dicts with the same keys as the old
+    ``pending_orders.json`` entries; ``delivered_at`` is only present once an
+    order has been marked delivered or failed.
+    """
+
+    def __init__(self, path="orders.db"):
+        """
+        Open (and if needed create) the order database.
+
+        Args:
+            path (str): Path to the SQLite database file.
+        """
+        self.path = path
+        self._local = threading.local()
+        self._pid = os.getpid()
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self):
+        """Return this thread's connection, opening it on first use."""
+        if self._pid != os.getpid():
+            # Forked: connections opened by the parent must not be reused
+            self._local = threading.local()
+            self._pid = os.getpid()
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    @contextmanager
+    def _transaction(self):
+        """Run a block of writes in one immediate transaction."""
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+            connection.execute("UPDATE revision SET value = value + 1")
+            (revision,) = connection.execute("SELECT value FROM revision").fetchone()
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        self._local.revision = revision
+
+    def revision(self):
+        """Number of write transactions committed to the database so far."""
+        return self._connection().execute("SELECT value FROM revision").fetchone()[0]
+
+    @property
+    def last_write_revision(self):
+        """Revision after this thread's last write, or None before any write."""
+        return getattr(self._local, "revision", None)
+
+    def close(self):
+        """Close this thread's connection."""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def add(self, name, delivery_day, area, address, package_size, status="Pending"):
+        """
+        Add a new order with the next free order id.
+
+        Returns:
+            dict: The stored order.
+        """
+        with self._transaction() as connection:
+            (order_id,) = connection.execute(
+                "SELECT COALESCE(MAX(order_id) + 1, ?) FROM orders", (FIRST_ORDER_ID,)
+            ).fetchone()
+            row = _order_to_row(
+                {
+                    "order_id": order_id,
+                    "name": name,
+                    "delivery_day": delivery_day,
+                    "area": area,
+                    "address": address,
+                    "package_size": package_size,
+                    "status": status,
+                    "created_at": timestamp(),
+                }
+            )
+            connection.execute("INSERT INTO orders VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+        return _row_to_order(row)
+
+    def replace_all(self, orders):
+        """Replace every stored order with ``orders``."""
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM orders")
+            connection.executemany(
+                "INSERT INTO orders VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [_order_to_row(order) for order in orders],
+            )
+
+    def import_json(self, path):
+        """
+        Import orders from a ``pending_orders.json`` file.
+
+        Orders with an id that is already stored are overwritten.
+
+        Args:
+            path (str): Path to the JSON file (a list of order dicts).
+
+        Returns:
+            int: Number of orders imported.
+        """
+        with open(path, "r") as f:
+            orders = json.load(f)
+
+        with self._transaction() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO orders VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [_order_to_row(order) for order in orders],
+            )
+        return len(orders)
+
+    def get(self, order_id):
+        """Return one order, or None if it does not exist."""
+        try:
+            order_id = int(order_id)
+        except (TypeError, ValueError):
+            return None
+
+        row = (
+            self._connection()
+            .execute("SELECT * FROM orders WHERE order_id = ?", (order_id,))
+            .fetchone()
+        )
+        return _row_to_order(row) if row else None
+
+    def all(self):
+        """Return every order in id order."""
+        rows = self._connection().execute("SELECT * FROM orders ORDER BY order_id")
+        return [_row_to_order(row) for row in rows]
+
+    def find(self, name=None, delivery_day=None, status=None):
+        """
+        Return the orders matching every given filter, in id order.
+
+        Args:
+            name (str): Customer name.
+            delivery_day (str): Day of the week.
+            status (str): Order status, e.g. "Pending".
+        """
+        filters = {"name": name, "delivery_day": delivery_day, "status": status}
+        clauses = [f"{column} = ?" for column, value in filters.items() if value is not None]
+        params = [value for value in filters.values() if value is not None]
+
+        query = "SELECT * FROM orders"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        rows = self._connection().execute(query + " ORDER BY order_id", params)
+        return [_row_to_order(row) for row in rows]
+
+    def update_status(self, order_id, status, delivered=False):
+        """
+        Set the status of an order.
+
+        Args:
+            order_id (int or str): Order to update.
+            status (str): New status.
+            delivered (bool): Also record the current time as ``delivered_at``.
+
+        Returns:
+            dict: The updated order, or None if it does not exist.
+        """
+        try:
+            order_id = int(order_id)
+        except (TypeError, ValueError):
+            return None
+
+        with self._transaction() as connection:
+            if delivered:
+                cursor = connection.execute(
+                    "UPDATE orders SET status = ?, delivered_at = ? WHERE order_id = ?",
+                    (status, timestamp(), order_id),
+                )
+            else:
+                cursor = connection.execute(
+                    "UPDATE orders SET status = ? WHERE order_id = ?", (status, order_id)
+                )
+        return self.get(order_id) if cursor.rowcount else None
+
+    def count(self):
+        """Number of stored orders."""
+        return self._connection().execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import orders into the order store")
+    parser.add_argument("json_path", help="Path to pending_orders.json")
+    parser.add_argument("--db", default="orders.db", help="Order database path")
+    args = parser.parse_args()
+
+    imported = OrderStore(args.db).import_json(args.json_path)
+    print(f"Imported {imported} orders into {args.db}")
@@ -0,0 +1,83 @@
+"""
+Bounded LRU cache for delivery time predictions.
+
+A prediction depends only on the customer, the day, the current date and
+hour, the real-time snapshot and the success-rate tables. Keys include the
+snapshot version and the rate-table version, so a change to either makes the
+old entries unreachable; they are evicted as the least recently used once the
+cache is full.
+"""
+
+import threading
+from collections import OrderedDict
+
+# Default number of (name, day, ...) predictions kept
+DEFAULT_MAX_SIZE = 4096
+
+
+class PredictionCache:
+    """
+    Thread-safe least-recently-used cache with hit-rate statistics.
+
+    Cached values are shared between callers and must not be modified.
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE):
+        """
+        Args:
+            max_size (int): Maximum number of entries (0 disables caching).
+        """
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return the value of ``key`` and mark it recently used, or None."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store ``value``, evicting the least recently used entries if full."""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry (the statistics are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def metrics(self):
+        """
+        Cache size and hit statistics.
+
+        Returns:
+            dict: size, max_size, hits, misses, evictions and hit_rate.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            }
@@ -0,0 +1,363 @@
+"""
+Columnar success-rate aggregation for the historical delivery dataset.
+
+The dataset holds one row per delivery attempt. Instead of walking it row by
+row, the key columns are converted to categoricals and grouped on their codes,
+so the cost is a couple of vectorized passes over the data regardless of how
+many attempts there are. The resulting counts are stored in a dense
+``RateCube`` indexed by (customer, day, hour) for constant-time lookups.
+
+New delivery outcomes are folded into the cube one at a time with
+``RateCube.record``, optionally with exponential decay so recent outcomes
+outweigh old ones.
+"""
+
+import itertools
+import logging
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from time_slots import HOURS_PER_DAY, MISSING_HOUR, SLOT_LABELS, parse_hour, parse_hours
+
+# Dataset columns used as grouping keys
+NAME_COLUMN = "Name"
+DAY_COLUMN = "Day of Delivery Attempt"
+TIME_COLUMN = "Time"
+STATUS_COLUMN = "Delivery Status"
+
+# Canonical day order; days outside this list are appended as they are seen
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# Weight of the day-specific rate when blending it with the overall time rate
+DAY_TIME_WEIGHT = 0.7
+
+# With decay, counts are rescaled once outcome weights grow past this
+MAX_OUTCOME_WEIGHT = 1e100
+
+# Per-customer tables, grouped by what they hold
+COUNT_TABLES = (
+    "day_time_attempts",
+    "day_time_successes",
+    "day_attempts",
+    "day_successes",
+    "time_attempts",
+    "time_successes",
+)
+RATE_TABLES = ("day_time_rates", "day_rates", "time_rates")
+
+# Source of RateCube versions, unique across cubes
+_versions = itertools.count(1)
+
+
+def aggregate_success_counts(df):
+    """
+    Count attempts and successes per (name, day, time).
+
+    Args:
+        df (DataFrame): Delivery history with name, day, time and status columns.
+
+    Returns:
+        DataFrame: Indexed by (name, day, time) with integer ``attempts`` and
+        ``successes`` columns. Groups appear in order of first occurrence.
+    """
+    keys = pd.DataFrame(
+        {
+            "name": df[NAME_COLUMN].astype("category"),
+            "day": df[DAY_COLUMN].astype("category"),
+            "time": df[TIME_COLUMN].astype("category"),
+            "success": (df[STATUS_COLUMN] == "Success").astype("int64"),
+        }
+    )
+
+    return keys.groupby(["name", "day", "time"], observed=True, sort=False)[
+        "success"
+    ].agg(attempts="size", successes="sum")
+
+
+def rollup_counts(counts, levels):
+    """
+    Sum a (name, day, time) count table down to a subset of its index levels.
+
+    Args:
+        counts (DataFrame): Output of ``aggregate_success_counts``.
+        levels (list): Index levels to keep, e.g. ``["name", "day"]``.
+
+    Returns:
+        DataFrame: Count table indexed by ``levels``.
+    """
+    return counts.groupby(level=levels, observed=True, sort=False).sum()
+
+
+class RateCube:
+    """
+    Dense success-rate tables indexed by (customer, day, hour).
+
+    Names and days are interned to integer ids and time slots are indexed by
+    their hour, so a lookup is plain array indexing. Attempt and success counts
+    are kept beside the float32 rates; a cell with zero attempts has no data.
+
+    Counts are integers unless a decay half-life is set. With decay, each new
+    outcome is weighted by ``2 ** (age / half_life)`` relative to
+    ``decay_origin``; since rates are ratios of counts, this is the same as
+    halving the weight of all older outcomes every half-life, without having
+    to touch them.
+    """
+
+    def __init__(self, names, days, half_life_days=None):
+        """
+        Allocate empty tables for the given customers and days.
+
+        Args:
+            names (list): Customer names, one row per name.
+            days (list): Day labels, one column per day.
+            half_life_days (float): Half-life of an outcome's weight in days,
+                or None to weight every outcome equally.
+        """
+        self.names = list(names)
+        self.name_ids = {name: i for i, name in enumerate(self.names)}
+        self.days = list(days)
+        self.day_ids = {day: i for i, day in enumerate(self.days)}
+        # Label for each hour id, as spelled in the dataset where it appears
+        self.slot_labels = list(SLOT_LABELS)
+
+        self.half_life_days = half_life_days
+        self.decay_origin = datetime.now()
+        self._lock = threading.Lock()
+        # Changes whenever any rate changes, and differs between cubes
+        self.version = next(_versions)
+        count_dtype = np.int32 if half_life_days is None else np.float64
+
+        shape = (len(self.names), len(self.days), HOURS_PER_DAY)
+        self.day_time_attempts = np.zeros(shape, dtype=count_dtype)
+        self.day_time_successes = np.zeros(shape, dtype=count_dtype)
+        self.day_time_rates = np.zeros(shape, dtype=np.float32)
+
+        self.day_attempts = np.zeros(shape[:2], dtype=count_dtype)
+        self.day_successes = np.zeros(shape[:2], dtype=count_dtype)
+        self.day_rates = np.zeros(shape[:2], dtype=np.float32)
+
+        self.time_attempts = np.zeros((shape[0], HOURS_PER_DAY), dtype=count_dtype)
+        self.time_successes = np.zeros((shape[0], HOURS_PER_DAY), dtype=count_dtype)
+        self.time_rates = np.zeros((shape[0], HOURS_PER_DAY), dtype=np.float32)
+
+    @classmethod
+    def from_counts(cls, counts, half_life_days=None):
+        """
+        Build a cube from the output of ``aggregate_success_counts``.
+
+        Args:
+            counts (DataFrame): Count table indexed by (name, day, time).
+            half_life_days (float): Decay half-life for outcomes recorded
+                later, or None for no decay.
+
+        Returns:
+            RateCube: Populated cube with derived rates.
+        """
+        names = list(dict.fromkeys(counts.index.get_level_values("name")))
+        seen_days = set(counts.index.get_level_values("day"))
+        days = list(WEEKDAYS) + sorted(
+            day for day in seen_days if day not in WEEKDAYS
+        )
+        cube = cls(names, days, half_life_days)
+
+        # Parse every distinct label once, then index with integer hour ids.
+        # Rows whose time is not a slot (e.g. a blank cell) are skipped.
+        labels = counts.index.get_level_values("time")
+        hour_idx = parse_hours(labels)
+        valid = hour_idx != MISSING_HOUR
+        if not valid.all():
+            logging.warning(
+                "Skipping %d count rows with an unreadable time slot", (~valid).sum()
+            )
+        for label in labels[valid].unique():
+            cube.slot_labels[parse_hour(label)] = label
+
+        name_idx = np.array(
+            [cube.name_ids[name] for name in counts.index.get_level_values("name")],
+            dtype=np.intp,
+        )
+        day_idx = np.array(
+            [cube.day_ids[day] for day in counts.index.get_level_values("day")],
+            dtype=np.intp,
+        )
+
+        attempts = counts["attempts"].to_numpy()[valid]
+        successes = counts["successes"].to_numpy()[valid]
+        index = (name_idx[valid], day_idx[valid], hour_idx[valid])
+        np.add.at(cube.day_time_attempts, index, attempts)
+        np.add.at(cube.day_time_successes, index, successes)
+
+        cube.day_attempts[:] = cube.day_time_attempts.sum(axis=2)
+        cube.day_successes[:] = cube.day_time_successes.sum(axis=2)
+        cube.time_attempts[:] = cube.day_time_attempts.sum(axis=1)
+        cube.time_successes[:] = cube.day_time_successes.sum(axis=1)
+        cube.refresh_rates()
+
+        return cube
+
+    def refresh_rates(self):
+        """Recompute every rate table from the attempt and success counts."""
+        for successes, attempts, rates in (
+            (self.day_time_successes, self.day_time_attempts, self.day_time_rates),
+            (self.day_successes, self.day_attempts, self.day_rates),
+            (self.time_successes, self.time_attempts, self.time_rates),
+        ):
+            np.divide(successes, attempts, out=rates, where=attempts > 0)
+            rates[attempts == 0] = 0
+        self.version = next(_versions)
+
+    @property
+    def bytes_per_customer(self):
+        """Memory used by one customer's row across all tables."""
+        tables = [getattr(self, table) for table in COUNT_TABLES + RATE_TABLES]
+        return sum(table[0].nbytes for table in tables) if self.names else 0
+
+    def record(self, name, day, hour, success, when=None):
+        """
+        Fold one delivery outcome into the tables.
+
+        Only the counters and rates of the affected (name, day, hour) cells are
+        updated, so this is O(1) apart from the occasional growth of the
+        tables when a new customer or day appears.
+
+        Args:
+            name (str): Customer name.
+            day (str): Day of the week of the delivery attempt.
+            hour (int): Hour of the day of the delivery attempt.
+            success (bool): Whether the delivery succeeded.
+            when (datetime): Time of the attempt, used for decay (default: now).
+        """
+        with self._lock:
+            c = self._add_name(name)
+            d = self._add_day(day)
+
+            weight = self._outcome_weight(when or datetime.now())
+            hit = weight if success else 0
+
+            self.day_time_attempts[c, d, hour] += weight
+            self.day_time_successes[c, d, hour] += hit
+            self.day_attempts[c, d] += weight
+            self.day_successes[c, d] += hit
+            self.time_attempts[c, hour] += weight
+            self.time_successes[c, hour] += hit
+
+            self.day_time_rates[c, d, hour] = (
+                self.day_time_successes[c, d, hour] / self.day_time_attempts[c, d, hour]
+            )
+            self.day_rates[c, d] = self.day_successes[c, d] / self.day_attempts[c, d]
+            self.time_rates[c, hour] = self.time_successes[c, hour] / self.time_attempts[c, hour]
+            self.version = next(_versions)
+
+    def _outcome_weight(self, when):
+        """Weight of an outcome at ``when`` relative to ``decay_origin``."""
+        if self.half_life_days is None:
+            return 1
+
+        age_days = (when - self.decay_origin).total_seconds() / 86400
+        weight = 2.0 ** (age_days / self.half_life_days)
+        if weight > MAX_OUTCOME_WEIGHT:
+            # Rescale every count so weights start from 1 again
+            for table in COUNT_TABLES:
+                getattr(self, table)[:] /= weight
+            self.decay_origin = when
+            weight = 1.0
+        return weight
+
+    def _add_name(self, name):
+        """Return the id of a customer, adding an empty row if it is new."""
+        name_id = self.name_ids.get(name)
+        if name_id is not None:
+            return name_id
+
+        name_id = len(self.names)
+        capacity = len(self.day_time_rates)
+        if name_id == capacity:
+            # Double the row capacity so adding customers stays amortized O(1)
+            self._grow(axis=0, size=max(1, 2 * capacity))
+        self.names.append(name)
+        self.name_ids[name] = name_id
+        return name_id
+
+    def _add_day(self, day):
+        """Return the id of a day, adding an empty column if it is new."""
+        day_id = self.day_ids.get(day)
+        if day_id is not None:
+            return day_id
+
+        day_id = len(self.days)
+        self._grow(axis=1, size=day_id + 1, tables=("day_time", "day_"))
+        self.days.append(day)
+        self.day_ids[day] = day_id
+        return day_id
+
+    def _grow(self, axis, size, tables=("",)):
+        """Zero-pad every table whose name starts with a prefix in ``tables``."""
+        for table in COUNT_TABLES + RATE_TABLES:
+            if not table.startswith(tables):
+                continue
+            old = getattr(self, table)
+            grown = np.zeros(
+                old.shape[:axis] + (size,) + old.shape[axis + 1 :], dtype=old.dtype
+            )
+            grown[tuple(slice(0, n) for n in old.shape)] = old
+            setattr(self, table, grown)
+
+    def score_slots(self, name, day):
+        """
+        Score every hour slot for a customer on a given day.
+
+        Args:
+            name (str): Customer name.
+            day (str): Day of the week.
+
+        Returns:
+            tuple: (scores, available) arrays of length 24, or None if the
+            customer has no history. ``available`` marks hours with data.
+        """
+        scores, available, known = self.score_slots_many([name], [day])
+        if not known[0]:
+            return None
+        return scores[0], available[0]
+
+    def score_slots_many(self, names, days):
+        """
+        Score every hour slot for many (customer, day) pairs at once.
+
+        The overall per-hour rate is blended with the day-specific rate wherever
+        the customer has history for that day and hour.
+
+        Args:
+            names (list): Customer names.
+            days (list): Days of the week, aligned with ``names``.
+
+        Returns:
+            tuple: (scores, available, known) where ``scores`` and
+            ``available`` have shape (len(names), 24) and ``known`` marks the
+            names that have history. Rows for unknown names have no slots.
+        """
+        name_idx = np.array([self.name_ids.get(name, -1) for name in names], dtype=np.intp)
+        day_idx = np.array([self.day_ids.get(day, -1) for day in days], dtype=np.intp)
+        known = name_idx >= 0
+
+        if not self.names:
+            empty = np.zeros((len(names), HOURS_PER_DAY), dtype=np.float32)
+            return empty, empty.astype(bool), known
+
+        # Unknown names and days read row/column 0 and are masked out below
+        c = np.where(known, name_idx, 0)
+        d = np.where(day_idx >= 0, day_idx, 0)
+
+        scores = self.time_rates[c]
+        available = (self.time_attempts[c] > 0) & known[:, None]
+
+        has_day = (day_idx >= 0) & (self.day_attempts[c, d] > 0)
+        specific = has_day[:, None] & (self.day_time_attempts[c, d] > 0)
+        blended = (1 - DAY_TIME_WEIGHT) * scores + DAY_TIME_WEIGHT * (
+            self.day_time_rates[c, d]
+        )
+        scores = np.where(specific, blended, scores).astype(np.float32)
+
+        return scores, available, known
@@ -0,0 +1,526 @@
+"""
+Thread-safe cache for real-time data with single-flight refreshes.
+
+Real-time data (traffic, weather, festivals) comes from a slow upstream API
+and is cached for a per-key lifetime. When an entry expires under concurrent
+load, only one caller fetches it again; the other callers are served the
+stale value if there is one, or wait for that fetch to finish instead of
+issuing their own.
+
+Within a stale grace window after expiry, even that one caller is served the
+stale value and the refresh runs in a background thread, and a
+``BackgroundRefresher`` can re-fetch entries before they expire at all, so
+requests are normally served from memory without waiting on the upstream.
+
+Callers on an event loop use ``get_async`` with a coroutine fetch, which
+follows the same rules without blocking the loop: a caller waiting for
+another fetch awaits a future that is resolved when that fetch releases its
+key, whether it runs on a thread or on the loop.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import defaultdict
+
+# Lifetime for keys without their own entry in ``lifetimes``
+DEFAULT_LIFETIME = 3600
+
+# Fraction of its lifetime after which the refresher re-fetches an entry
+DEFAULT_REFRESH_AHEAD = 0.8
+
+# Seconds between refresher checks
+DEFAULT_POLL_INTERVAL = 30
+
+
+def index_by_area(data):
+    """
+    Index real-time data by area.
+
+    Areas may be top-level keys of the data (with dict values) or nested
+    under an "areas" mapping.
+
+    Args:
+        data (dict): City-wide traffic or weather data.
+
+    Returns:
+        dict: Area -> that area's data.
+    """
+    view = {key: value for key, value in data.items() if isinstance(value, dict)}
+    if isinstance(data.get("areas"), dict):
+        view.update(data["areas"])
+    return view
+
+
+class RealTimeSnapshot:
+    """
+    Immutable set of traffic, weather and festival data read at one moment.
+
+    A request acquires one snapshot and passes it to everything it calls, so
+    all of its work sees the same conditions. Snapshots with the same
+    ``version`` hold the same data. The data dicts are shared between
+    requests and must not be modified.
+    """
+
+    __slots__ = ("version", "traffic", "weather", "festivals", "_by_area")
+
+    def __init__(self, version, traffic, weather, festivals):
+        """
+        Args:
+            version (int): Increases whenever any of the data changes.
+            traffic (dict): City-wide traffic data.
+            weather (dict): City-wide weather data.
+            festivals (dict): Festival data.
+        """
+        values = {
+            "version": version,
+            "traffic": traffic,
+            "weather": weather,
+            "festivals": festivals,
+            "_by_area": {
+                "traffic": index_by_area(traffic) if isinstance(traffic, dict) else {},
+                "weather": index_by_area(weather) if isinstance(weather, dict) else {},
+            },
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("RealTimeSnapshot is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("RealTimeSnapshot is immutable")
+
+    def get(self, data_type, area=None):
+        """
+        Data of one type, optionally for one area.
+
+        Like ``DeliveryPredictor.get_real_time_data``, an area that is not in
+        the data returns the city-wide data.
+        """
+        data = getattr(self, data_type)
+        if area and data_type in self._by_area:
+            return self._by_area[data_type].get(area, data)
+        return data
+
+    def as_dict(self):
+        """The three data types in a new dict, as served by the API."""
+        return {
+            "weather": self.weather,
+            "traffic": self.traffic,
+            "festivals": self.festivals,
+        }
+
+
+class CacheEntry:
+    """
+    A cached value, the monotonic time it was fetched at and, for values
+    stored with their own lifetime, that lifetime.
+    """
+
+    __slots__ = ("value", "fetched_at", "lifetime")
+
+    def __init__(self, value, fetched_at, lifetime=None):
+        self.value = value
+        self.fetched_at = fetched_at
+        self.lifetime = lifetime
+
+
+class SingleFlightCache:
+    """
+    TTL cache where at most one fetch per key is in flight at a time.
+
+    Reads of fresh entries take no lock. Each key has its own fetch lock, so a
+    slow refresh of one key never blocks reads or refreshes of another. A
+    fetch lock exists only while some caller holds or waits for it.
+    """
+
+    def __init__(self, lifetimes=None, stale_grace=0, clock=time.monotonic):
+        """
+        Create an empty cache.
+
+        Args:
+            lifetimes (dict): Key -> lifetime in seconds; later changes to
+                the dict take effect immediately.
+            stale_grace (float): Seconds after expiry during which the stale
+                value is served while it is refreshed in the background.
+            clock (callable): Monotonic clock, replaceable in tests.
+        """
+        self.lifetimes = lifetimes if lifetimes is not None else {}
+        self.stale_grace = stale_grace
+        self.clock = clock
+        self._entries = {}
+        # Key -> [fetch lock, callers holding or waiting for it]
+        self._fetch_locks = {}
+        self._locks_lock = threading.Lock()
+        # Key -> futures of async callers waiting for its fetch lock
+        self._waiters = defaultdict(list)
+        # Background refreshes started by get_async
+        self._tasks = set()
+
+    def lifetime(self, key):
+        """
+        Lifetime of ``key`` in seconds.
+
+        A tuple key such as ``("traffic", "Gota")`` without its own lifetime
+        uses the lifetime of its first element. While the cached value was
+        stored with a lifetime of its own, that lifetime applies instead.
+        """
+        return self._lifetime_of(key, self._entries.get(key))
+
+    def _lifetime_of(self, key, entry):
+        """Lifetime of the cached ``entry`` of ``key``."""
+        if entry is not None and entry.lifetime is not None:
+            return entry.lifetime
+        if key in self.lifetimes:
+            return self.lifetimes[key]
+        if isinstance(key, tuple) and key and key[0] in self.lifetimes:
+            return self.lifetimes[key[0]]
+        return DEFAULT_LIFETIME
+
+    def age(self, key):
+        """Seconds since ``key`` was fetched, or None if it is not cached."""
+        return self._age_of(self._entries.get(key))
+
+    def is_fresh(self, key):
+        """Whether ``key`` is cached and younger than its lifetime."""
+        entry = self._entries.get(key)
+        age = self._age_of(entry)
+        return age is not None and age < self._lifetime_of(key, entry)
+
+    def must_fetch(self, key):
+        """Whether a read of ``key`` would have to wait for a fetch."""
+        entry = self._entries.get(key)
+        age = self._age_of(entry)
+        return age is None or age >= self._lifetime_of(key, entry) + self.stale_grace
+
+    def _age_of(self, entry):
+        return None if entry is None else self.clock() - entry.fetched_at
+
+    def _fetch_lock(self, key):
+        """
+        Fetch lock of ``key``, counting the caller as one of its users.
+
+        Every call must be matched by ``_unref`` (or by ``_release`` once the
+        lock is held), so the lock is dropped when nobody uses it any more.
+        """
+        with self._locks_lock:
+            slot = self._fetch_locks.setdefault(key, [threading.Lock(), 0])
+            slot[1] += 1
+            return slot[0]
+
+    def _unref(self, key):
+        """Stop using the fetch lock of ``key`` without having acquired it."""
+        with self._locks_lock:
+            slot = self._fetch_locks[key]
+            slot[1] -= 1
+            if not slot[1]:
+                del self._fetch_locks[key]
+
+    def _release(self, key, lock):
+        """Release the fetch lock of ``key`` and wake its async waiters."""
+        lock.release()
+        self._unref(key)
+        with self._locks_lock:
+            waiters = self._waiters.pop(key, ())
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_resolve, future)
+            except RuntimeError:
+                # The waiter's loop has been closed
+                pass
+
+    async def _wait_for_release(self, key, lock):
+        """Wait until the fetch lock of ``key`` is released (or is free now)."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiter = (loop, future)
+        with self._locks_lock:
+            self._waiters[key].append(waiter)
+        try:
+            # Released before we were registered: nobody will resolve us
+            if lock.locked():
+                await future
+        finally:
+            with self._locks_lock:
+                waiters = self._waiters.get(key)
+                if waiters and waiter in waiters:
+                    waiters.remove(waiter)
+                    if not waiters:
+                        del self._waiters[key]
+
+    def peek(self, key):
+        """Return the cached value of ``key`` (fresh or stale), or None."""
+        entry = self._entries.get(key)
+        return None if entry is None else entry.value
+
+    def put(self, key, value, lifetime=None):
+        """
+        Store ``value`` under ``key`` as freshly fetched.
+
+        Args:
+            key: Cache key.
+            value: Value to store.
+            lifetime (float): Seconds this value stays fresh, instead of the
+                lifetime of ``key`` (e.g. for short-lived fallback data).
+        """
+        self._entries[key] = CacheEntry(value, self.clock(), lifetime)
+
+    def invalidate(self, key):
+        """Drop ``key`` so the next read fetches it again."""
+        self._entries.pop(key, None)
+
+    def get(self, key, fetch):
+        """
+        Return the value of ``key``, fetching it if it is missing or expired.
+
+        An entry that expired less than ``stale_grace`` seconds ago is
+        returned as is and refreshed in a background thread. If another
+        thread is already fetching ``key``, the stale value is returned when
+        there is one; otherwise this call waits for that fetch. If the fetch
+        fails, the last good (stale) value is returned when there is one.
+
+        Args:
+            key: Cache key.
+            fetch (callable): Returns the new value, or None if it could not
+                be fetched; None is never cached.
+
+        Returns:
+            The cached or fetched value, or None.
+        """
+        entry = self._entries.get(key)
+        age = self._age_of(entry)
+        lifetime = self._lifetime_of(key, entry)
+        if age is not None and age < lifetime:
+            return entry.value
+
+        lock = self._fetch_lock(key)
+        if not lock.acquire(blocking=False):
+            if entry is not None:
+                self._unref(key)
+                return entry.value
+            lock.acquire()
+        elif age is not None and age < lifetime + self.stale_grace:
+            # Stale but within the grace window: refresh without waiting
+            threading.Thread(
+                target=self._fetch_locked, args=(key, fetch, lock), daemon=True
+            ).start()
+            return entry.value
+
+        # Another thread may have refreshed the entry while we waited
+        entry = self._entries.get(key)
+        age = self._age_of(entry)
+        if age is not None and age < self._lifetime_of(key, entry):
+            self._release(key, lock)
+            return entry.value
+        value = self._fetch_locked(key, fetch, lock)
+        if value is None and entry is not None:
+            # Keep serving the last good value while the upstream is failing
+            return entry.value
+        return value
+
+    async def get_async(self, key, fetch):
+        """
+        Asynchronous ``get`` for callers on an event loop.
+
+        Follows the same rules as ``get``, but the fetch is a coroutine and
+        the caller awaits it (or another caller's fetch) instead of blocking
+        the loop. Background refreshes within the stale grace window run as
+        tasks on the caller's loop.
+
+        Args:
+            key: Cache key.
+            fetch (callable): Coroutine function returning the new value, or
+                None if it could not be fetched.
+
+        Returns:
+            The cached or fetched value, or None.
+        """
+        entry = self._entries.get(key)
+        age = self._age_of(entry)
+        lifetime = self._lifetime_of(key, entry)
+        if age is not None and age < lifetime:
+            return entry.value
+
+        lock = self._fetch_lock(key)
+        if not lock.acquire(blocking=False):
+            if entry is not None:
+                self._unref(key)
+                return entry.value
+            # Nothing to serve until the fetch in flight finishes
+            try:
+                while not lock.acquire(blocking=False):
+                    await self._wait_for_release(key, lock)
+            except BaseException:
+                # Cancelled while waiting
+                self._unref(key)
+                raise
+        elif age is not None and age < lifetime + self.stale_grace:
+            task = asyncio.create_task(self._fetch_locked_async(key, fetch, lock))
+            # The loop keeps only weak references to tasks
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            return entry.value
+
+        entry = self._entries.get(key)
+        age = self._age_of(entry)
+        if age is not None and age < self._lifetime_of(key, entry):
+            self._release(key, lock)
+            return entry.value
+        value = await self._fetch_locked_async(key, fetch, lock)
+        if value is None and entry is not None:
+            return entry.value
+        return value
+
+    def refresh(self, key, fetch):
+        """
+        Fetch ``key`` now, unless a fetch for it is already in flight.
+
+        Returns:
+            bool: Whether a new value was stored.
+        """
+        lock = self._fetch_lock(key)
+        if not lock.acquire(blocking=False):
+            self._unref(key)
+            return False
+        return self._fetch_locked(key, fetch, lock) is not None
+
+    def refresh_many(self, keys, fetch_many):
+        """
+        Fetch several keys with one call, skipping keys already being fetched.
+
+        Args:
+            keys (list): Keys to refresh.
+            fetch_many (callable): Takes a list of keys and returns a dict of
+                key -> new value (None for keys that could not be fetched).
+
+        Returns:
+            list: Keys for which a new value was stored.
+        """
+        locks = {}
+        for key in keys:
+            lock = self._fetch_lock(key)
+            if lock.acquire(blocking=False):
+                locks[key] = lock
+            else:
+                self._unref(key)
+        if not locks:
+            return []
+
+        refreshed = []
+        try:
+            values = fetch_many(list(locks))
+            for key in locks:
+                if values.get(key) is not None:
+                    self.put(key, values[key])
+                    refreshed.append(key)
+        except Exception:
+            logging.exception("Fetching %s for the real-time cache failed", list(locks))
+        finally:
+            for key, lock in locks.items():
+                self._release(key, lock)
+        return refreshed
+
+    async def _fetch_locked_async(self, key, fetch, lock):
+        """Await ``fetch`` for ``key`` and release its (already held) lock."""
+        try:
+            value = await fetch()
+            if value is not None:
+                self.put(key, value)
+            return value
+        except Exception:
+            logging.exception("Fetching %s for the real-time cache failed", key)
+            return None
+        finally:
+            self._release(key, lock)
+
+    def _fetch_locked(self, key, fetch, lock):
+        """Run ``fetch`` for ``key`` and release its (already held) lock."""
+        try:
+            value = fetch()
+            if value is not None:
+                self.put(key, value)
+            return value
+        except Exception:
+            logging.exception("Fetching %s for the real-time cache failed", key)
+            return None
+        finally:
+            self._release(key, lock)
+
+
+def _resolve(future):
+    """Wake an async waiter (on its own loop), unless it gave up waiting."""
+    if not future.done():
+        future.set_result(None)
+
+
+class BackgroundRefresher:
+    """
+    Daemon thread that re-fetches cache entries before they expire.
+
+    Every ``poll_interval`` seconds each registered key whose age has passed
+    ``refresh_ahead`` of its lifetime (or that is not cached yet) is fetched
+    again, so readers keep finding fresh entries.
+    """
+
+    def __init__(
+        self,
+        cache,
+        fetchers,
+        refresh_ahead=DEFAULT_REFRESH_AHEAD,
+        poll_interval=DEFAULT_POLL_INTERVAL,
+        fetch_many=None,
+    ):
+        """
+        Args:
+            cache (SingleFlightCache): Cache to keep warm.
+            fetchers (dict): Key -> fetch callable, as passed to ``cache.get``.
+            refresh_ahead (float): Fraction of the lifetime after which an
+                entry is refreshed.
+            poll_interval (float): Seconds between checks.
+            fetch_many (callable): Optional batch fetch, as passed to
+                ``cache.refresh_many``; when set, all due keys are fetched
+                with one call instead of one fetcher at a time.
+        """
+        self.cache = cache
+        self.fetchers = dict(fetchers)
+        self.refresh_ahead = refresh_ahead
+        self.poll_interval = poll_interval
+        self.fetch_many = fetch_many
+        self._stop = threading.Event()
+        self._thread = None
+
+    def refresh_due(self):
+        """Refresh every key that is due; returns the keys refreshed."""
+        due = []
+        for key in self.fetchers:
+            age = self.cache.age(key)
+            if age is None or age >= self.cache.lifetime(key) * self.refresh_ahead:
+                due.append(key)
+
+        if self.fetch_many is not None:
+            return self.cache.refresh_many(due, self.fetch_many) if due else []
+        return [key for key in due if self.cache.refresh(key, self.fetchers[key])]
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh_due()
+            self._stop.wait(self.poll_interval)
+
+    def start(self):
+        """Start the refresher thread (no-op if it is already running)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="real-time-refresher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """Stop the refresher thread and wait for it to exit."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
@@ -0,0 +1,331 @@
+"""
+Route solvers for open delivery routes.
+
+Every solver works on a square integer duration matrix where index 0 is the
+postman's start location and indices 1..n are the stops. Routes start at 0,
+visit every stop exactly once and do not return to the start.
+
+``solve_exact`` is optimal up to ``EXACT_MAX_STOPS`` stops; ``solve_heuristic``
+handles routes of any size within a time budget. ``solve_route`` picks
+between them.
+"""
+
+import itertools
+import time
+
+import numpy as np
+
+# Largest number of stops the exact solver accepts (2^20 x 20 DP states)
+EXACT_MAX_STOPS = 20
+# Routes up to this size use the exact solver when the solver is "auto"
+AUTO_EXACT_MAX_STOPS = 12
+# Largest heuristic route that is also solved exactly to report the gap
+GAP_MAX_STOPS = 15
+SOLVERS = ("auto", "exact", "heuristic")
+# Or-opt moves segments of up to this many consecutive stops
+OR_OPT_MAX_SEGMENT = 3
+
+
+def route_duration(durations, order):
+    """
+    Total duration of visiting the stops in ``order`` from the start location.
+
+    Args:
+        durations (ndarray): (n+1) x (n+1) duration matrix.
+        order (list): Stop indices (1..n) in visiting order.
+
+    Returns:
+        int: Sum of the leg durations.
+    """
+    path = [0] + list(order)
+    return int(sum(durations[a][b] for a, b in zip(path, path[1:])))
+
+
+def solve_brute_force(durations):
+    """
+    Find the optimal route by trying every permutation of the stops.
+
+    This is O(n!) and only practical for a handful of stops; it is kept as a
+    reference for tests and benchmarks.
+
+    Args:
+        durations (ndarray): (n+1) x (n+1) duration matrix.
+
+    Returns:
+        tuple: (order, total_duration) with stop indices in visiting order.
+    """
+    stops = range(1, len(durations))
+    best_order = []
+    min_total_time = 0 if len(durations) <= 1 else float("inf")
+
+    for perm in itertools.permutations(stops):
+        total_time = route_duration(durations, perm)
+        if total_time < min_total_time:
+            min_total_time = total_time
+            best_order = list(perm)
+
+    return best_order, int(min_total_time)
+
+
+def solve_exact(durations):
+    """
+    Find the optimal route with the Held-Karp dynamic program.
+
+    ``dp[mask, j]`` is the shortest time to leave the start, visit exactly
+    the stops in ``mask`` and end at stop ``j``. Masks are processed in order
+    of how many stops they contain, and every mask of the same size is
+    relaxed in one vectorized step, giving O(n^2 2^n) time and O(n 2^n)
+    memory.
+
+    Args:
+        durations (ndarray): (n+1) x (n+1) integer duration matrix.
+
+    Returns:
+        tuple: (order, total_duration) with stop indices in visiting order.
+
+    Raises:
+        ValueError: If there are more than ``EXACT_MAX_STOPS`` stops.
+    """
+    durations = np.asarray(durations, dtype=np.int64)
+    n = len(durations) - 1
+
+    if n > EXACT_MAX_STOPS:
+        raise ValueError(
+            f"Exact solver supports at most {EXACT_MAX_STOPS} stops, got {n}"
+        )
+    if n <= 0:
+        return [], 0
+
+    # Use int32 tables when every possible route fits comfortably
+    dtype = np.int32 if durations.max() * (n + 1) < 2**29 else np.int64
+    inf = np.iinfo(dtype).max // 2
+
+    full = 1 << n
+    dp = np.full((full, n), inf, dtype=dtype)
+    parent = np.full((full, n), -1, dtype=np.int8)
+    between = durations[1:, 1:].astype(dtype)
+
+    stop_bits = 1 << np.arange(n)
+    dp[stop_bits, np.arange(n)] = durations[0, 1:]
+
+    masks = np.arange(full)
+    stop_counts = np.zeros(full, dtype=np.int8)
+    for j in range(n):
+        stop_counts += (masks >> j) & 1
+
+    for size in range(2, n + 1):
+        masks_of_size = masks[stop_counts == size]
+        for j in range(n):
+            # Masks that end at stop j, and the same masks before visiting j
+            ending = masks_of_size[(masks_of_size >> j) & 1 == 1]
+            previous = ending ^ (1 << j)
+
+            candidates = dp[previous] + between[:, j]
+            best = candidates.argmin(axis=1)
+            dp[ending, j] = candidates[np.arange(len(ending)), best]
+            parent[ending, j] = best
+
+    # Walk the parent pointers back from the cheapest final stop
+    mask = full - 1
+    last = int(dp[mask].argmin())
+    total = int(dp[mask, last])
+
+    order = []
+    while last >= 0:
+        order.append(last + 1)
+        previous = int(parent[mask, last])
+        mask ^= 1 << last
+        last = previous
+
+    return order[::-1], total
+
+
+def solve_heuristic(durations, time_limit_ms=500, seed=0):
+    """
+    Find a short route with nearest-neighbour construction and local search.
+
+    The nearest-neighbour route is improved with 2-opt (segment reversal) and
+    Or-opt (moving runs of up to ``OR_OPT_MAX_SEGMENT`` stops) until neither
+    finds an improvement. Remaining time is spent on iterated local search:
+    the best route is perturbed with a double-bridge move and re-optimized.
+    Travel times between stops are assumed to be symmetric.
+
+    Args:
+        durations (ndarray): (n+1) x (n+1) duration matrix.
+        time_limit_ms (int): Time budget for the search in milliseconds.
+        seed (int): Seed for the perturbation moves.
+
+    Returns:
+        tuple: (order, total_duration) with stop indices in visiting order.
+    """
+    deadline = time.perf_counter() + time_limit_ms / 1000
+    durations = np.asarray(durations, dtype=np.int64)
+    n = len(durations) - 1
+
+    if n <= 1:
+        return list(range(1, n + 1)), route_duration(durations, range(1, n + 1))
+
+    # Add an end node that every stop reaches at no cost, so the open route
+    # becomes a path from 0 to the end node and every move has two neighbours
+    end = n + 1
+    padded = np.zeros((n + 2, n + 2), dtype=np.int64)
+    padded[: n + 1, : n + 1] = durations
+
+    path = np.array([0] + _nearest_neighbour(durations) + [end])
+    _local_search(padded, path, deadline)
+    best_path, best_total = path.copy(), _path_duration(padded, path)
+
+    rng = np.random.default_rng(seed)
+    while n >= 8 and time.perf_counter() < deadline:
+        candidate = _double_bridge(best_path, rng)
+        _local_search(padded, candidate, deadline)
+        total = _path_duration(padded, candidate)
+        if total < best_total:
+            best_path, best_total = candidate, total
+
+    return [int(stop) for stop in best_path[1:-1]], int(best_total)
+
+
+def _nearest_neighbour(durations):
+    """Build a route by always driving to the closest unvisited stop."""
+    unvisited = np.ones(len(durations), dtype=bool)
+    unvisited[0] = False
+    order = []
+    current = 0
+
+    for _ in range(len(durations) - 1):
+        candidates = np.where(unvisited, durations[current], np.iinfo(np.int64).max)
+        current = int(candidates.argmin())
+        unvisited[current] = False
+        order.append(current)
+
+    return order
+
+
+def _path_duration(padded, path):
+    return int(padded[path[:-1], path[1:]].sum())
+
+
+def _local_search(padded, path, deadline):
+    """Apply 2-opt and Or-opt moves in place until no move improves the path."""
+    while time.perf_counter() < deadline:
+        if not (_two_opt_pass(padded, path, deadline) | _or_opt_pass(padded, path, deadline)):
+            break
+
+
+def _two_opt_pass(padded, path, deadline):
+    """
+    Reverse path[i..j] whenever that shortens the route.
+
+    Reversing swaps edges (a, b) and (c, d) for (a, c) and (b, d), where
+    a = path[i-1], b = path[i], c = path[j] and d = path[j+1].
+    """
+    improved = False
+    last = len(path) - 2
+
+    for i in range(1, last):
+        if time.perf_counter() >= deadline:
+            break
+
+        a, b = path[i - 1], path[i]
+        c, d = path[i + 1 : last + 1], path[i + 2 : last + 2]
+        delta = padded[a, c] + padded[b, d] - padded[a, b] - padded[c, d]
+
+        k = int(delta.argmin())
+        if delta[k] < 0:
+            j = i + 1 + k
+            path[i : j + 1] = path[i : j + 1][::-1]
+            improved = True
+
+    return improved
+
+
+def _or_opt_pass(padded, path, deadline):
+    """Move runs of consecutive stops to a cheaper position in the path."""
+    improved = False
+
+    for length in range(1, OR_OPT_MAX_SEGMENT + 1):
+        i = 1
+        while i + length < len(path):
+            if time.perf_counter() >= deadline:
+                return improved
+
+            first, last = path[i], path[i + length - 1]
+            before, after = path[i - 1], path[i + length]
+            removal_gain = (
+                padded[before, first] + padded[last, after] - padded[before, after]
+            )
+
+            # Insert between rest[k] and rest[k + 1] for every k
+            rest = np.concatenate([path[:i], path[i + length :]])
+            insertion_cost = (
+                padded[rest[:-1], first] + padded[last, rest[1:]] - padded[rest[:-1], rest[1:]]
+            )
+
+            k = int(insertion_cost.argmin())
+            if insertion_cost[k] < removal_gain:
+                segment = path[i : i + length].copy()
+                path[:] = np.concatenate([rest[: k + 1], segment, rest[k + 1 :]])
+                improved = True
+            i += 1
+
+    return improved
+
+
+def _double_bridge(path, rng):
+    """Perturb a path by reconnecting three random segments as A C B D."""
+    stops = len(path) - 2
+    p1, p2, p3 = np.sort(rng.choice(np.arange(2, stops + 1), size=3, replace=False))
+    return np.concatenate([path[:p1], path[p2:p3], path[p1:p2], path[p3:]])
+
+
+def solve_route(durations, solver="auto", time_limit_ms=500):
+    """
+    Solve a route with the requested solver and report how good the result is.
+
+    ``"exact"`` always runs Held-Karp, ``"heuristic"`` always runs the local
+    search, and ``"auto"`` uses the exact solver up to ``AUTO_EXACT_MAX_STOPS``
+    stops and the heuristic above that. When the heuristic is used on a route
+    of at most ``GAP_MAX_STOPS`` stops, the exact optimum is also computed so
+    the optimality gap can be reported.
+
+    Args:
+        durations (ndarray): (n+1) x (n+1) duration matrix.
+        solver (str): One of ``SOLVERS``.
+        time_limit_ms (int): Time budget for the heuristic in milliseconds.
+
+    Returns:
+        tuple: (order, total_duration, info) where ``info`` names the solver
+        used and holds the optimal duration and relative gap, or None for both
+        when the optimum was not computed.
+
+    Raises:
+        ValueError: If the solver name or time limit is invalid.
+    """
+    if solver not in SOLVERS:
+        raise ValueError(f"Unknown solver '{solver}', expected one of {list(SOLVERS)}")
+    if time_limit_ms <= 0:
+        raise ValueError("time_limit_ms must be positive")
+
+    stops = len(durations) - 1
+    if solver == "auto":
+        solver = "exact" if stops <= AUTO_EXACT_MAX_STOPS else "heuristic"
+
+    if solver == "exact":
+        order, total = solve_exact(durations)
+        optimal_total = total
+    else:
+        order, total = solve_heuristic(durations, time_limit_ms)
+        optimal_total = solve_exact(durations)[1] if stops <= GAP_MAX_STOPS else None
+
+    gap = None
+    if optimal_total is not None:
+        gap = round((total - optimal_total) / optimal_total, 4) if optimal_total else 0.0
+
+    info = {
+        "name": solver,
+        "time_limit_ms": time_limit_ms if solver == "heuristic" else None,
+        "optimal_duration": optimal_total,
+        "optimality_gap": gap,
+    }
+    return order, total, info
@@ -0,0 +1,158 @@
+"""
+Real-time adjustments to hourly delivery success scores.
+
+Traffic, weather and festival data are compiled into a ``SlotAdjustment``: a
+set of per-hour vectors that can be applied to one score row or to a whole
+matrix of rows at once. Every reduction in the rules clamps the score at
+``MIN_SCORE`` and every boost caps it at ``MAX_BOOSTED_SCORE``; because all
+reductions scale by a factor of at most 1, a chain of clamped reductions
+collapses into a single multiply followed by one clamp.
+"""
+
+from datetime import datetime
+
+import numpy as np
+
+from time_slots import HOURS_PER_DAY
+
+# Scores never drop below this after a reduction
+MIN_SCORE = 0.1
+# Boosted scores never rise above this
+MAX_BOOSTED_SCORE = 0.95
+
+# Hours hit hardest by heavy congestion (8-10 AM and 5-7 PM)
+CONGESTION_PEAK_HOURS = [8, 9, 10, 17, 18, 19]
+# Hours excluded from the light-traffic boost (8-9 AM and 5-6 PM)
+RUSH_HOURS = [8, 9, 17, 18]
+# Afternoon hours affected by extreme heat (12 PM - 4 PM)
+HOT_AFTERNOON_HOURS = [12, 13, 14, 15, 16]
+
+RAINY_CONDITIONS = ["rain", "rainy", "thunderstorm", "stormy"]
+FESTIVAL_IMPACT_FACTORS = {
+    "Low": 0.95,
+    "Moderate": 0.8,
+    "High": 0.6,
+    "Severe": 0.4,
+}
+
+
+class SlotAdjustment:
+    """
+    Per-hour score adjustment compiled from real-time conditions.
+
+    A score ``s`` for hour ``h`` becomes
+    ``max(floor[h], min(ceiling[h], s * boost[h]) * multiplier[h])``.
+    """
+
+    def __init__(self):
+        self.boost = np.ones(HOURS_PER_DAY, dtype=np.float32)
+        self.ceiling = np.full(HOURS_PER_DAY, np.inf, dtype=np.float32)
+        self.multiplier = np.ones(HOURS_PER_DAY, dtype=np.float32)
+        self.floor = np.zeros(HOURS_PER_DAY, dtype=np.float32)
+
+    def reduce(self, hours, factor):
+        """Scale the given hours by ``factor`` (<= 1) with a ``MIN_SCORE`` floor."""
+        self.multiplier[hours] *= max(0.0, factor)
+        self.floor[hours] = MIN_SCORE
+
+    def boost_hours(self, hours, factor):
+        """Scale the given hours by ``factor`` with a ``MAX_BOOSTED_SCORE`` cap."""
+        self.boost[hours] *= factor
+        self.ceiling[hours] = MAX_BOOSTED_SCORE
+
+    def apply(self, scores):
+        """
+        Apply the adjustment to a score vector or a matrix of score rows.
+
+        Args:
+            scores (ndarray): Scores with hours on the last axis.
+
+        Returns:
+            ndarray: Adjusted scores with the same shape.
+        """
+        boosted = np.minimum(self.ceiling, scores * self.boost)
+        return np.maximum(self.floor, boosted * self.multiplier)
+
+
+def compile_slot_adjustment(
+    customer_area, traffic_data, weather_data, festival_data, today=None
+):
+    """
+    Compile real-time conditions for one area into a ``SlotAdjustment``.
+
+    Parameters:
+    - customer_area: The area where the customer is located
+    - traffic_data: Real-time traffic data for that area
+    - weather_data: Real-time weather data
+    - festival_data: Festival data
+    - today: Date ("YYYY-MM-DD") whose festivals apply (default: today)
+
+    Returns:
+    - SlotAdjustment for the area
+    """
+    adjustment = SlotAdjustment()
+    all_hours = np.arange(HOURS_PER_DAY)
+
+    # Apply traffic adjustments
+    if isinstance(traffic_data, dict) and "congestion_level" in traffic_data:
+        congestion_level = traffic_data.get("congestion_level", 5)
+
+        # High congestion levels (7-10) reduce success rates for peak hours by 5-25%
+        if congestion_level >= 7:
+            reduction = (congestion_level - 6) * 0.05
+            adjustment.reduce(CONGESTION_PEAK_HOURS, 1 - reduction)
+
+        # Low congestion periods slightly boost success rates for off-peak hours
+        if congestion_level <= 3:
+            adjustment.boost_hours(np.setdiff1d(all_hours, RUSH_HOURS), 1.1)
+
+    # Apply weather adjustments
+    if isinstance(weather_data, dict):
+        # Check for rain/severe weather
+        is_rainy = weather_data.get("conditions", "").lower() in RAINY_CONDITIONS
+        high_rain_chance = weather_data.get("precipitation", {}).get("chance", 0) >= 70
+
+        if is_rainy or high_rain_chance:
+            adjustment.reduce(all_hours, 0.8)
+
+        # Extreme temperatures reduce afternoon success rates
+        if "temperature" in weather_data:
+            temp = weather_data["temperature"].get("current", 30)
+            if temp >= 38:
+                adjustment.reduce(HOT_AFTERNOON_HOURS, 0.85)
+
+    # Apply festival adjustments
+    if isinstance(festival_data, dict) and festival_data.get(
+        "has_festival_today", False
+    ):
+        if today is None:
+            today = datetime.now().strftime("%Y-%m-%d")
+
+        for festival in festival_data.get("festivals", []):
+            if festival.get("date") != today:
+                continue
+
+            # Check if customer area is affected by this festival
+            affected_areas = festival.get("affected_areas", [])
+            if affected_areas and customer_area not in affected_areas:
+                continue
+
+            if "time" not in festival:
+                continue
+
+            try:
+                start_time, end_time = festival["time"].split("-")
+                start_hour = int(start_time.strip().split(":")[0])
+                end_hour = int(end_time.strip().split(":")[0])
+            except (ValueError, IndexError):
+                # If time parsing fails, apply a general reduction to all times
+                adjustment.reduce(all_hours, 0.9)
+                continue
+
+            impact_factor = FESTIVAL_IMPACT_FACTORS.get(
+                festival.get("traffic_impact", "Moderate"), 0.8
+            )
+            festival_hours = all_hours[(all_hours >= start_hour) & (all_hours <= end_hour)]
+            adjustment.reduce(festival_hours, impact_factor)
+
+    return adjustment
@@ -2,6 +2,10 @@ import pytest
 import pandas as pd
 import json
 import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
 from unittest.mock import MagicMock, patch
 from delivery_predictor import DeliveryPredictor
 from chatbot_assistant import DeliveryChatbot
@@ -56,7 +60,10 @@ def mock_predictor(mock_dataset, tmp_path):
 
     # Create a predictor with the test dataset
     with patch.object(DeliveryPredictor, "generate_pending_orders"):
-        predictor = DeliveryPredictor(dataset_path=str(dataset_path))
+        predictor = DeliveryPredictor(
+            dataset_path=str(dataset_path),
+            orders_db_path=str(tmp_path / "orders.db"),
+        )
 
     # Mock the real-time data methods
     predictor.get_real_time_data = MagicMock(return_value={})
@@ -155,11 +162,26 @@ def mock_chatbot(mock_predictor):
 
 
 @pytest.fixture
-def flask_app():
-    """Create a test Flask app"""
-    from app import app
+def flask_app(mock_dataset, tmp_path, monkeypatch):
+    """Create a test Flask app that keeps its files in tmp_path"""
+    import app as app_module
 
-    app.config["TESTING"] = True
+    dataset_path = tmp_path / "dataset.csv"
+    mock_dataset.to_csv(dataset_path, index=False)
+    app = app_module.create_app(
+        {
+            "TESTING": True,
+            "DATASET_PATH": str(dataset_path),
+            "ORDERS_DB_PATH": str(tmp_path / "orders.db"),
+            "GENERATE_PENDING_ORDERS": False,
+            "GEOCODE_CACHE_PATH": "",
+            "REAL_TIME_REFRESH": False,
+            "GEMINI_API_KEY": None,
+        },
+        start_background_tasks=False,
+    )
+    # `app.predictor` and friends refer to this app's services
+    monkeypatch.setattr(app_module, "_default_app", app)
     return app
 
 
@@ -168,3 +190,65 @@ def client(flask_app):
     """Create a test client for the Flask app"""
     with flask_app.test_client() as client:
         yield client
+
+
+class NominatimStub:
+    """Local stand-in for the Nominatim search API"""
+
+    def __init__(self):
+        # Query -> list of results; unknown queries return []
+        self.places = {
+            "Satellite, Ahmedabad": [
+                {"lat": "23.0300", "lon": "72.5100", "display_name": "Satellite, Ahmedabad"}
+            ],
+            "Gota, Ahmedabad": [
+                {"lat": "23.1000", "lon": "72.5400", "display_name": "Gota, Ahmedabad"}
+            ],
+        }
+        # Queries answered with an HTTP 500, and seconds to stall before answering
+        self.failing = set()
+        self.delay = 0.0
+        # (query, client port, monotonic time) of every request
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)["q"][0]
+                stub.requests.append((query, self.client_address[1], time.monotonic()))
+                time.sleep(stub.delay)
+                status = 500 if query in stub.failing else 200
+                body = json.dumps(stub.places.get(query, [])).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}/search"
+        threading.Thread(
+            target=self.server.serve_forever, args=(0.05,), daemon=True
+        ).start()
+
+    @property
+    def queries(self):
+        return [query for query, _, _ in self.requests]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def nominatim_stub():
+    """Run a stub Nominatim server on a local port"""
+    stub = NominatimStub()
+    yield stub
+    stub.close()
@@ -0,0 +1,240 @@
+import asyncio
+import json
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from async_routes import AsyncApp, build_environ
+from geocoding import Geocoder
+
+
+@pytest.fixture
+def asgi_app(flask_app):
+    """ASGI front end for the test Flask app"""
+    app = AsyncApp(flask_app, threads=4)
+    yield app
+    app.executor.shutdown()
+
+
+async def call(app, method, path, body=b"", headers=(), query_string=b""):
+    """Send one HTTP request through an ASGI app; returns (status, headers, body)"""
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "root_path": "",
+        "query_string": query_string,
+        "headers": [(name.encode(), value.encode()) for name, value in headers],
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 5002),
+    }
+    requests = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        return requests.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    start, content = sent
+    response_headers = {
+        name.decode(): value.decode() for name, value in start["headers"]
+    }
+    return start["status"], response_headers, content["body"]
+
+
+def post_json(app, path, data, headers=()):
+    return call(
+        app,
+        "POST",
+        path,
+        json.dumps(data).encode(),
+        headers=[("Content-Type", "application/json"), *headers],
+    )
+
+
+class TestAsyncApp:
+    """Test class for the ASGI front end"""
+
+    def test_build_environ(self):
+        """Test the WSGI environ built for an ASGI request"""
+        environ = build_environ(
+            {
+                "type": "http",
+                "method": "POST",
+                "path": "/api/chat",
+                "root_path": "/api",
+                "query_string": b"a=1",
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"accept", b"text/html"),
+                    (b"accept", b"application/json"),
+                ],
+            },
+            b"{}",
+        )
+        assert environ["SCRIPT_NAME"] == "/api"
+        assert environ["PATH_INFO"] == "/chat"
+        assert environ["QUERY_STRING"] == "a=1"
+        assert environ["CONTENT_TYPE"] == "application/json"
+        assert environ["CONTENT_LENGTH"] == "2"
+        assert environ["HTTP_ACCEPT"] == "text/html,application/json"
+        assert environ["wsgi.input"].read() == b"{}"
+
+    def test_sync_routes_run_on_threads(self, asgi_app):
+        """Test that other routes are served by the Flask app on the thread pool"""
+        threads = []
+
+        def load_pending_orders():
+            threads.append(threading.current_thread().name)
+            return [{"order_id": "10001"}]
+
+        with patch("app.load_pending_orders", side_effect=load_pending_orders):
+            status, headers, body = asyncio.run(call(asgi_app, "GET", "/pending_orders"))
+
+        assert status == 200
+        assert headers["content-type"] == "application/json"
+        assert json.loads(body) == [{"order_id": "10001"}]
+        assert threads[0].startswith("wsgi")
+
+    def test_chat_runs_on_event_loop(self, asgi_app, flask_app):
+        """Test that /chat awaits the chatbot instead of calling it on a thread"""
+        chatbot = flask_app.extensions["delivery"].chatbot
+
+        async def process_query_async(message, context):
+            assert "real_time_snapshot" in context
+            return f"Reply to {message}"
+
+        with patch.object(chatbot, "process_query_async", new=process_query_async), patch.object(
+            chatbot, "process_query"
+        ) as process_query:
+            status, headers, body = asyncio.run(
+                post_json(asgi_app, "/chat", {"message": "Hello"}, [("Origin", "http://localhost:3000")])
+            )
+            empty = asyncio.run(post_json(asgi_app, "/chat", {"message": " "}))
+            wrong_method = asyncio.run(call(asgi_app, "GET", "/chat"))
+
+        assert status == 200
+        assert json.loads(body) == {"response": "Reply to Hello"}
+        process_query.assert_not_called()
+        # The app's after-request hooks still run
+        assert headers["access-control-allow-origin"] == "http://localhost:3000"
+        assert empty[0] == 400
+        assert wrong_method[0] == 405
+
+    def test_real_time_data(self, asgi_app):
+        """Test the asynchronous /real_time_data route"""
+        status, headers, body = asyncio.run(
+            call(asgi_app, "GET", "/real_time_data", query_string=b"type=weather")
+        )
+        assert status == 200
+        assert "x-cache-age" in headers
+
+        status, _, body = asyncio.run(
+            call(asgi_app, "GET", "/real_time_data", query_string=b"type=all")
+        )
+        data = json.loads(body)
+        assert status == 200
+        assert {"weather", "traffic", "festivals", "version", "weather_summary"} <= set(data)
+
+        status, _, _ = asyncio.run(
+            call(asgi_app, "GET", "/real_time_data", query_string=b"type=unknown")
+        )
+        assert status == 400
+
+    def test_geocode(self, asgi_app, flask_app, nominatim_stub):
+        """Test the asynchronous geocode routes against a stub Nominatim"""
+        form = [("Content-Type", "application/x-www-form-urlencoded")]
+        geocoder = Geocoder(url=nominatim_stub.url, min_interval=0)
+
+        with patch.object(flask_app.extensions["delivery"], "geocoder", geocoder):
+            status, _, body = asyncio.run(
+                call(asgi_app, "POST", "/geocode", b"address=Satellite%2C+Ahmedabad", form)
+            )
+            assert status == 200
+            assert json.loads(body)["lat"] == 23.03
+
+            status, _, _ = asyncio.run(
+                call(asgi_app, "POST", "/geocode", b"address=Nowhere", form)
+            )
+            assert status == 404
+            status, _, _ = asyncio.run(call(asgi_app, "POST", "/geocode", b"", form))
+            assert status == 400
+
+            status, _, body = asyncio.run(
+                post_json(
+                    asgi_app,
+                    "/geocode/batch",
+                    {"addresses": ["Gota, Ahmedabad", "Satellite, Ahmedabad", "gota,ahmedabad"]},
+                )
+            )
+            assert status == 200
+            assert [item.get("lat") for item in json.loads(body)["results"]] == [
+                23.1,
+                23.03,
+                23.1,
+            ]
+
+        assert nominatim_stub.queries == ["Satellite, Ahmedabad", "Nowhere", "Gota, Ahmedabad"]
+
+    def test_slow_upstream_does_not_block_other_routes(self, asgi_app, flask_app):
+        """Test that many pending upstream waits hold no threads"""
+        predictor = flask_app.extensions["delivery"].predictor
+        waiting = 200
+
+        async def run():
+            release = asyncio.Event()
+
+            async def slow_real_time_data(data_type, area=None):
+                await release.wait()
+                return {"status": "Normal"}
+
+            with patch.object(
+                predictor, "get_real_time_data_async", new=slow_real_time_data
+            ), patch("app.load_pending_orders", return_value=[]):
+                threads_before = threading.active_count()
+                slow = [
+                    asyncio.create_task(
+                        call(asgi_app, "GET", "/real_time_data", query_string=b"type=traffic")
+                    )
+                    for _ in range(waiting)
+                ]
+                await asyncio.sleep(0.05)
+                assert not any(task.done() for task in slow)
+
+                # Synchronous routes are still served while the waits are pending
+                status, _, _ = await asyncio.wait_for(
+                    call(asgi_app, "GET", "/pending_orders"), timeout=5
+                )
+                assert status == 200
+                assert threading.active_count() - threads_before <= 4
+
+                release.set()
+                return await asyncio.gather(*slow)
+
+        results = asyncio.run(run())
+        assert [status for status, _, _ in results] == [200] * waiting
+        assert json.loads(results[0][2]) == {"status": "Normal"}
+
+    def test_lifespan(self, asgi_app, flask_app):
+        """Test that startup starts the background tasks"""
+        messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message["type"])
+
+        services = flask_app.extensions["delivery"]
+        with patch.object(services, "start_background_tasks") as start:
+            asyncio.run(asgi_app({"type": "lifespan"}, receive, send))
+
+        start.assert_called_once_with()
+        assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
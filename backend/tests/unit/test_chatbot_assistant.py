@@ -27,6 +27,8 @@ class TestDeliveryChatbot:
         """Test processing a query with Gemini API"""
         # Setup mock response
         test_response = "Here's your delivery information"
+        # Configured regardless of whether GEMINI_API_KEY is set here
+        mock_chatbot.gemini_api.is_configured = True
         mock_chatbot.gemini_api.generate_content = MagicMock(return_value=test_response)
 
         # Process a query
@@ -57,6 +59,35 @@ class TestDeliveryChatbot:
             # Verify fallback was used
             assert response == "Fallback response"
 
+    def test_process_query_async(self, mock_chatbot):
+        """Test processing a query from an async route"""
+        import asyncio
+
+        # Without an API key the answer is the mock response
+        mock_chatbot.gemini_api.is_configured = False
+        assert asyncio.run(mock_chatbot.process_query_async("Hello")) == (
+            mock_chatbot.process_query("Hello")
+        )
+
+        mock_chatbot.gemini_api.is_configured = True
+
+        async def generate_content_async(**kwargs):
+            return "This is an async response"
+
+        with patch.object(
+            mock_chatbot.gemini_api, "generate_content_async", new=generate_content_async
+        ):
+            response = asyncio.run(
+                mock_chatbot.process_query_async("How many deliveries today?")
+            )
+
+        assert response == "This is an async response"
+        assert mock_chatbot.chat_history[-1] == {
+            "role": "assistant",
+            "content": "This is an async response",
+        }
+        mock_chatbot.gemini_api.close()
+
     def test_build_system_context(self, mock_chatbot, mock_predictor):
         """Test building the system context for the chatbot"""
         # Patch predictor methods to return test data
@@ -0,0 +1,92 @@
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker:
+    """Test class for CircuitBreaker"""
+
+    def test_opens_after_consecutive_failures(self):
+        """Test that repeated failures open the breaker and reject calls"""
+        breaker = CircuitBreaker(failure_threshold=3, clock=FakeClock())
+
+        for _ in range(2):
+            assert breaker.allow_request()
+            breaker.record_failure(0.1)
+        assert breaker.state == CLOSED
+
+        # A success resets the run of failures
+        breaker.record_success(0.1)
+        for _ in range(3):
+            assert breaker.allow_request()
+            breaker.record_failure(0.1)
+        assert breaker.state == OPEN
+        assert not breaker.allow_request()
+        assert not breaker.allow_request()
+
+        metrics = breaker.metrics()
+        assert metrics["state"] == OPEN
+        assert metrics["calls"] == 6
+        assert metrics["failures"] == 5
+        assert metrics["rejected"] == 2
+        assert metrics["opened"] == 1
+        assert metrics["mean_latency_ms"] == 100.0
+
+    def test_opens_on_error_rate(self):
+        """Test that a high error rate over a full window opens the breaker"""
+        breaker = CircuitBreaker(
+            failure_threshold=10, error_rate_threshold=0.5, window_size=4
+        )
+        for success in (True, False, True):
+            breaker._record(success, 0.1)
+        assert breaker.state == CLOSED
+        breaker.record_failure(0.1)
+        assert breaker.state == OPEN
+
+    def test_slow_calls_count_as_failures(self):
+        """Test that calls over the latency budget count as failures"""
+        breaker = CircuitBreaker(failure_threshold=2, slow_call_seconds=1.0)
+        breaker.record_success(0.5)
+        breaker.record_success(2.0)
+        assert breaker.state == CLOSED
+        breaker.record_success(3.0)
+        assert breaker.state == OPEN
+
+        metrics = breaker.metrics()
+        assert metrics["successes"] == 1
+        assert metrics["slow_calls"] == 2
+        assert metrics["max_latency_ms"] == 3000.0
+
+    def test_half_open_trials(self):
+        """Test that the breaker probes with trial calls after the timeout"""
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=clock)
+        breaker.record_failure(0.1)
+        assert breaker.state == OPEN
+
+        clock.now = 29
+        assert not breaker.allow_request()
+
+        # One trial at a time; a failed trial re-opens the breaker
+        clock.now = 30
+        assert breaker.state == HALF_OPEN
+        assert breaker.allow_request()
+        assert not breaker.allow_request()
+        breaker.record_failure(0.1)
+        assert breaker.state == OPEN
+        assert breaker.metrics()["opened"] == 2
+
+        # A successful trial closes it
+        clock.now = 60
+        assert breaker.allow_request()
+        breaker.record_success(0.1)
+        assert breaker.state == CLOSED
+        assert breaker.allow_request()
@@ -0,0 +1,63 @@
+import numpy as np
+
+from coordinate_index import KNOWN_COORDINATES, CoordinateIndex
+from geocoding import Geocoder
+
+JODHPUR = "Near Jodhpur Cross Road, Satellite, Ahmedabad - 380015"
+
+
+class TestCoordinateIndex:
+    """Test class for the address coordinate index"""
+
+    def test_known_coordinates(self):
+        """Test that the precomputed addresses need no geocoder"""
+        index = CoordinateIndex()
+
+        assert len(index) == len(KNOWN_COORDINATES)
+        assert index.get(JODHPUR) == KNOWN_COORDINATES[JODHPUR]
+        assert index.get(JODHPUR.upper().replace(", ", " ,")) == KNOWN_COORDINATES[JODHPUR]
+        assert index.get("Satellite, Ahmedabad") is None
+
+    def test_resolves_each_address_once(self, nominatim_stub):
+        """Test that new addresses are geocoded in one batch and remembered"""
+        geocoder = Geocoder(url=nominatim_stub.url, min_interval=0)
+        index = CoordinateIndex({}, geocoder=geocoder)
+
+        addresses = ["Satellite, Ahmedabad", "Nowhere", "satellite,ahmedabad"]
+        assert index.resolve(addresses) == {
+            "satellite, ahmedabad": (23.03, 72.51),
+            "nowhere": None,
+        }
+        assert index.get("Nowhere") is None
+        assert index.get("Satellite, Ahmedabad") == (23.03, 72.51)
+        assert nominatim_stub.queries == ["Satellite, Ahmedabad", "Nowhere"]
+
+    def test_failed_lookups_are_retried(self, nominatim_stub):
+        """Test that addresses are not remembered when Nominatim fails"""
+        index = CoordinateIndex({}, geocoder=Geocoder(url=nominatim_stub.url, min_interval=0))
+
+        nominatim_stub.failing.add("Gota, Ahmedabad")
+        assert index.get("Gota, Ahmedabad") is None
+        nominatim_stub.failing.clear()
+
+        assert index.get("Gota, Ahmedabad") == (23.1, 72.54)
+        assert len(nominatim_stub.requests) == 2
+
+        # Unreadable answers are retried as well
+        good = nominatim_stub.places["Satellite, Ahmedabad"]
+        nominatim_stub.places["Satellite, Ahmedabad"] = [{"lat": "north"}]
+        assert index.get("Satellite, Ahmedabad") is None
+        nominatim_stub.places["Satellite, Ahmedabad"] = good
+
+        assert index.get("Satellite, Ahmedabad") == (23.03, 72.51)
+        assert len(nominatim_stub.requests) == 4
+
+    def test_locate(self):
+        """Test the coordinate arrays of a list of stops"""
+        index = CoordinateIndex()
+
+        lats, lons, found = index.locate([JODHPUR, "Unknown", JODHPUR])
+
+        assert found.tolist() == [True, False, True]
+        assert lats[0] == lats[2] == KNOWN_COORDINATES[JODHPUR][0]
+        assert np.isnan(lons[1])
@@ -0,0 +1,90 @@
+from datetime import datetime
+from unittest.mock import patch
+from dashboard import DashboardView
+
+# A Monday
+MONDAY = datetime(2023, 5, 22)
+
+
+class TestDashboardView:
+    """Test class for the dashboard view model"""
+
+    def context(self, view):
+        with patch("dashboard.datetime") as mock_datetime:
+            mock_datetime.now.return_value = MONDAY
+            return view.context()
+
+    def test_groupings(self, mock_predictor, mock_orders):
+        """Test the groupings built from the initial orders"""
+        mock_predictor.orders.replace_all(mock_orders)
+        view = DashboardView(mock_predictor)
+        mock_predictor.add_order("Kabir", "Monday", "Small")
+
+        context = self.context(view)
+        assert context["current_day"] == "Monday"
+        assert context["names"] == ["Aditya", "Kabir"]
+        assert [order["order_id"] for order in context["pending_orders"]] == [
+            10001,
+            10002,
+            10003,
+        ]
+        assert [order["order_id"] for order in context["todays_orders"]] == [
+            10001,
+            10003,
+        ]
+
+        [kabir] = context["grouped_todays_orders"]
+        assert kabir["order_id"] == 10001
+        assert kabir["parcel_count"] == 2
+
+        groups = context["grouped_pending_orders"]
+        assert [(group["name"], group["delivery_day"]) for group in groups] == [
+            ("Kabir", "Monday"),
+            ("Aditya", "Tuesday"),
+        ]
+        assert [order["order_id"] for order in groups[0]["orders"]] == [10001, 10003]
+
+    def test_follows_order_changes(self, mock_predictor, mock_orders):
+        """Test that changes are reflected and unchanged pages are reused"""
+        mock_predictor.orders.replace_all(mock_orders)
+        view = DashboardView(mock_predictor)
+        first = self.context(view)
+        assert self.context(view)["grouped_pending_orders"] is first[
+            "grouped_pending_orders"
+        ]
+        assert self.context(view)["real_time_summary"] is first["real_time_summary"]
+
+        mock_predictor.orders.update_status(10001, "Delivered", delivered=True)
+        second = self.context(view)
+        assert second["todays_orders"][0]["status"] == "Delivered"
+        assert second["grouped_pending_orders"][0]["orders"][0]["status"] == "Delivered"
+        # Earlier results are left as they were
+        assert first["todays_orders"][0]["status"] == "Pending"
+
+        mock_predictor.add_order("Diya", "Monday", "Large")
+        third = self.context(view)
+        assert third["names"] == ["Aditya", "Diya", "Kabir"]
+        assert [order["name"] for order in third["grouped_todays_orders"]] == [
+            "Kabir",
+            "Diya",
+        ]
+
+        # A reload rebuilds everything
+        mock_predictor.orders.replace_all(mock_orders[1:])
+        fourth = self.context(view)
+        assert fourth["names"] == ["Aditya"]
+        assert fourth["grouped_todays_orders"] == []
+
+    def test_real_time_summaries_per_snapshot(self, mock_predictor):
+        """Test that summaries are computed once per snapshot"""
+        view = DashboardView(mock_predictor)
+        with patch.object(
+            mock_predictor, "_get_weather_summary", return_value="Sunny"
+        ) as summary:
+            self.context(view)
+            self.context(view)
+            assert summary.call_count == 1
+
+            mock_predictor.get_real_time_data.return_value = {}
+            assert self.context(view)["real_time_summary"]["weather"] == "Sunny"
+            assert summary.call_count == 2
@@ -0,0 +1,93 @@
+import numpy as np
+from distance_matrix import (
+    AREA_DISTANCES,
+    DEFAULT_DISTANCE,
+    DEFAULT_DURATION,
+    SAME_AREA_DISTANCE,
+    SAME_AREA_DURATION,
+    UNKNOWN_AREA,
+    AreaDistanceMatrix,
+    build_address_index,
+    estimate_driving,
+    haversine_matrix,
+)
+
+
+class TestAreaDistanceMatrix:
+    """Test class for the area distance matrix"""
+
+    def test_matrices_are_symmetric(self):
+        """Test that every table entry is stored in both directions"""
+        matrix = AreaDistanceMatrix()
+
+        assert np.array_equal(matrix.distances, matrix.distances.T)
+        assert np.array_equal(matrix.durations, matrix.durations.T)
+        for (area1, area2), (distance, duration) in AREA_DISTANCES.items():
+            for origin, destination in ((area1, area2), (area2, area1)):
+                result = matrix.lookup(matrix.area_id(origin), matrix.area_id(destination))
+                assert result["distance"] == distance
+                assert result["duration"] == duration
+                assert result["text_distance"] == f"{distance} km"
+
+    def test_same_area_and_unknown(self):
+        """Test same-area travel and the default for unknown areas"""
+        matrix = AreaDistanceMatrix(extra_areas=["Ghatlodia"])
+        satellite = matrix.area_id("Satellite")
+        ghatlodia = matrix.area_id("Ghatlodia")
+
+        assert matrix.lookup(satellite, satellite)["duration"] == SAME_AREA_DURATION
+        assert matrix.lookup(ghatlodia, ghatlodia)["distance"] == SAME_AREA_DISTANCE
+        assert matrix.lookup(ghatlodia, satellite) == {
+            "distance": DEFAULT_DISTANCE,
+            "duration": DEFAULT_DURATION,
+            "text_distance": "10 km",
+            "text_duration": "20 mins",
+        }
+        assert matrix.area_id("Nowhere") == UNKNOWN_AREA
+        assert matrix.lookup(UNKNOWN_AREA, UNKNOWN_AREA)["duration"] == DEFAULT_DURATION
+
+    def test_gather(self):
+        """Test that a gather matches individual lookups"""
+        matrix = AreaDistanceMatrix()
+        ids = [matrix.area_id(area) for area in ["Satellite", "Gota", "Paldi"]]
+        ids.append(UNKNOWN_AREA)
+
+        distances, durations, known = matrix.gather(ids, ids)
+
+        assert distances.shape == (4, 4)
+        for i, origin in enumerate(ids):
+            for j, destination in enumerate(ids):
+                expected = matrix.lookup(origin, destination)
+                assert durations[i, j] == expected["duration"]
+                assert distances[i, j] == expected["distance"]
+        assert not known[3].any()
+
+    def test_build_address_index(self):
+        """Test that shared addresses keep the first customer's area"""
+        addresses = {"A": "addr1", "B": "addr1", "C": "addr2", "D": "addr3"}
+        areas = {"A": "Bopal", "B": "Gota", "C": "Paldi"}
+
+        assert build_address_index(addresses, areas) == {
+            "addr1": "Bopal",
+            "addr2": "Paldi",
+        }
+
+    def test_haversine_matrix(self):
+        """Test great-circle distances between every pair of points"""
+        distances = haversine_matrix([23.0, 24.0, 23.0], [72.5, 72.5, 73.5])
+
+        assert distances.shape == (3, 3)
+        assert np.array_equal(distances, distances.T)
+        assert np.all(np.diag(distances) == 0)
+        # One degree of latitude, and one of longitude at 23 degrees north
+        assert abs(distances[0, 1] - 111.19) < 0.01
+        assert abs(distances[0, 2] - 111.19 * np.cos(np.radians(23.0))) < 0.05
+
+    def test_estimate_driving(self):
+        """Test road distances and durations estimated from straight lines"""
+        distances, durations = estimate_driving(np.array([[0.0, 10.0], [10.0, 0.0]]))
+
+        assert distances[0, 1] == 13.0
+        assert durations[0, 1] == 32
+        assert durations.dtype == np.int64
+        assert durations[0, 0] == SAME_AREA_DURATION
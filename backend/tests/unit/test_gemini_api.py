@@ -1,7 +1,9 @@
 import pytest
 from unittest.mock import patch, MagicMock
+import asyncio
 import json
 import os
+import time
 from gemini_api import GeminiAPI
 
 
@@ -241,6 +243,23 @@ class TestGeminiAPI:
             assert "raw_content" in data
             assert data["raw_content"] == "This is not JSON"
 
+    def test_get_real_time_data_parse_error_counts_once(self):
+        """Test that an unparsable answer is recorded as a single successful call"""
+        mock_chat = MagicMock()
+        mock_chat.send_message.return_value.text = "```json\n{not json\n```"
+
+        with patch("gemini_api.genai") as mock_genai:
+            mock_genai.GenerativeModel.return_value.start_chat.return_value = mock_chat
+            api = GeminiAPI("test_api_key")
+
+            data = api.get_real_time_data("weather", "Get current weather in Ahmedabad")
+
+        assert "API error" in data["error"]
+        metrics = api.circuit_breaker.metrics()
+        assert metrics["calls"] == 1
+        assert metrics["successes"] == 1
+        assert metrics["failures"] == 0
+
     def test_get_real_time_data_exception(self):
         """Test getting real-time data with exception"""
         # Mock genai to raise an exception
@@ -257,3 +276,146 @@ class TestGeminiAPI:
             assert data is not None
             assert "error" in data
             assert "Test exception" in data["error"]
+
+    def test_model_is_reused(self):
+        """Test that one model is created per generation config"""
+        mock_response = MagicMock()
+        mock_response.text = '{"weather": "sunny"}'
+        mock_model = MagicMock()
+        mock_model.start_chat.return_value.send_message.return_value = mock_response
+
+        with patch("gemini_api.genai") as mock_genai:
+            mock_genai.GenerativeModel.return_value = mock_model
+            api = GeminiAPI("test_api_key")
+
+            for _ in range(3):
+                api.get_real_time_data("weather", "Get current weather")
+            api.generate_content("Test prompt")
+            api.generate_content("Test prompt")
+
+            assert mock_genai.GenerativeModel.call_count == 2
+
+    def test_get_real_time_data_many(self):
+        """Test concurrent fetches with a concurrency limit and a timeout"""
+        delays = {"traffic": 0.2, "weather": 0.3, "festivals": 0.3}
+
+        def start_chat(history):
+            async def send_message_async(message):
+                data_type = next(t for t in delays if t in message)
+                await asyncio.sleep(delays[data_type])
+                response = MagicMock()
+                response.text = json.dumps({"type": data_type})
+                return response
+
+            chat = MagicMock()
+            chat.send_message_async = send_message_async
+            return chat
+
+        requests = [(data_type, f"Get {data_type}", None) for data_type in delays]
+
+        with patch("gemini_api.genai") as mock_genai:
+            mock_genai.GenerativeModel.return_value.start_chat.side_effect = start_chat
+
+            # All three run at once: as slow as the slowest, not the sum
+            api = GeminiAPI("test_api_key")
+            start = time.perf_counter()
+            results = api.get_real_time_data_many(requests)
+            elapsed = time.perf_counter() - start
+            assert results == [{"type": data_type} for data_type in delays]
+            assert elapsed < 0.6
+            api.close()
+
+            # One request in flight at a time
+            api = GeminiAPI("test_api_key", max_in_flight=1)
+            start = time.perf_counter()
+            api.get_real_time_data_many(requests)
+            assert time.perf_counter() - start >= 0.75
+            api.close()
+
+            # Requests over the timeout return an error
+            api = GeminiAPI("test_api_key", timeout=0.25)
+            results = api.get_real_time_data_many(requests)
+            assert results[0] == {"type": "traffic"}
+            assert "timeout" in results[1]["error"]
+            api.close()
+
+    def test_get_real_time_data_many_not_configured(self):
+        """Test concurrent fetches when the API is not configured"""
+        api = GeminiAPI()
+        api.is_configured = False
+        assert api.get_real_time_data_many([("weather", "prompt", None)]) == [None]
+
+
+    def test_generate_content_async(self):
+        """Test asynchronous content generation from another event loop"""
+
+        async def send_message_async(prompt):
+            await asyncio.sleep(0.01)
+            response = MagicMock()
+            response.text = f"Answer to {prompt}"
+            return response
+
+        async def generate(api, prompt):
+            return await api.run_async(
+                api.generate_content_async(
+                    prompt,
+                    chat_history=[
+                        {"role": "user", "content": "Hi"},
+                        {"role": "assistant", "content": "Hello"},
+                    ],
+                )
+            )
+
+        with patch("gemini_api.genai") as mock_genai:
+            start_chat = mock_genai.GenerativeModel.return_value.start_chat
+            start_chat.return_value.send_message_async = send_message_async
+
+            api = GeminiAPI("test_api_key")
+            assert asyncio.run(generate(api, "Test prompt")) == "Answer to Test prompt"
+            start_chat.assert_called_with(
+                history=[
+                    {"role": "user", "parts": ["Hi"]},
+                    {"role": "model", "parts": ["Hello"]},
+                ]
+            )
+            assert api.circuit_breaker.metrics()["successes"] == 1
+
+            # Errors and timeouts return None and count as failures
+            api.timeout = 0.001
+            assert asyncio.run(generate(api, "Test prompt")) is None
+            assert api.circuit_breaker.metrics()["failures"] == 1
+            api.close()
+
+    def test_circuit_breaker(self):
+        """Test that an open circuit skips the API until a trial succeeds"""
+        from circuit_breaker import CircuitBreaker
+
+        mock_chat = MagicMock()
+        mock_chat.send_message.side_effect = Exception("Service unavailable")
+
+        with patch("gemini_api.genai") as mock_genai:
+            mock_genai.GenerativeModel.return_value.start_chat.return_value = mock_chat
+            now = [0.0]
+            breaker = CircuitBreaker(
+                failure_threshold=2, reset_timeout=30, clock=lambda: now[0]
+            )
+            api = GeminiAPI("test_api_key", circuit_breaker=breaker)
+
+            for _ in range(2):
+                assert "API error" in api.get_real_time_data("weather", "prompt")["error"]
+            assert breaker.metrics()["state"] == "open"
+
+            # While open the API is not called at all
+            assert api.get_real_time_data("weather", "prompt") == {
+                "error": "API circuit open"
+            }
+            assert api.generate_content("Test prompt") is None
+            assert mock_chat.send_message.call_count == 2
+            assert breaker.metrics()["rejected"] == 2
+
+            # After the timeout a successful trial closes the circuit
+            now[0] = 30
+            mock_chat.send_message.side_effect = None
+            mock_chat.send_message.return_value.text = '{"weather": "sunny"}'
+            assert api.get_real_time_data("weather", "prompt") == {"weather": "sunny"}
+            assert breaker.metrics()["state"] == "closed"
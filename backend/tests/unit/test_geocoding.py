@@ -0,0 +1,213 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from geocoding import (
+    Geocoder,
+    GeocodeStore,
+    InvalidResponse,
+    RateLimiter,
+    normalize_address,
+)
+
+SATELLITE = {"lat": 23.03, "lon": 72.51, "display_name": "Satellite, Ahmedabad"}
+
+
+class TestGeocoding:
+    """Test class for the cached Nominatim client"""
+
+    def test_normalize_address(self):
+        """Test that spelling variants share one cache key"""
+        assert normalize_address("  Satellite ,AHMEDABAD ") == "satellite, ahmedabad"
+        assert normalize_address("Near  Jodhpur Cross Road,\tSatellite,") == (
+            "near jodhpur cross road, satellite"
+        )
+
+    def test_geocode_is_cached(self, nominatim_stub):
+        """Test that repeated and re-spelled addresses are looked up once"""
+        geocoder = Geocoder(url=nominatim_stub.url, min_interval=0)
+
+        assert geocoder.geocode("Satellite, Ahmedabad") == SATELLITE
+        assert geocoder.geocode("satellite ,  ahmedabad") == SATELLITE
+        assert geocoder.lookup("SATELLITE, AHMEDABAD") == (True, SATELLITE)
+        assert geocoder.lookup("Gota, Ahmedabad") == (False, None)
+        assert nominatim_stub.queries == ["Satellite, Ahmedabad"]
+        assert geocoder.metrics()["misses"] == 1
+        assert geocoder.metrics()["hits"] == 2
+
+    def test_lru_eviction(self, nominatim_stub):
+        """Test that the memory cache keeps the most recently used addresses"""
+        geocoder = Geocoder(url=nominatim_stub.url, min_interval=0, cache_size=1)
+
+        geocoder.geocode("Satellite, Ahmedabad")
+        geocoder.geocode("Gota, Ahmedabad")
+        geocoder.geocode("Satellite, Ahmedabad")
+
+        assert len(nominatim_stub.requests) == 3
+        assert geocoder.metrics()["size"] == 1
+
+    def test_persistent_store(self, nominatim_stub, tmp_path):
+        """Test that results survive a restart through the SQLite file"""
+        path = str(tmp_path / "geocode_cache.db")
+        Geocoder(url=nominatim_stub.url, store_path=path, min_interval=0).geocode(
+            "Satellite, Ahmedabad"
+        )
+
+        restarted = Geocoder(url=nominatim_stub.url, store_path=path, min_interval=0)
+        assert restarted.geocode("Satellite, Ahmedabad") == SATELLITE
+        assert restarted.metrics()["store_hits"] == 1
+        assert len(nominatim_stub.requests) == 1
+        assert len(GeocodeStore(path)) == 1
+
+    def test_negative_caching(self, nominatim_stub, tmp_path):
+        """Test that unknown addresses are cached until the negative TTL passes"""
+        now = [1000.0]
+        geocoder = Geocoder(
+            url=nominatim_stub.url,
+            store_path=str(tmp_path / "geocode_cache.db"),
+            min_interval=0,
+            negative_ttl=60,
+            clock=lambda: now[0],
+        )
+
+        assert geocoder.geocode("Nowhere") is None
+        assert geocoder.geocode("nowhere") is None
+        assert GeocodeStore(geocoder.store.path).get("nowhere") == (None, 1000.0)
+        assert len(nominatim_stub.requests) == 1
+
+        now[0] = 1060
+        assert geocoder.geocode("Nowhere") is None
+        assert len(nominatim_stub.requests) == 2
+
+    def test_errors_are_not_cached(self, nominatim_stub):
+        """Test that upstream errors and timeouts raise and are retried"""
+        geocoder = Geocoder(url=nominatim_stub.url, min_interval=0, timeout=0.2)
+
+        nominatim_stub.failing.add("Satellite, Ahmedabad")
+        with pytest.raises(requests.HTTPError):
+            geocoder.geocode("Satellite, Ahmedabad")
+        nominatim_stub.failing.clear()
+
+        nominatim_stub.delay = 0.5
+        with pytest.raises(requests.Timeout):
+            geocoder.geocode("Satellite, Ahmedabad")
+        nominatim_stub.delay = 0
+
+        assert geocoder.geocode("Satellite, Ahmedabad") == SATELLITE
+        assert len(nominatim_stub.requests) == 3
+
+    def test_malformed_responses_are_errors(self, nominatim_stub):
+        """Test that unreadable Nominatim answers fail like upstream errors"""
+        geocoder = Geocoder(url=nominatim_stub.url, min_interval=0)
+        nominatim_stub.places.update(
+            {
+                "Bad Latitude": [{"lat": "north", "lon": "72.5", "display_name": "x"}],
+                "No Latitude": [{"lon": "72.5", "display_name": "x"}],
+                "Not A List": {"error": "Unable to geocode"},
+                "Not A Place": ["Satellite"],
+            }
+        )
+
+        results = geocoder.geocode_many(
+            [
+                "Bad Latitude",
+                "No Latitude",
+                "Not A List",
+                "Not A Place",
+                "Satellite, Ahmedabad",
+            ]
+        )
+
+        assert results.pop("satellite, ahmedabad") == SATELLITE
+        assert len(results) == 4
+        assert all(isinstance(result, InvalidResponse) for result in results.values())
+        assert all(isinstance(result, requests.RequestException) for result in results.values())
+        # Nothing is cached, so the addresses are looked up again
+        with pytest.raises(InvalidResponse):
+            geocoder.geocode("No Latitude")
+        assert nominatim_stub.queries.count("No Latitude") == 2
+        assert not geocoder._fetch_locks
+
+    def test_concurrent_lookups_share_one_request(self, nominatim_stub):
+        """Test that callers of an address being looked up wait for that lookup"""
+        geocoder = Geocoder(url=nominatim_stub.url, min_interval=0, timeout=0.5)
+        nominatim_stub.delay = 0.1
+        results = []
+
+        def geocode():
+            results.append(geocoder.geocode("Satellite, Ahmedabad"))
+
+        threads = [threading.Thread(target=geocode) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == [SATELLITE] * 8
+        assert len(nominatim_stub.requests) == 1
+        assert not geocoder._fetch_locks
+
+        # Failed lookups release their lock too
+        nominatim_stub.failing.add("Gota, Ahmedabad")
+        with pytest.raises(requests.HTTPError):
+            geocoder.geocode("Gota, Ahmedabad")
+        assert not geocoder._fetch_locks
+
+    def test_session_reuses_connections(self, nominatim_stub):
+        """Test that upstream requests share one pooled connection"""
+        geocoder = Geocoder(url=nominatim_stub.url, min_interval=0)
+
+        geocoder.geocode("Satellite, Ahmedabad")
+        geocoder.geocode("Gota, Ahmedabad")
+        geocoder.geocode("Nowhere")
+
+        assert len({port for _, port, _ in nominatim_stub.requests}) == 1
+        geocoder.close()
+
+    def test_geocode_many(self, nominatim_stub):
+        """Test that a batch looks each address up once, at the rate limit"""
+        geocoder = Geocoder(url=nominatim_stub.url, min_interval=0.1)
+        nominatim_stub.failing.add("Broken")
+
+        results = geocoder.geocode_many(
+            [
+                "Satellite, Ahmedabad",
+                "Gota, Ahmedabad",
+                "satellite,ahmedabad",
+                "Nowhere",
+                "Broken",
+                "Gota, Ahmedabad",
+            ]
+        )
+
+        assert results["satellite, ahmedabad"] == SATELLITE
+        assert results["gota, ahmedabad"]["lat"] == 23.1
+        assert results["nowhere"] is None
+        assert isinstance(results["broken"], requests.HTTPError)
+        assert nominatim_stub.queries == [
+            "Satellite, Ahmedabad",
+            "Gota, Ahmedabad",
+            "Nowhere",
+            "Broken",
+        ]
+        times = [at for _, _, at in nominatim_stub.requests]
+        assert all(later - earlier >= 0.09 for earlier, later in zip(times, times[1:]))
+
+    def test_rate_limiter(self):
+        """Test that calls are spaced by the minimum interval"""
+        now = [0.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        limiter = RateLimiter(1.0, clock=lambda: now[0], sleep=sleep)
+        for _ in range(3):
+            limiter.wait()
+        now[0] += 5
+        limiter.wait()
+
+        assert sleeps == [1.0, 1.0]
@@ -0,0 +1,188 @@
+import json
+import os
+import shutil
+from unittest.mock import patch
+from delivery_predictor import DeliveryPredictor
+from order_log import OrderEventLog
+from order_repository import OrderRepository
+from order_store import FIRST_ORDER_ID
+
+
+def read_events(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+class TestOrderEventLog:
+    """Test class for the JSONL order event log"""
+
+    def test_writes_append_events(self, tmp_path):
+        """Test that each mutation appends exactly one event"""
+        path = str(tmp_path / "orders.jsonl")
+        log = OrderEventLog(path)
+
+        order = log.add("Aditya", "Monday", "Satellite", "Address", "Small")
+        log.update_status(order["order_id"], "Delivered", delivered=True)
+
+        events = read_events(path)
+        assert [event["event"] for event in events] == ["put", "status"]
+        assert [event["seq"] for event in events] == [1, 2]
+        assert order["order_id"] == FIRST_ORDER_ID
+        assert log.get(FIRST_ORDER_ID)["status"] == "Delivered"
+        assert "delivered_at" in log.get(FIRST_ORDER_ID)
+        assert log.update_status(99999, "Delivered") is None
+
+    def test_replay_on_startup(self, tmp_path, mock_orders):
+        """Test that a new instance restores the snapshot and the log tail"""
+        path = str(tmp_path / "orders.jsonl")
+        log = OrderEventLog(path)
+        log.replace_all(mock_orders)
+        log.update_status(10001, "Failed", delivered=True)
+        added = log.add("Meera", "Friday", "Paldi", "Address", "Large")
+        log.close()
+
+        restored = OrderEventLog(path)
+
+        assert restored.all() == log.all()
+        assert restored.add("Kabir", "Monday", "Chandkheda", "Address", "Small")[
+            "order_id"
+        ] == added["order_id"] + 1
+
+    def test_torn_tail_is_cut_off(self, tmp_path):
+        """Test that events appended after a torn last line survive a restart"""
+        path = str(tmp_path / "orders.jsonl")
+        log = OrderEventLog(path)
+        log.add("Aditya", "Monday", "Satellite", "Address", "Small")
+        log.close()
+        with open(path, "a") as f:
+            f.write('{"seq": 2, "event": "put", "ord')
+
+        log = OrderEventLog(path)
+        log.add("Meera", "Friday", "Paldi", "Address", "Large")
+        log.add("Kabir", "Monday", "Chandkheda", "Address", "Small")
+        log.close()
+
+        restored = OrderEventLog(path)
+        assert [order["name"] for order in restored.all()] == ["Aditya", "Meera", "Kabir"]
+        assert [event["seq"] for event in read_events(path)] == [1, 2, 3]
+
+    def test_malformed_lines_are_skipped(self, tmp_path):
+        """Test that one bad line does not hide the events after it"""
+        path = str(tmp_path / "orders.jsonl")
+        log = OrderEventLog(path)
+        log.add("Aditya", "Monday", "Satellite", "Address", "Small")
+        log.close()
+        with open(path, "a") as f:
+            f.write("not json\n")
+            f.write("[]\n")
+            f.write('{"event": "put"}\n')
+            f.write('{"seq": 2, "event": "status", "order_id": 99999, "status": "Delivered"}\n')
+            f.write('{"seq": 2, "event": "put", "order": {"order_id": "x"}}\n')
+        log = OrderEventLog(path)
+        log.add("Meera", "Friday", "Paldi", "Address", "Large")
+        log.close()
+
+        restored = OrderEventLog(path)
+        assert [order["name"] for order in restored.all()] == ["Aditya", "Meera"]
+
+    def test_compaction(self, tmp_path):
+        """Test that compaction writes a snapshot and truncates the log"""
+        path = str(tmp_path / "orders.jsonl")
+        log = OrderEventLog(path, compact_every=5)
+
+        for _ in range(7):
+            log.add("Aditya", "Monday", "Satellite", "Address", "Small")
+        log.wait_for_compaction()
+
+        # Five events went into the snapshot, two remain in the log
+        assert len(read_events(path)) == 2
+        with open(log.snapshot_path) as f:
+            snapshot = json.load(f)
+        assert snapshot["last_seq"] == 5
+        assert len(snapshot["orders"]) == 5
+        assert not os.path.exists(log.segment_path)
+        log.close()
+
+        assert OrderEventLog(path).count() == 7
+
+    def test_interrupted_compaction(self, tmp_path):
+        """Test recovery when the snapshot was never written"""
+        path = str(tmp_path / "orders.jsonl")
+        log = OrderEventLog(path, compact_every=None)
+        log.add("Aditya", "Monday", "Satellite", "Address", "Small")
+        log.add("Kabir", "Monday", "Chandkheda", "Address", "Small")
+
+        # Simulate a crash after the log was moved aside but before the
+        # snapshot was written
+        with patch.object(OrderEventLog, "_write_snapshot"):
+            log.compact()
+        log.update_status(10000, "Delivered")
+        log.close()
+
+        assert os.path.exists(log.segment_path)
+        restored = OrderEventLog(path, compact_every=None)
+        assert restored.count() == 2
+        assert restored.get(10000)["status"] == "Delivered"
+
+        # The next compaction folds the leftover segment into the snapshot
+        restored.compact()
+        restored.close()
+        assert not os.path.exists(restored.segment_path)
+        assert OrderEventLog(path).all() == restored.all()
+
+    def test_events_in_snapshot_are_not_replayed(self, tmp_path):
+        """Test that events already in the snapshot are skipped on replay"""
+        path = str(tmp_path / "orders.jsonl")
+        log = OrderEventLog(path, compact_every=None)
+        log.add("Aditya", "Monday", "Satellite", "Address", "Small")
+        log.add("Kabir", "Monday", "Chandkheda", "Address", "Small")
+        shutil.copy(path, str(tmp_path / "before_compaction.jsonl"))
+        log.compact()
+        log.close()
+
+        # Put the old events back as if they were never removed, followed by
+        # a partly written event
+        shutil.copy(str(tmp_path / "before_compaction.jsonl"), path)
+        with open(path, "a") as f:
+            f.write('{"seq": 3, "event": "status", "order_id": 10000, "status": "Deli')
+
+        restored = OrderEventLog(path)
+
+        assert restored.count() == 2
+        assert restored.get(10000)["status"] == "Pending"
+
+    def test_import_json(self, tmp_path, mock_orders):
+        """Test importing a pending_orders.json file"""
+        json_path = tmp_path / "pending_orders.json"
+        json_path.write_text(json.dumps(mock_orders))
+        log = OrderEventLog(str(tmp_path / "orders.jsonl"))
+
+        assert log.import_json(str(json_path)) == 2
+        assert log.find(delivery_day="Tuesday")[0]["order_id"] == 10002
+
+    def test_repository_on_event_log(self, tmp_path, mock_orders):
+        """Test that the order repository works on top of the event log"""
+        path = str(tmp_path / "orders.jsonl")
+        repository = OrderRepository(OrderEventLog(path))
+        repository.replace_all(mock_orders)
+        repository.update_status(10002, "Delivered", delivered=True)
+        repository.store.close()
+
+        restored = OrderRepository(OrderEventLog(path))
+
+        assert restored.find(status="Delivered")[0]["order_id"] == 10002
+        assert restored.all() == repository.all()
+
+    def test_predictor_uses_event_log_for_jsonl_paths(self, tmp_path, mock_dataset):
+        """Test that a .jsonl orders path selects the event log backend"""
+        dataset_path = tmp_path / "dataset.csv"
+        mock_dataset.assign(**{"Package Size": "Small"}).to_csv(dataset_path, index=False)
+
+        predictor = DeliveryPredictor(
+            dataset_path=str(dataset_path),
+            orders_db_path=str(tmp_path / "orders.jsonl"),
+        )
+
+        assert isinstance(predictor.order_store, OrderEventLog)
+        assert len(predictor.get_pending_orders()) == 20
+        predictor.order_store.close()
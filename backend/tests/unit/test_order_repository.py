@@ -0,0 +1,94 @@
+import pytest
+from unittest.mock import patch
+from order_log import OrderEventLog
+from order_repository import OrderRepository
+from order_store import OrderStore
+
+
+class TestOrderRepository:
+    """Test class for the in-memory order repository"""
+
+    def test_loads_existing_orders(self, tmp_path, mock_orders):
+        """Test that the repository starts from the stored orders"""
+        store = OrderStore(str(tmp_path / "orders.db"))
+        store.replace_all(mock_orders)
+
+        repository = OrderRepository(store)
+
+        assert len(repository) == 2
+        assert repository.get("10001")["name"] == "Kabir"
+        assert repository.get("missing") is None
+
+    def test_writes_update_indexes(self, tmp_path, mock_orders):
+        """Test that every write is reflected in the indexes"""
+        store = OrderStore(str(tmp_path / "orders.db"))
+        repository = OrderRepository(store)
+        repository.replace_all(mock_orders)
+
+        new_order = repository.add("Kabir", "Tuesday", "Chandkheda", "Address", "Large")
+        repository.update_status(10001, "Delivered", delivered=True)
+
+        assert [o["order_id"] for o in repository.find(name="Kabir")] == [
+            10001,
+            new_order["order_id"],
+        ]
+        assert [o["order_id"] for o in repository.find(delivery_day="Tuesday")] == [
+            10002,
+            new_order["order_id"],
+        ]
+        assert [o["order_id"] for o in repository.find(status="Pending")] == [
+            10002,
+            new_order["order_id"],
+        ]
+        assert repository.find(name="Kabir", status="Delivered")[0]["order_id"] == 10001
+        assert repository.find(delivery_day="Sunday") == []
+        assert repository.update_status(99999, "Delivered") is None
+
+        # The store and the in-memory view agree
+        assert repository.all() == store.all()
+
+    def test_reads_do_not_query_the_store(self, tmp_path, mock_orders):
+        """Test that reads are served from memory"""
+        store = OrderStore(str(tmp_path / "orders.db"))
+        repository = OrderRepository(store)
+        repository.replace_all(mock_orders)
+
+        with patch.object(store, "all") as store_all, patch.object(store, "find") as store_find:
+            repository.all()
+            repository.find(delivery_day="Monday")
+            repository.get(10001)
+
+        store_all.assert_not_called()
+        store_find.assert_not_called()
+
+    def test_returns_copies(self, tmp_path, mock_orders):
+        """Test that callers cannot modify the cached orders"""
+        repository = OrderRepository(OrderStore(str(tmp_path / "orders.db")))
+        repository.replace_all(mock_orders)
+
+        repository.all()[0]["status"] = "Changed"
+        repository.get(10001)["status"] = "Changed"
+
+        assert repository.get(10001)["status"] == "Pending"
+
+    def test_shared_repositories_see_each_others_writes(self, tmp_path, mock_orders):
+        """Test that shared repositories pick up writes made through another store"""
+        path = str(tmp_path / "orders.db")
+        first = OrderRepository(OrderStore(path), shared=True)
+        second = OrderRepository(OrderStore(path), shared=True)
+
+        first.replace_all(mock_orders)
+        assert second.all() == first.all()
+
+        added = second.add("Kabir", "Tuesday", "Chandkheda", "Address", "Large")
+        first.update_status(10001, "Delivered", delivered=True)
+
+        assert first.get(added["order_id"])["name"] == "Kabir"
+        assert second.get(10001)["status"] == "Delivered"
+        assert first.all() == second.all()
+        assert [o["order_id"] for o in second.find(status="Pending")] == [10002, added["order_id"]]
+
+    def test_shared_requires_revisions(self, tmp_path):
+        """Test that a store without revisions cannot be shared"""
+        with pytest.raises(ValueError):
+            OrderRepository(OrderEventLog(str(tmp_path / "orders.jsonl")), shared=True)
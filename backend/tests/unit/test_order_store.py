@@ -0,0 +1,124 @@
+import json
+import threading
+from order_store import FIRST_ORDER_ID, OrderStore
+
+
+def make_order(order_id, name="Aditya", day="Monday", status="Pending"):
+    """Order dict in the pending_orders.json shape"""
+    return {
+        "order_id": order_id,
+        "name": name,
+        "delivery_day": day,
+        "area": "Satellite",
+        "address": "Near Jodhpur Cross Road, Satellite, Ahmedabad - 380015",
+        "package_size": "Small",
+        "status": status,
+        "created_at": "2023-05-24 09:30:15",
+    }
+
+
+class TestOrderStore:
+    """Test class for the SQLite order store"""
+
+    def test_schema(self, tmp_path):
+        """Test WAL mode and the query indexes"""
+        store = OrderStore(str(tmp_path / "orders.db"))
+        connection = store._connection()
+
+        assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        indexed = {
+            connection.execute(f"PRAGMA index_info({row[1]})").fetchone()[2]
+            for row in connection.execute("PRAGMA index_list(orders)")
+        }
+        assert {"delivery_day", "status", "name"} <= indexed
+
+    def test_add_assigns_next_id(self, tmp_path):
+        """Test order id assignment"""
+        store = OrderStore(str(tmp_path / "orders.db"))
+
+        first = store.add("Aditya", "Monday", "Satellite", "Address", "Small")
+        second = store.add("Kabir", "Tuesday", "Chandkheda", "Address", "Large")
+
+        assert first["order_id"] == FIRST_ORDER_ID
+        assert second["order_id"] == FIRST_ORDER_ID + 1
+        assert second["status"] == "Pending"
+        assert "delivered_at" not in second
+        assert store.get(str(second["order_id"])) == second
+
+    def test_replace_all_and_find(self, tmp_path):
+        """Test bulk replacement and indexed filters"""
+        store = OrderStore(str(tmp_path / "orders.db"))
+        store.add("Meera", "Friday", "Paldi", "Address", "Small")
+
+        store.replace_all(
+            [
+                make_order(10000, "Aditya", "Monday"),
+                make_order(10001, "Kabir", "Monday", "Delivered"),
+                make_order(10002, "Aditya", "Tuesday"),
+            ]
+        )
+
+        assert store.count() == 3
+        assert [o["order_id"] for o in store.find(delivery_day="Monday")] == [10000, 10001]
+        assert [o["order_id"] for o in store.find(name="Aditya", status="Pending")] == [
+            10000,
+            10002,
+        ]
+        assert store.all()[0] == make_order(10000, "Aditya", "Monday")
+
+    def test_update_status(self, tmp_path):
+        """Test status updates"""
+        store = OrderStore(str(tmp_path / "orders.db"))
+        store.replace_all([make_order(10000)])
+
+        updated = store.update_status("10000", "Delivered", delivered=True)
+
+        assert updated["status"] == "Delivered"
+        assert "delivered_at" in updated
+        assert store.update_status(99999, "Delivered") is None
+        assert store.update_status("not-an-id", "Delivered") is None
+
+    def test_import_json(self, tmp_path, mock_orders):
+        """Test importing a pending_orders.json file"""
+        json_path = tmp_path / "pending_orders.json"
+        json_path.write_text(json.dumps(mock_orders))
+        store = OrderStore(str(tmp_path / "orders.db"))
+
+        assert store.import_json(str(json_path)) == len(mock_orders)
+
+        for order in mock_orders:
+            stored = store.get(order["order_id"])
+            assert stored == dict(order, order_id=int(order["order_id"]))
+
+    def test_concurrent_adds_get_unique_ids(self, tmp_path):
+        """Test that order ids stay unique across threads"""
+        store = OrderStore(str(tmp_path / "orders.db"))
+        ids = []
+
+        def add_orders():
+            for _ in range(20):
+                ids.append(store.add("Aditya", "Monday", "Satellite", "Address", "Small")["order_id"])
+            store.close()
+
+        threads = [threading.Thread(target=add_orders) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(ids) == list(range(FIRST_ORDER_ID, FIRST_ORDER_ID + 80))
+
+    def test_revision_counts_writes(self, tmp_path):
+        """Test that every write transaction increments the revision"""
+        path = str(tmp_path / "orders.db")
+        store = OrderStore(path)
+        other = OrderStore(path)
+
+        assert store.revision() == 0
+        assert store.last_write_revision is None
+        order = store.add("Aditya", "Monday", "Satellite", "Address", "Small")
+        assert store.last_write_revision == 1
+        other.update_status(order["order_id"], "Delivered")
+
+        assert store.revision() == other.revision() == 2
+        assert other.last_write_revision == 2
@@ -0,0 +1,44 @@
+from prediction_cache import PredictionCache
+
+
+class TestPredictionCache:
+    """Test class for the LRU prediction cache"""
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entries are evicted first"""
+        cache = PredictionCache(max_size=2)
+        cache.put("a", [1])
+        cache.put("b", [2])
+        assert cache.get("a") == [1]
+
+        cache.put("c", [3])
+        assert cache.get("b") is None
+        assert cache.get("a") == [1]
+        assert cache.get("c") == [3]
+        assert len(cache) == 2
+
+    def test_metrics(self):
+        """Test the hit-rate statistics"""
+        cache = PredictionCache(max_size=1)
+        assert cache.metrics()["hit_rate"] is None
+
+        cache.put("a", [1])
+        cache.get("a")
+        cache.get("b")
+        cache.put("b", [2])
+        cache.clear()
+
+        assert cache.metrics() == {
+            "size": 0,
+            "max_size": 1,
+            "hits": 1,
+            "misses": 1,
+            "evictions": 1,
+            "hit_rate": 0.5,
+        }
+
+    def test_disabled(self):
+        """Test that a cache without room stores nothing"""
+        cache = PredictionCache(max_size=0)
+        cache.put("a", [1])
+        assert cache.get("a") is None
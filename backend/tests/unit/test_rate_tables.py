@@ -0,0 +1,113 @@
+import pytest
+import numpy as np
+import pandas as pd
+from datetime import timedelta
+from rate_tables import (
+    RateCube,
+    aggregate_success_counts,
+    rollup_counts,
+)
+
+
+class TestRateTables:
+    """Test class for the success-rate aggregation and rate cube"""
+
+    def test_aggregate_success_counts(self, mock_dataset):
+        """Test the columnar success count aggregation"""
+        counts = aggregate_success_counts(mock_dataset)
+
+        # One group per distinct (name, day, time) combination
+        assert len(counts) == 7
+        assert counts["attempts"].sum() == len(mock_dataset)
+        assert counts.loc[("Vivaan", "Monday", "11 AM"), "successes"] == 0
+
+        # Rolled-up tables keep the requested levels
+        by_name_time = rollup_counts(counts, ["name", "time"])
+        assert by_name_time.loc[("Kabir", "4 PM"), "attempts"] == 1
+        assert by_name_time.loc[("Kabir", "4 PM"), "successes"] == 0
+
+    def test_rate_cube_from_counts(self, mock_dataset):
+        """Test building the dense rate cube"""
+        cube = RateCube.from_counts(aggregate_success_counts(mock_dataset))
+
+        assert cube.day_time_rates.shape == (5, 7, 24)
+        assert cube.day_time_rates.dtype == np.float32
+        assert cube.slot_labels[14] == "2 PM"
+        assert cube.slot_labels[3] == "3 AM"
+
+        kabir = cube.name_ids["Kabir"]
+        assert cube.time_attempts[kabir, 11] == 1
+        assert cube.time_rates[kabir, 11] == 1.0
+        assert cube.time_rates[kabir, 16] == 0.0
+        assert cube.bytes_per_customer == 7 * 24 * 12 + 7 * 12 + 24 * 12
+
+    def test_score_slots(self, mock_dataset):
+        """Test blending of overall and day-specific rates"""
+        cube = RateCube.from_counts(aggregate_success_counts(mock_dataset))
+
+        scores, available = cube.score_slots("Aditya", "Monday")
+        assert list(np.flatnonzero(available)) == [11, 14]
+        # Monday 11 AM has day-specific history, 2 PM does not
+        assert scores[11] == pytest.approx(1.0)
+        assert scores[14] == pytest.approx(1.0)
+
+        # 9 AM succeeds on Monday and fails on Tuesday: 0.3 * 0.5 + 0.7 * 1.0
+        history = pd.DataFrame(
+            {
+                "Name": ["Diya", "Diya"],
+                "Day of Delivery Attempt": ["Monday", "Tuesday"],
+                "Time": ["9 AM", "9 AM"],
+                "Delivery Status": ["Success", "Failed"],
+            }
+        )
+        cube = RateCube.from_counts(aggregate_success_counts(history))
+        scores, _ = cube.score_slots("Diya", "Monday")
+        assert scores[9] == pytest.approx(0.85)
+        scores, _ = cube.score_slots("Diya", "Sunday")
+        assert scores[9] == pytest.approx(0.5)
+
+        assert cube.score_slots("NonExistent", "Monday") is None
+
+    def test_record(self, mock_dataset):
+        """Test folding single outcomes into the cube"""
+        cube = RateCube.from_counts(aggregate_success_counts(mock_dataset))
+        kabir = cube.name_ids["Kabir"]
+        monday = cube.day_ids["Monday"]
+
+        # Kabir failed once at 4 PM on Monday; add one success
+        cube.record("Kabir", "Monday", 16, True)
+        assert cube.day_time_attempts[kabir, monday, 16] == 2
+        assert cube.day_time_rates[kabir, monday, 16] == pytest.approx(0.5)
+        assert cube.time_rates[kabir, 16] == pytest.approx(0.5)
+        assert cube.day_attempts[kabir, monday] == 3
+
+        # New customers and hours grow the cube without disturbing others
+        for i in range(20):
+            cube.record(f"New {i}", "Monday", 3, i % 2 == 0)
+        assert cube.slot_labels[3] == "3 AM"
+        assert cube.time_attempts[kabir, 16] == 2
+        scores, available = cube.score_slots("New 0", "Monday")
+        assert list(np.flatnonzero(available)) == [3]
+        assert scores[3] == pytest.approx(1.0)
+        assert cube.score_slots("New 1", "Monday")[0][3] == pytest.approx(0.0)
+
+        cube.record("Kabir", "Holiday", 16, True)
+        assert cube.day_time_rates[kabir, cube.day_ids["Holiday"], 16] == 1.0
+
+    def test_record_with_decay(self, mock_dataset):
+        """Test that recent outcomes outweigh older ones"""
+        cube = RateCube.from_counts(
+            aggregate_success_counts(mock_dataset), half_life_days=7
+        )
+        origin = cube.decay_origin
+        kabir = cube.name_ids["Kabir"]
+
+        # A success one half-life later counts twice as much as the old failure
+        cube.record("Kabir", "Monday", 16, True, when=origin + timedelta(days=7))
+        assert cube.time_rates[kabir, 16] == pytest.approx(2 / 3)
+
+        # Far in the future the weights are rescaled and old counts vanish
+        cube.record("Kabir", "Monday", 16, False, when=origin + timedelta(days=7000))
+        assert cube.decay_origin == origin + timedelta(days=7000)
+        assert cube.time_attempts[kabir, 16] == pytest.approx(1.0)
+        assert cube.time_rates[kabir, 16] == pytest.approx(0.0)
@@ -0,0 +1,449 @@
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+from delivery_predictor import FALLBACK_LIFETIME, DeliveryPredictor
+from real_time_cache import BackgroundRefresher, SingleFlightCache, index_by_area
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSingleFlightCache:
+    """Test class for the single-flight real-time data cache"""
+
+    def test_get_caches_until_expiry(self):
+        """Test that values are reused until their lifetime passes"""
+        clock = FakeClock()
+        cache = SingleFlightCache({"traffic": 900}, clock=clock)
+        calls = []
+
+        def fetch():
+            calls.append(clock.now)
+            return {"fetched_at": clock.now}
+
+        assert cache.get("traffic", fetch) == {"fetched_at": 0.0}
+        clock.now = 899
+        assert cache.get("traffic", fetch) == {"fetched_at": 0.0}
+        assert cache.age("traffic") == 899
+        clock.now = 900
+        assert cache.get("traffic", fetch) == {"fetched_at": 900}
+        assert calls == [0.0, 900]
+
+        # Failed fetches are returned but not cached
+        assert cache.get("weather", lambda: None) is None
+        assert cache.peek("weather") is None
+        assert cache.age("weather") is None
+
+    def test_failed_fetch_serves_last_good_value(self):
+        """Test that an expired entry is served when its refresh fails"""
+        clock = FakeClock()
+        cache = SingleFlightCache({"traffic": 900}, clock=clock)
+        cache.put("traffic", {"version": 1})
+
+        clock.now = 1000
+        assert cache.get("traffic", lambda: None) == {"version": 1}
+        assert cache.age("traffic") == 1000
+        assert cache.get("traffic", lambda: {"version": 2}) == {"version": 2}
+
+    def test_single_flight_under_load(self):
+        """Test that concurrent readers of an expired key trigger one fetch"""
+        clock = FakeClock()
+        cache = SingleFlightCache({"traffic": 900}, clock=clock)
+        calls = []
+        release = threading.Event()
+
+        def slow_fetch():
+            calls.append(clock.now)
+            release.wait(5)
+            return {"version": len(calls)}
+
+        def read_all(results):
+            barrier.wait()
+            results.append(cache.get("traffic", slow_fetch))
+
+        # Cold cache: everyone waits for the one fetch
+        barrier = threading.Barrier(20)
+        results = []
+        threads = [threading.Thread(target=read_all, args=(results,)) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        release.set()
+        for thread in threads:
+            thread.join()
+        assert len(calls) == 1
+        assert results == [{"version": 1}] * 20
+
+        # Expired entry: one refresh, everyone else gets the stale value
+        clock.now = 1000
+        release.clear()
+        barrier = threading.Barrier(20)
+        results = []
+        threads = [threading.Thread(target=read_all, args=(results,)) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for _ in range(100):
+            if len(results) == 19:
+                break
+            time.sleep(0.01)
+        assert results == [{"version": 1}] * 19
+        release.set()
+        for thread in threads:
+            thread.join()
+        assert len(calls) == 2
+        assert results[-1] == {"version": 2}
+        assert cache.peek("traffic") == {"version": 2}
+        # Fetch locks are dropped once nobody holds or waits for them
+        assert not cache._fetch_locks
+
+    def test_get_async_single_flight(self):
+        """Test that concurrent async readers share one fetch and keep last good values"""
+        clock = FakeClock()
+        cache = SingleFlightCache({"traffic": 900}, stale_grace=300, clock=clock)
+        calls = []
+
+        async def fetch():
+            calls.append(clock.now)
+            await asyncio.sleep(0.05)
+            return {"version": len(calls)}
+
+        async def failing_fetch():
+            return None
+
+        async def read_all():
+            return await asyncio.gather(
+                *(cache.get_async("traffic", fetch) for _ in range(20))
+            )
+
+        # Cold cache: everyone waits for the one fetch
+        assert asyncio.run(read_all()) == [{"version": 1}] * 20
+        assert len(calls) == 1
+
+        # Within the grace window the stale value is served and refreshed
+        clock.now = 1000
+
+        async def read_in_grace():
+            results = await read_all()
+            await asyncio.sleep(0.1)
+            return results
+
+        assert asyncio.run(read_in_grace()) == [{"version": 1}] * 20
+        assert len(calls) == 2
+        assert cache.peek("traffic") == {"version": 2}
+
+        # Past the grace window a failed fetch serves the last good value
+        clock.now = 3000
+        assert asyncio.run(cache.get_async("traffic", failing_fetch)) == {"version": 2}
+        assert asyncio.run(cache.get_async("weather", failing_fetch)) is None
+        assert not cache._fetch_locks
+
+    def test_get_async_waits_for_thread_fetch(self):
+        """Test that async readers are woken as soon as a fetch on a thread ends"""
+        cache = SingleFlightCache({"traffic": 900})
+        started = threading.Event()
+        release = threading.Event()
+        finished = []
+
+        def fetch():
+            started.set()
+            release.wait()
+            finished.append(time.monotonic())
+            return {"status": "Heavy"}
+
+        async def unexpected_fetch():
+            raise AssertionError("waiters must not fetch again")
+
+        async def read_all():
+            readers = [
+                asyncio.create_task(cache.get_async("traffic", unexpected_fetch))
+                for _ in range(50)
+            ]
+            await asyncio.sleep(0.02)
+            assert not any(reader.done() for reader in readers)
+            release.set()
+            results = await asyncio.gather(*readers)
+            return results, time.monotonic()
+
+        thread = threading.Thread(target=cache.get, args=("traffic", fetch))
+        thread.start()
+        started.wait()
+        results, done = asyncio.run(read_all())
+        thread.join()
+
+        assert results == [{"status": "Heavy"}] * 50
+        assert done - finished[0] < 0.02
+        assert not cache._waiters
+        assert not cache._fetch_locks
+
+    def test_stale_grace_refreshes_in_background(self):
+        """Test that entries within the grace window are served without waiting"""
+        clock = FakeClock()
+        cache = SingleFlightCache({"weather": 3600}, stale_grace=600, clock=clock)
+        release = threading.Event()
+        calls = []
+
+        def slow_fetch():
+            calls.append(clock.now)
+            release.wait(5)
+            return {"fetched_at": clock.now}
+
+        cache.put("weather", {"fetched_at": 0.0})
+
+        # Expired but within the grace window: stale value, refresh in background
+        clock.now = 3700
+        assert cache.get("weather", slow_fetch) == {"fetched_at": 0.0}
+        assert cache.get("weather", slow_fetch) == {"fetched_at": 0.0}
+        release.set()
+        for _ in range(100):
+            if cache.peek("weather") != {"fetched_at": 0.0}:
+                break
+            time.sleep(0.01)
+        assert cache.peek("weather") == {"fetched_at": 3700}
+        assert calls == [3700]
+
+        # Past the grace window the caller waits for the fetch
+        clock.now = 3700 + 3600 + 600
+        assert cache.get("weather", slow_fetch) == {"fetched_at": 7900}
+
+    def test_background_refresher(self):
+        """Test that the refresher re-fetches entries before they expire"""
+        clock = FakeClock()
+        cache = SingleFlightCache({"traffic": 900, "festivals": 86400}, clock=clock)
+        refresher = BackgroundRefresher(
+            cache,
+            {"traffic": lambda: {"at": clock.now}, "festivals": lambda: {"at": clock.now}},
+            refresh_ahead=0.8,
+        )
+
+        assert refresher.refresh_due() == ["traffic", "festivals"]
+        clock.now = 719
+        assert refresher.refresh_due() == []
+        clock.now = 720
+        assert refresher.refresh_due() == ["traffic"]
+        assert cache.get("traffic", lambda: None) == {"at": 720}
+
+        # The thread refreshes on start and stops cleanly
+        cache.invalidate("festivals")
+        refresher.poll_interval = 0.01
+        refresher.start()
+        for _ in range(100):
+            if cache.peek("festivals") is not None:
+                break
+            time.sleep(0.01)
+        refresher.stop(timeout=1)
+        assert cache.peek("festivals") == {"at": 720}
+
+        # Batch refreshes skip keys already being fetched and release the rest
+        held = cache._fetch_lock("traffic")
+        held.acquire()
+        assert cache.refresh_many(["traffic", "weather"], lambda keys: {"weather": {}}) == [
+            "weather"
+        ]
+        held.release()
+        cache._unref("traffic")
+        assert not cache._fetch_locks
+
+    def test_predictor_refresher(self, mock_predictor):
+        """Test the predictor's background refresher and cache ages"""
+        assert mock_predictor.start_real_time_refresher() is None
+
+        mock_predictor.gemini_api.is_configured = True
+        fetched = threading.Event()
+
+        batches = []
+
+        def api_many(requests):
+            batches.append([request[0] for request in requests])
+            fetched.set()
+            return [{"type": request[0]} for request in requests]
+
+        with patch.object(
+            mock_predictor.gemini_api, "get_real_time_data_many", side_effect=api_many
+        ):
+            refresher = mock_predictor.start_real_time_refresher(poll_interval=60)
+            assert fetched.wait(5)
+            mock_predictor.stop_real_time_refresher()
+
+        assert not refresher._thread
+        # All three types were due and fetched in one concurrent batch
+        assert batches == [["traffic", "weather", "festivals"]]
+        ages = mock_predictor.get_real_time_cache_age()
+        assert set(ages) == {"traffic", "weather", "festivals"}
+        assert all(age is not None and age < 60 for age in ages.values())
+        assert DeliveryPredictor.get_real_time_data(mock_predictor, "weather") == {
+            "type": "weather"
+        }
+
+    def test_predictor_single_upstream_call(self, mock_predictor):
+        """Test that concurrent predictor reads share one Gemini call"""
+        mock_predictor.gemini_api.is_configured = True
+        upstream_calls = []
+
+        def slow_api(data_type, prompt, system_content=None):
+            upstream_calls.append(data_type)
+            time.sleep(0.05)
+            return {"Satellite": {"congestion_level": 4}}
+
+        barrier = threading.Barrier(10)
+        results = []
+
+        def read():
+            barrier.wait()
+            results.append(
+                DeliveryPredictor.get_real_time_data(mock_predictor, "traffic", "Satellite")
+            )
+
+        with patch.object(mock_predictor.gemini_api, "get_real_time_data", side_effect=slow_api):
+            threads = [threading.Thread(target=read) for _ in range(10)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert upstream_calls == ["traffic"]
+        assert results == [{"congestion_level": 4}] * 10
+
+    def test_predictor_area_lookups(self, mock_predictor):
+        """Test that area lookups use the city-wide data and their own keys"""
+        mock_predictor.gemini_api.is_configured = True
+        get_real_time_data = DeliveryPredictor.get_real_time_data.__get__(mock_predictor)
+        prompts = []
+
+        def api(data_type, prompt, system_content=None):
+            prompts.append(prompt)
+            if "Gota" in prompt:
+                return {"Gota": {"congestion_level": 9}}
+            return {
+                "status": "Normal",
+                "areas": {"Gota": {"congestion_level": 3}},
+                "Satellite": {"congestion_level": 5},
+            }
+
+        with patch.object(mock_predictor.gemini_api, "get_real_time_data", side_effect=api):
+            city = get_real_time_data("traffic")
+
+            # Fresh city-wide data answers every area without upstream calls
+            assert get_real_time_data("traffic", "Gota") == {"congestion_level": 3}
+            assert get_real_time_data("traffic", "Satellite") == {"congestion_level": 5}
+            assert get_real_time_data("traffic", "Unknown") == city
+            assert len(prompts) == 1
+
+            # Once it expires, areas are fetched and cached on their own
+            mock_predictor.real_time_cache.clock = lambda: time.monotonic() + 1000
+            assert get_real_time_data("traffic", "Gota") == {"congestion_level": 9}
+            assert get_real_time_data("traffic", "Gota") == {"congestion_level": 9}
+            assert len(prompts) == 2
+            assert "Gota" in prompts[1]
+
+            # Unknown areas never get their own keys or upstream calls: they
+            # share one city-wide refresh
+            for i in range(20):
+                assert get_real_time_data("traffic", f"Nowhere {i}")["status"] == "Normal"
+            assert len(prompts) == 3
+            assert "Nowhere" not in prompts[2]
+
+        cache = mock_predictor.real_time_cache
+        assert set(cache._entries) == {"traffic", ("traffic", "Gota")}
+        assert set(mock_predictor.real_time_area_views) <= {"traffic", ("traffic", "Gota")}
+        assert not cache._fetch_locks
+
+        assert mock_predictor.real_time_cache.lifetime(("traffic", "Gota")) == 900
+
+    def test_predictor_open_circuit_serves_last_good(self, mock_predictor):
+        """Test that the predictor serves cached data while the circuit is open"""
+        mock_predictor.gemini_api.is_configured = True
+        get_real_time_data = DeliveryPredictor.get_real_time_data.__get__(mock_predictor)
+        breaker = mock_predictor.gemini_api.circuit_breaker
+        breaker.failure_threshold = 1
+        good = {"status": "Normal", "Gota": {"congestion_level": 3}}
+        mock_predictor.real_time_cache.put("traffic", good)
+        mock_predictor.real_time_cache.clock = lambda: time.monotonic() + 1000
+
+        with patch("gemini_api.genai") as mock_genai:
+            chat = mock_genai.GenerativeModel.return_value.start_chat.return_value
+            chat.send_message.side_effect = Exception("Service unavailable")
+            assert get_real_time_data("traffic") is good
+            assert breaker.state == "open"
+
+            # No further upstream calls while open, for the city or an area
+            assert get_real_time_data("traffic") is good
+            assert get_real_time_data("traffic", "Gota") == {"congestion_level": 3}
+            assert chat.send_message.call_count == 1
+
+        metrics = mock_predictor.get_metrics()
+        assert metrics["gemini_circuit_breaker"]["rejected"] == 2
+        assert metrics["real_time_cache_age"]["traffic"] >= 1000
+
+    def test_predictor_open_circuit_stable_fallback(self, mock_predictor):
+        """Test that mock fallback data stays the same while the circuit is open"""
+        del mock_predictor.get_real_time_data
+        mock_predictor.gemini_api.is_configured = True
+        mock_predictor.gemini_api.circuit_breaker.failure_threshold = 1
+        clock = FakeClock()
+        cache = mock_predictor.real_time_cache
+        cache.clock = clock
+        name = next(iter(mock_predictor.customer_areas))
+
+        with patch("gemini_api.genai") as mock_genai:
+            chat = mock_genai.GenerativeModel.return_value.start_chat.return_value
+            chat.send_message.side_effect = Exception("Service unavailable")
+            snapshot = mock_predictor.get_real_time_snapshot()
+            assert mock_predictor.gemini_api.circuit_breaker.state == "open"
+            mock_predictor.predict_optimal_times_batch([name], "Monday")
+
+            # Same mock data, snapshot and predictions on the next call
+            assert mock_predictor.get_real_time_snapshot() is snapshot
+            mock_predictor.predict_optimal_times_batch([name], "Monday", snapshot=snapshot)
+            assert mock_predictor.prediction_cache.metrics()["hits"] == 1
+
+            # Areas read the same fallback without keys of their own
+            traffic = cache.peek("traffic")
+            assert mock_predictor.get_real_time_data("traffic", "Gota") == (
+                index_by_area(traffic).get("Gota", traffic)
+            )
+
+            # The fallback expires quickly, so the upstream is tried again;
+            # while it still fails the same data is served
+            assert cache.lifetime("traffic") == FALLBACK_LIFETIME
+            clock.now = FALLBACK_LIFETIME
+            assert cache.must_fetch("traffic")
+            assert mock_predictor.get_real_time_snapshot().version == snapshot.version
+
+    def test_predictor_async_single_upstream_call(self, mock_predictor):
+        """Test that concurrent async predictor reads share one Gemini call"""
+        mock_predictor.gemini_api.is_configured = True
+        upstream_calls = []
+
+        async def slow_api(data_type, prompt, system_content=None):
+            upstream_calls.append((threading.current_thread().name, prompt))
+            await asyncio.sleep(0.05)
+            return {"status": "Normal", "Satellite": {"congestion_level": 4}}
+
+        async def read_all():
+            return await asyncio.gather(
+                *(mock_predictor.get_real_time_data_async("traffic") for _ in range(10)),
+                mock_predictor.get_real_time_snapshot_async(),
+            )
+
+        with patch.object(mock_predictor.gemini_api, "get_real_time_data_async", new=slow_api):
+            *results, snapshot = asyncio.run(read_all())
+            # Fresh city-wide data answers areas from memory
+            area = asyncio.run(mock_predictor.get_real_time_data_async("traffic", "Satellite"))
+            again = asyncio.run(mock_predictor.get_real_time_snapshot_async())
+
+        # Run on the API client's loop thread: traffic once, weather, festivals
+        assert len(upstream_calls) == 3
+        assert {name for name, _ in upstream_calls} == {"gemini-api-loop"}
+        assert results == [{"status": "Normal", "Satellite": {"congestion_level": 4}}] * 10
+        assert snapshot.traffic is mock_predictor.real_time_cache.peek("traffic")
+        assert again is snapshot
+        assert area == {"congestion_level": 4}
+        mock_predictor.gemini_api.close()
@@ -0,0 +1,122 @@
+import pytest
+import numpy as np
+import time
+from route_solver import (
+    AUTO_EXACT_MAX_STOPS,
+    EXACT_MAX_STOPS,
+    GAP_MAX_STOPS,
+    route_duration,
+    solve_brute_force,
+    solve_exact,
+    solve_heuristic,
+    solve_route,
+)
+
+
+def random_durations(stops, seed, symmetric=True):
+    """Random integer duration matrix with the start at index 0"""
+    rng = np.random.default_rng(seed)
+    durations = rng.integers(1, 60, size=(stops + 1, stops + 1))
+    if symmetric:
+        durations = np.triu(durations, 1) + np.triu(durations, 1).T
+    np.fill_diagonal(durations, 0)
+    return durations
+
+
+class TestRouteSolver:
+    """Test class for the route solvers"""
+
+    @pytest.mark.parametrize("stops", [1, 2, 3, 5, 7])
+    @pytest.mark.parametrize("symmetric", [True, False])
+    def test_exact_matches_brute_force(self, stops, symmetric):
+        """Test that Held-Karp finds the same optimum as the permutation search"""
+        for seed in range(5):
+            durations = random_durations(stops, seed, symmetric)
+
+            order, total = solve_exact(durations)
+            _, expected_total = solve_brute_force(durations)
+
+            assert total == expected_total
+            assert sorted(order) == list(range(1, stops + 1))
+            assert route_duration(durations, order) == total
+
+    def test_exact_no_stops(self):
+        """Test the exact solver with only a start location"""
+        assert solve_exact(np.zeros((1, 1), dtype=int)) == ([], 0)
+
+    def test_exact_known_route(self):
+        """Test a route where the optimum is easy to see"""
+        # Stops lie on a line: start -> 2 -> 1 -> 3 is the only cheap path
+        durations = np.array(
+            [
+                [0, 20, 5, 40],
+                [20, 0, 10, 5],
+                [5, 10, 0, 30],
+                [40, 5, 30, 0],
+            ]
+        )
+        assert solve_exact(durations) == ([2, 1, 3], 20)
+
+    def test_exact_rejects_too_many_stops(self):
+        """Test the exact solver size limit"""
+        durations = np.ones((EXACT_MAX_STOPS + 2, EXACT_MAX_STOPS + 2), dtype=int)
+        with pytest.raises(ValueError):
+            solve_exact(durations)
+
+    @pytest.mark.parametrize("stops", [0, 1, 2, 5, 9, 12])
+    def test_heuristic_close_to_optimum(self, stops):
+        """Test that the heuristic returns valid routes near the optimum"""
+        for seed in range(3):
+            durations = random_durations(stops, seed)
+
+            order, total = solve_heuristic(durations, time_limit_ms=100)
+            _, optimal_total = solve_exact(durations)
+
+            assert sorted(order) == list(range(1, stops + 1))
+            assert route_duration(durations, order) == total
+            assert optimal_total <= total <= optimal_total * 1.05
+
+    def test_heuristic_large_route_within_time_limit(self):
+        """Test that a 150-stop route is solved within its time budget"""
+        durations = random_durations(150, seed=0)
+
+        start = time.perf_counter()
+        order, total = solve_heuristic(durations, time_limit_ms=200)
+        elapsed = time.perf_counter() - start
+
+        assert sorted(order) == list(range(1, 151))
+        assert route_duration(durations, order) == total
+        assert elapsed < 1.0
+
+    def test_solve_route_auto(self):
+        """Test that "auto" picks the solver by route size"""
+        _, _, info = solve_route(random_durations(AUTO_EXACT_MAX_STOPS, 0))
+        assert info["name"] == "exact"
+        assert info["optimality_gap"] == 0.0
+
+        _, _, info = solve_route(
+            random_durations(EXACT_MAX_STOPS + 5, 0), time_limit_ms=50
+        )
+        assert info["name"] == "heuristic"
+        assert info["optimal_duration"] is None
+        assert info["optimality_gap"] is None
+
+    def test_solve_route_heuristic_reports_gap(self):
+        """Test the optimality gap reported for small heuristic routes"""
+        durations = random_durations(GAP_MAX_STOPS, 1)
+
+        _, total, info = solve_route(durations, "heuristic", time_limit_ms=50)
+
+        assert info["name"] == "heuristic"
+        assert info["optimal_duration"] == solve_exact(durations)[1]
+        assert info["optimality_gap"] == pytest.approx(
+            (total - info["optimal_duration"]) / info["optimal_duration"], abs=1e-4
+        )
+
+    def test_solve_route_rejects_invalid_options(self):
+        """Test validation of the solver name and time limit"""
+        durations = random_durations(3, 0)
+        with pytest.raises(ValueError):
+            solve_route(durations, "genetic")
+        with pytest.raises(ValueError):
+            solve_route(durations, "heuristic", time_limit_ms=0)
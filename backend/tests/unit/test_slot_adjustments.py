@@ -0,0 +1,70 @@
+import pytest
+import numpy as np
+from datetime import datetime
+from slot_adjustments import MIN_SCORE, compile_slot_adjustment
+
+
+class TestSlotAdjustments:
+    """Test class for compiled real-time slot adjustments"""
+
+    def test_no_data_leaves_scores_unchanged(self):
+        """Test that missing real-time data does not change scores"""
+        scores = np.linspace(0, 1, 24, dtype=np.float32)
+        adjustment = compile_slot_adjustment(None, {}, {}, {})
+
+        np.testing.assert_allclose(adjustment.apply(scores), scores)
+
+    def test_heavy_traffic_reduces_peak_hours(self):
+        """Test congestion reductions and the minimum score floor"""
+        scores = np.full(24, 0.8, dtype=np.float32)
+        scores[18] = 0.05
+        adjustment = compile_slot_adjustment(
+            "Satellite", {"congestion_level": 8}, {}, {}
+        )
+
+        adjusted = adjustment.apply(scores)
+        assert adjusted[9] == pytest.approx(0.8 * 0.9)
+        assert adjusted[12] == pytest.approx(0.8)
+        assert adjusted[18] == pytest.approx(MIN_SCORE)
+
+    def test_light_traffic_boosts_off_peak_hours(self):
+        """Test the capped boost for light traffic"""
+        scores = np.full(24, 0.9, dtype=np.float32)
+        adjustment = compile_slot_adjustment("Gota", {"congestion_level": 2}, {}, {})
+
+        adjusted = adjustment.apply(scores)
+        assert adjusted[8] == pytest.approx(0.9)
+        assert adjusted[11] == pytest.approx(0.95)
+
+    def test_weather_and_festival_reductions_combine(
+        self, mock_weather_data, mock_festival_data
+    ):
+        """Test that chained reductions match applying them one at a time"""
+        mock_weather_data["conditions"] = "Rainy"
+        mock_festival_data["festivals"][0]["date"] = datetime.now().strftime(
+            "%Y-%m-%d"
+        )
+        scores = np.full(24, 0.5, dtype=np.float32)
+
+        adjusted = compile_slot_adjustment(
+            "Satellite", {}, mock_weather_data, mock_festival_data
+        ).apply(scores)
+
+        # Rain everywhere, plus the Moderate festival from 16:00 to 22:00
+        assert adjusted[10] == pytest.approx(0.5 * 0.8)
+        assert adjusted[17] == pytest.approx(max(MIN_SCORE, 0.5 * 0.8 * 0.8))
+
+        # Areas outside the festival only see the rain
+        adjusted = compile_slot_adjustment(
+            "Gota", {}, mock_weather_data, mock_festival_data
+        ).apply(scores)
+        assert adjusted[17] == pytest.approx(0.5 * 0.8)
+
+    def test_apply_to_matrix(self):
+        """Test applying one adjustment to many score rows"""
+        scores = np.random.rand(5, 24).astype(np.float32)
+        adjustment = compile_slot_adjustment(None, {}, {"conditions": "Rain"}, {})
+
+        adjusted = adjustment.apply(scores)
+        assert adjusted.shape == (5, 24)
+        np.testing.assert_allclose(adjusted, np.maximum(MIN_SCORE, scores * 0.8))
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+from time_slots import MISSING_HOUR, SLOT_LABELS, format_hour, parse_hour, parse_hours
+
+
+class TestTimeSlots:
+    """Test class for the hourly time slot ids and labels"""
+
+    def test_parse_hour(self):
+        """Test conversion of time slot labels to hours"""
+        assert parse_hour("11 AM") == 11
+        assert parse_hour("2 PM") == 14
+        assert parse_hour("12 PM") == 12
+        assert parse_hour("12 AM") == 0
+        assert parse_hour("02 PM") == 14
+
+    def test_format_hour(self):
+        """Test conversion of hours to time slot labels"""
+        assert format_hour(11) == "11 AM"
+        assert format_hour(14) == "2 PM"
+        assert format_hour(12) == "12 PM"
+        assert format_hour(0) == "12 AM"
+        assert all(parse_hour(format_hour(hour)) == hour for hour in range(24))
+        assert SLOT_LABELS[14] == "2 PM"
+
+    def test_parse_hours(self):
+        """Test conversion of a label column to hour ids"""
+        labels = pd.Series(["11 AM", "2 PM", "11 AM", "12 AM", "12 PM"])
+        assert parse_hours(labels).tolist() == [11, 14, 11, 0, 12]
+
+        # Missing and unreadable labels get the sentinel instead of raising
+        labels = pd.Series(["11 AM", np.nan, " ", "soon", "25 PM", None, "2 PM"])
+        assert parse_hours(labels).tolist() == [11] + [MISSING_HOUR] * 5 + [14]
@@ -0,0 +1,89 @@
+"""
+Hourly delivery time slots.
+
+Slots are stored and compared as integer hour ids (0-23). Labels such as
+"2 PM" are only used at the edges: they are parsed once when data is loaded
+and looked up in ``SLOT_LABELS`` when results are displayed.
+"""
+
+import numpy as np
+import pandas as pd
+
+HOURS_PER_DAY = 24
+
+# Hour id of a missing or unreadable label (a NaN or blank Time cell)
+MISSING_HOUR = -1
+
+
+def format_hour(hour):
+    """
+    Convert an hour of the day (14) into a time slot label ("2 PM").
+
+    Args:
+        hour (int): Hour of the day in the range 0-23.
+
+    Returns:
+        str: Time slot label in "<hour> AM|PM" form.
+    """
+    suffix = "AM" if hour < 12 else "PM"
+    return f"{hour % 12 or 12} {suffix}"
+
+
+# Label of every hour id, and the id of every canonical label
+SLOT_LABELS = tuple(format_hour(hour) for hour in range(HOURS_PER_DAY))
+HOUR_IDS = {label: hour for hour, label in enumerate(SLOT_LABELS)}
+
+
+def parse_hour(label):
+    """
+    Convert a time slot label such as "2 PM" into an hour of the day (14).
+
+    Args:
+        label (str): Time slot label in "<hour> AM|PM" form.
+
+    Returns:
+        int: Hour of the day in the range 0-23.
+    """
+    hour = HOUR_IDS.get(label)
+    if hour is not None:
+        return hour
+
+    # Non-canonical spelling, e.g. "02 PM"
+    hour = int(label.split()[0])
+    if "PM" in label and hour != 12:
+        hour += 12
+    elif "AM" in label and hour == 12:
+        hour = 0
+    return hour
+
+
+def parse_hours(labels):
+    """
+    Convert a column of time slot labels into hour ids.
+
+    Each distinct label is parsed once, however many rows use it. Missing
+    labels and labels that are not a time slot get ``MISSING_HOUR``, so
+    callers can drop those rows instead of failing on a dirty dataset.
+
+    Args:
+        labels (Series): Time slot labels.
+
+    Returns:
+        ndarray: int64 hour ids aligned with ``labels``.
+    """
+    categories = pd.Categorical(labels)
+    hours = np.array(
+        [_parse_hour_or_missing(label) for label in categories.categories],
+        dtype=np.int64,
+    )
+    # Code -1 (a missing label) picks the appended MISSING_HOUR
+    return np.append(hours, MISSING_HOUR)[categories.codes]
+
+
+def _parse_hour_or_missing(label):
+    """Hour id of a label, or ``MISSING_HOUR`` if it is not a time slot."""
+    try:
+        hour = parse_hour(str(label))
+    except (ValueError, IndexError):
+        return MISSING_HOUR
+    return hour if 0 <= hour < HOURS_PER_DAY else MISSING_HOUR
@@ -0,0 +1,22 @@
+"""
+WSGI entry point for production servers.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+With gunicorn's ``preload_app`` (see gunicorn.conf.py) this module is imported
+once in the master process, so the dataset, rate tables and other startup
+data are built once and shared copy-on-write by the forked workers. Each
+worker starts its own background threads after the fork, or on its first
+request under servers without a fork hook.
+"""
+
+from app import create_app, env_flag
+
+app = create_app(
+    {
+        # Workers share the order database, and a deploy keeps its orders
+        "ORDERS_SHARED": True,
+        "GENERATE_PENDING_ORDERS": env_flag("GENERATE_PENDING_ORDERS", "0"),
+    },
+    start_background_tasks=False,
+)